@@ -0,0 +1,61 @@
+import gc
+import random
+import sys
+import time
+
+from order_processing import np, process_checkout, process_checkout_batch
+
+ITEMS_PER_REQUEST = 4
+COUPONS = [None, "SAVE10", "SAVE20", "VIP"]
+# Item dicts are drawn from a shared pool so that 10M items fit in memory;
+# the work per item is the same as for distinct dicts.
+ITEM_POOL_SIZE = 100_000
+
+
+def make_requests(items: int):
+    rng = random.Random(1)
+    pool = [{"price": rng.randint(1, 500), "qty": rng.randint(1, 5)} for _ in range(ITEM_POOL_SIZE)]
+    return [
+        {
+            "user_id": user_id,
+            "items": rng.choices(pool, k=ITEMS_PER_REQUEST),
+            "coupon": rng.choice(COUPONS),
+            "currency": "USD",
+        }
+        for user_id in range(items // ITEMS_PER_REQUEST)
+    ]
+
+
+def digest(results):
+    # Results of both paths are not kept at once; compare a checksum.
+    return hash(tuple(tuple(result.values()) for result in results))
+
+
+def measure(run, requests):
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        results = run(requests)
+        elapsed = time.perf_counter() - started
+    finally:
+        gc.enable()
+    return elapsed, digest(results)
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 100_000, 10_000_000]
+    if np is None:
+        print("numpy is not installed; process_checkout_batch falls back to the scalar loop")
+    print(f"{'items':>10} {'requests':>9} {'scalar loop':>12} {'batch':>10} {'speedup':>8}")
+    for items in sizes:
+        requests = make_requests(items)
+        scalar_time, expected = measure(lambda batch: [process_checkout(request) for request in batch], requests)
+        batch_time, results = measure(process_checkout_batch, requests)
+        assert results == expected
+        print(f"{items:>10} {len(requests):>9} {scalar_time * 1e3:>9.1f} ms {batch_time * 1e3:>7.1f} ms "
+              f"{scalar_time / batch_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
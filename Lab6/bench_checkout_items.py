@@ -0,0 +1,30 @@
+import timeit
+
+from order_processing import _calculate_subtotal, _validate_and_sum, _validate_request
+
+TARGET_ITEMS = 2_000_000
+
+
+def two_pass(user_id, items):
+    # What process_checkout did before the fused path.
+    _validate_request(user_id, items)
+    return _calculate_subtotal(items)
+
+
+def per_call(function, items, number):
+    return min(timeit.repeat(lambda: function(1, items), number=number, repeat=5)) / number
+
+
+def main() -> None:
+    print(f"{'items':>6} {'two passes':>12} {'fused':>12} {'speedup':>8}")
+    for count in (1, 10, 1000):
+        items = [{"price": 100 + index % 50, "qty": 1 + index % 3} for index in range(count)]
+        assert two_pass(1, items) == _validate_and_sum(1, items)
+        number = max(TARGET_ITEMS // count, 100)
+        before = per_call(two_pass, items, number)
+        after = per_call(_validate_and_sum, items, number)
+        print(f"{count:>6} {before * 1e9:>9.0f} ns {after * 1e9:>9.0f} ns {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+
+from checkout_parallel import process_file_parallel
+
+COUPONS = [None, "SAVE10", "SAVE20", "VIP"]
+
+
+def write_requests(path: str, count: int) -> None:
+    rng = random.Random(1)
+    with open(path, "w", encoding="utf-8") as target:
+        for user_id in range(count):
+            items = [{"price": rng.randint(1, 500), "qty": rng.randint(1, 5)} for _ in range(rng.randint(1, 5))]
+            target.write(json.dumps({"user_id": user_id, "items": items, "coupon": rng.choice(COUPONS)}) + "\n")
+
+
+class NullOutput(io.TextIOBase):
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{count} requests, {os.cpu_count()} CPUs")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "requests.jsonl")
+        write_requests(path, count)
+        baseline = None
+        for workers in (1, 2, 4, 8):
+            stats = process_file_parallel(path, NullOutput(), NullOutput(), workers=workers)
+            baseline = baseline or stats.elapsed
+            per_worker = ", ".join(str(worker.records) for worker in stats.per_worker())
+            print(f"{workers:>2} processes {stats.elapsed:>7.2f} s {stats.records_per_second:>9.0f} records/s "
+                  f"{baseline / stats.elapsed:>5.2f}x   records per worker: {per_worker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from checkout_stream import DEFAULT_CHUNK_SIZE, _decode, _encode, _open_output, load_coupons, process_stream
+
+
+class ShardStats(NamedTuple):
+    shard: int
+    pid: int
+    lines: int
+    records: int
+    failed: int
+    elapsed: float
+
+
+class WorkerStats(NamedTuple):
+    pid: int
+    shards: int
+    records: int
+    failed: int
+    busy: float
+
+
+class ParallelStats(NamedTuple):
+    records: int
+    failed: int
+    elapsed: float
+    shards: List[ShardStats]
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+    def per_worker(self) -> List[WorkerStats]:
+        workers: Dict[int, WorkerStats] = {}
+        for shard in self.shards:
+            current = workers.get(shard.pid, WorkerStats(shard.pid, 0, 0, 0, 0.0))
+            workers[shard.pid] = WorkerStats(
+                shard.pid,
+                current.shards + 1,
+                current.records + shard.records,
+                current.failed + shard.failed,
+                current.busy + shard.elapsed,
+            )
+        return list(workers.values())
+
+
+def shard_ranges(path: str, shards: int) -> List[Tuple[int, int]]:
+    # Cuts the file into byte ranges of about equal size, moving every cut
+    # to the start of the next line. Only a line per cut is read.
+    if shards < 1:
+        raise ValueError("shards must be positive")
+    size = os.path.getsize(path)
+    cuts = [0]
+    with open(path, "rb") as source:
+        for shard in range(1, shards):
+            position = max(size * shard // shards, cuts[-1])
+            if position >= size:
+                break
+            source.seek(position - 1 if position else 0)
+            # Reading from one byte before the cut finds the end of the line
+            # the cut falls into, or the cut itself when it starts a line.
+            source.readline()
+            cuts.append(min(source.tell(), size))
+    cuts.append(size)
+    return [(start, end) for start, end in zip(cuts, cuts[1:]) if end > start]
+
+
+def _read_range(source: BinaryIO, start: int, end: int) -> Iterator[str]:
+    source.seek(start)
+    position = start
+    while position < end:
+        line = source.readline()
+        if not line:
+            return
+        position += len(line)
+        # Bad bytes are checked per record, as in the serial reader.
+        yield line.decode("utf-8", "surrogateescape")
+
+
+def _run_shard(
+    path: str, shard: int, start: int, end: int, output_dir: str, chunk_size: int, coupons_path: Optional[str]
+) -> ShardStats:
+    # Every worker process loads the coupon file itself and reloads it
+    # when it changes.
+    coupons = load_coupons(coupons_path)
+    lines_read = 0
+
+    def lines() -> Iterator[str]:
+        nonlocal lines_read
+        for line in _read_range(source, start, end):
+            lines_read += 1
+            yield line
+
+    with open(path, "rb") as source, \
+            open(_shard_path(output_dir, shard, "results"), "w", encoding="utf-8") as results, \
+            open(_shard_path(output_dir, shard, "errors"), "w", encoding="utf-8") as errors:
+        # Error line numbers are relative to the shard until the merge.
+        stats = process_stream(lines(), results, errors, chunk_size, coupons=coupons)
+    return ShardStats(shard, os.getpid(), lines_read, stats.records, stats.failed, stats.elapsed)
+
+
+def _shard_path(output_dir: str, shard: int, kind: str) -> str:
+    return os.path.join(output_dir, f"shard-{shard:05d}.{kind}.jsonl")
+
+
+def _merge_errors(source: TextIO, errors: TextIO, line_offset: int) -> None:
+    for line in source:
+        error = _decode(line)
+        error["line"] += line_offset
+        errors.write(_encode(error) + "\n")
+
+
+def process_file_parallel(
+    path: str,
+    results: TextIO,
+    errors: TextIO,
+    workers: Optional[int] = None,
+    shards: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    clock: Callable[[], float] = time.perf_counter,
+    coupons_path: Optional[str] = None,
+) -> ParallelStats:
+    workers = workers or os.cpu_count() or 1
+    started = clock()
+    ranges = shard_ranges(path, shards or workers)
+    shard_stats: List[ShardStats] = []
+    line_offset = 0
+    with tempfile.TemporaryDirectory(prefix="checkout-") as output_dir, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_run_shard, path, shard, start, end, output_dir, chunk_size, coupons_path)
+            for shard, (start, end) in enumerate(ranges)
+        ]
+        # Shards are merged in file order as soon as each one is done, so
+        # the output keeps the order of the input.
+        for future in futures:
+            stats = future.result()
+            with open(_shard_path(output_dir, stats.shard, "results"), encoding="utf-8") as source:
+                shutil.copyfileobj(source, results)
+            with open(_shard_path(output_dir, stats.shard, "errors"), encoding="utf-8") as source:
+                _merge_errors(source, errors, line_offset)
+            line_offset += stats.lines
+            shard_stats.append(stats)
+
+    return ParallelStats(
+        sum(stats.records for stats in shard_stats),
+        sum(stats.failed for stats in shard_stats),
+        clock() - started,
+        shard_stats,
+    )
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Process checkout requests from a JSONL file on several processes.")
+    parser.add_argument("input", help="JSONL file with one request per line")
+    parser.add_argument("-o", "--output", help="JSONL file for results (default: stdout)")
+    parser.add_argument("-e", "--errors", help="JSONL file for rejected records (default: stderr)")
+    parser.add_argument("-w", "--workers", type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--shards", type=int, help="byte-range shards (default: one per worker)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records processed per chunk")
+    parser.add_argument("--coupons", help="JSON file with coupon rules, reloaded when it changes")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+
+    results = _open_output(args.output, sys.stdout)
+    errors = _open_output(args.errors, sys.stderr)
+    try:
+        stats = process_file_parallel(
+            args.input, results, errors, args.workers, args.shards, args.chunk_size, coupons_path=args.coupons
+        )
+    finally:
+        for stream in (results, errors):
+            if stream not in (sys.stdout, sys.stderr):
+                stream.close()
+
+    for worker in stats.per_worker():
+        print(
+            f"worker {worker.pid}: {worker.shards} shards, {worker.records} records, "
+            f"{worker.failed} rejected, {worker.busy:.2f} s",
+            file=sys.stderr,
+        )
+    print(
+        f"{stats.records} records, {stats.failed} rejected, {stats.elapsed:.2f} s, "
+        f"{stats.records_per_second:.0f} records/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
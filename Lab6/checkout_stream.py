@@ -0,0 +1,205 @@
+import argparse
+import json
+import math
+import sys
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from coupon_rules import CouponRuleEngine
+from order_processing import process_checkout, set_coupon_engine
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+ERROR_INVALID_JSON = "invalid JSON"
+ERROR_REQUEST_NOT_OBJECT = "request must be a JSON object"
+ERROR_INVALID_UTF8 = "invalid UTF-8"
+WARNING_PREFIX = "warning: "
+
+
+def _reject_constant(name: str) -> float:
+    raise ValueError(f"non-finite number {name}")
+
+
+def _finite_float(text: str) -> float:
+    # 1e999 parses to inf without going through parse_constant.
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"non-finite number {text}")
+    return value
+
+
+# The stdlib decoder accepts Infinity and NaN, which process_checkout
+# cannot price; such lines are reported as invalid JSON.
+_decode = json.JSONDecoder(parse_constant=_reject_constant, parse_float=_finite_float).decode
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class StreamStats(NamedTuple):
+    records: int
+    failed: int
+    elapsed: float
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _numbered_records(lines: Iterable[str], first_line: int) -> Iterator[Tuple[int, str]]:
+    # Blank lines are skipped but still counted, so error line numbers
+    # match the input file.
+    for line_number, line in enumerate(lines, first_line):
+        if line.strip():
+            yield line_number, line
+
+
+def _chunks(records: Iterator[Tuple[int, str]], chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _is_utf8(line: str) -> bool:
+    # Input is decoded with errors="surrogateescape", so bytes that are not
+    # UTF-8 reach here as lone surrogates, which cannot be encoded back.
+    if line.isascii():
+        return True
+    try:
+        line.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _error_record(line_number: int, request: Any, message: str) -> Dict[str, Any]:
+    user_id = request.get("user_id") if isinstance(request, dict) else None
+    return {"line": line_number, "user_id": user_id, "error": message}
+
+
+def _process_chunk(chunk: List[Tuple[int, str]]) -> Tuple[List[str], List[str]]:
+    results = []
+    errors = []
+    for line_number, line in chunk:
+        if not _is_utf8(line):
+            errors.append(_encode(_error_record(line_number, None, ERROR_INVALID_UTF8)) + "\n")
+            continue
+
+        try:
+            request = _decode(line)
+        except (ValueError, RecursionError) as error:
+            # RecursionError: arrays or objects nested too deeply.
+            errors.append(_encode(_error_record(line_number, None, f"{ERROR_INVALID_JSON}: {error}")) + "\n")
+            continue
+
+        if not isinstance(request, dict):
+            errors.append(_encode(_error_record(line_number, None, ERROR_REQUEST_NOT_OBJECT)) + "\n")
+            continue
+
+        try:
+            result = process_checkout(request)
+        except (ValueError, TypeError, ArithmeticError) as error:
+            # TypeError covers values of the wrong type, e.g. a string price;
+            # ArithmeticError ints too large to multiply by a float rate.
+            errors.append(_encode(_error_record(line_number, request, str(error))) + "\n")
+            continue
+        results.append(_encode(result) + "\n")
+    return results, errors
+
+
+def process_stream(
+    lines: Iterable[str],
+    results: TextIO,
+    errors: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    first_line: int = 1,
+    clock: Callable[[], float] = time.perf_counter,
+    coupons: Optional[CouponRuleEngine] = None,
+) -> StreamStats:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+
+    started = clock()
+    records = failed = 0
+    # Only one chunk of lines and encoded results is held at a time, so
+    # memory use does not depend on the size of the input.
+    for chunk in _chunks(_numbered_records(lines, first_line), chunk_size):
+        if coupons is not None:
+            _reload_coupons(coupons)
+        chunk_results, chunk_errors = _process_chunk(chunk)
+        results.writelines(chunk_results)
+        errors.writelines(chunk_errors)
+        records += len(chunk)
+        failed += len(chunk_errors)
+    return StreamStats(records, failed, clock() - started)
+
+
+def _reload_coupons(coupons: CouponRuleEngine) -> None:
+    # A coupon file caught mid-edit must not stop the run; the current
+    # rules stay in place and the reload is retried before the next chunk.
+    # stderr also carries the JSONL errors by default, so the warning gets
+    # a prefix no JSON line can start with.
+    try:
+        coupons.reload_if_changed()
+    except (OSError, ValueError) as error:
+        print(f"{WARNING_PREFIX}coupon rules not reloaded: {error}", file=sys.stderr)
+
+
+def load_coupons(path: Optional[str]) -> Optional[CouponRuleEngine]:
+    if path is None:
+        return None
+    coupons = CouponRuleEngine.from_file(path)
+    set_coupon_engine(coupons)
+    return coupons
+
+
+def _open_input(path: str) -> TextIO:
+    # An undecodable line must be reported like any other bad record
+    # rather than abort the run with UnicodeDecodeError.
+    if path == "-":
+        sys.stdin.reconfigure(encoding="utf-8", errors="surrogateescape")
+        return sys.stdin
+    return open(path, encoding="utf-8", errors="surrogateescape")
+
+
+def _open_output(path: Optional[str], default: TextIO) -> TextIO:
+    if path is None or path == "-":
+        return default
+    return open(path, "w", encoding="utf-8")
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Process checkout requests from a JSONL file.")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file with one request per line, - for stdin")
+    parser.add_argument("-o", "--output", help="JSONL file for results (default: stdout)")
+    parser.add_argument("-e", "--errors", help="JSONL file for rejected records (default: stderr)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="records processed per chunk")
+    parser.add_argument("--coupons", help="JSON file with coupon rules, reloaded when it changes")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    coupons = load_coupons(args.coupons)
+
+    source = _open_input(args.input)
+    results = _open_output(args.output, sys.stdout)
+    errors = _open_output(args.errors, sys.stderr)
+    try:
+        stats = process_stream(source, results, errors, args.chunk_size, coupons=coupons)
+    finally:
+        for stream in (source, results, errors):
+            if stream not in (sys.stdin, sys.stdout, sys.stderr):
+                stream.close()
+
+    print(
+        f"{stats.records} records, {stats.failed} rejected, {stats.elapsed:.2f} s, "
+        f"{stats.records_per_second:.0f} records/s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
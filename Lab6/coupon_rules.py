@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ERROR_UNKNOWN_COUPON = "unknown coupon"
+ERROR_COUPON_NOT_ACTIVE = "coupon is not active"
+
+
+class CouponRule:
+    # One compiled coupon. Tiers are (min_subtotal, rate, amount) sorted by
+    # descending threshold; the first tier the subtotal reaches applies, and
+    # a subtotal below every threshold gets no discount. A rate gives
+    # int(subtotal * rate), an amount is a fixed discount; cap limits both.
+    __slots__ = ("code", "tiers", "cap", "valid_from", "valid_until", "has_window", "discount")
+
+    def __init__(
+        self,
+        code: str,
+        tiers: List[Tuple[float, Optional[float], Optional[int]]],
+        cap: Optional[int] = None,
+        valid_from: Optional[float] = None,
+        valid_until: Optional[float] = None,
+    ):
+        self.code = code
+        self.tiers = tuple(sorted(tiers, key=lambda tier: tier[0], reverse=True))
+        self.cap = cap
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+        self.has_window = valid_from is not None or valid_until is not None
+        self.discount: Callable[[Any], Any] = self._compile()
+
+    def is_active(self, now: float) -> bool:
+        if self.valid_from is not None and now < self.valid_from:
+            return False
+        return self.valid_until is None or now < self.valid_until
+
+    def discount_column(self, subtotals: "np.ndarray") -> "np.ndarray":
+        # Vectorized discount; same truncation as int() for the positive
+        # subtotals the batch path passes in.
+        discounts = np.zeros_like(subtotals)
+        pending = np.ones(subtotals.shape, dtype=bool)
+        for min_subtotal, rate, amount in self.tiers:
+            mask = pending & (subtotals >= min_subtotal)
+            if rate is not None:
+                discounts[mask] = (subtotals[mask] * rate).astype(np.int64)
+            else:
+                discounts[mask] = amount
+            pending &= ~mask
+        if self.cap is not None:
+            np.minimum(discounts, self.cap, out=discounts)
+        return discounts
+
+    def _compile(self) -> Callable[[Any], Any]:
+        # The common one-tier shapes get a closure without the tier loop.
+        if len(self.tiers) == 1 and self.tiers[0][0] <= 0 and self.cap is None:
+            _, rate, amount = self.tiers[0]
+            if rate is not None:
+                return lambda subtotal: int(subtotal * rate)
+            return lambda subtotal: amount
+
+        tiers, cap = self.tiers, self.cap
+
+        def discount(subtotal):
+            for min_subtotal, rate, amount in tiers:
+                if subtotal >= min_subtotal:
+                    value = int(subtotal * rate) if rate is not None else amount
+                    return value if cap is None else min(value, cap)
+            return 0
+
+        return discount
+
+
+def compile_coupons(definitions: Iterable[Dict[str, Any]]) -> Dict[str, CouponRule]:
+    table: Dict[str, CouponRule] = {}
+    for definition in definitions:
+        rule = _compile_definition(definition)
+        if rule.code in table:
+            raise ValueError(f"duplicate coupon {rule.code}")
+        table[rule.code] = rule
+    return table
+
+
+def _compile_definition(definition: Dict[str, Any]) -> CouponRule:
+    if not isinstance(definition, dict):
+        raise ValueError(f"coupon definition must be an object: {definition!r}")
+    code = definition.get("code")
+    if not isinstance(code, str) or not code:
+        raise ValueError(f"coupon code must be a non-empty string: {definition!r}")
+
+    tiers = definition.get("tiers")
+    if tiers is None:
+        tiers = [{key: value for key, value in definition.items() if key in ("rate", "amount")}]
+    if not isinstance(tiers, list) or not tiers:
+        raise ValueError(f"coupon {code}: tiers must be a non-empty list")
+
+    cap = definition.get("cap")
+    if cap is not None and not _is_amount(cap):
+        raise ValueError(f"coupon {code}: cap must be a non-negative integer")
+    return CouponRule(
+        code,
+        [_compile_tier(code, tier) for tier in tiers],
+        cap,
+        _parse_time(code, definition.get("valid_from")),
+        _parse_time(code, definition.get("valid_until")),
+    )
+
+
+def _compile_tier(code: str, tier: Dict[str, Any]) -> Tuple[float, Optional[float], Optional[int]]:
+    if not isinstance(tier, dict):
+        raise ValueError(f"coupon {code}: tier must be an object")
+    min_subtotal = tier.get("min_subtotal", 0)
+    rate, amount = tier.get("rate"), tier.get("amount")
+    if not isinstance(min_subtotal, (int, float)) or isinstance(min_subtotal, bool):
+        raise ValueError(f"coupon {code}: min_subtotal must be a number")
+    if (rate is None) == (amount is None):
+        raise ValueError(f"coupon {code}: each tier needs exactly one of rate and amount")
+    if rate is not None and (isinstance(rate, bool) or not isinstance(rate, (int, float)) or not 0 <= rate <= 1):
+        raise ValueError(f"coupon {code}: rate must be between 0 and 1")
+    if amount is not None and not _is_amount(amount):
+        raise ValueError(f"coupon {code}: amount must be a non-negative integer")
+    return min_subtotal, rate, amount
+
+
+def _is_amount(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _parse_time(code: str, value: Any) -> Optional[float]:
+    # ISO 8601 date or date-time; without an offset it is taken as UTC.
+    if value is None:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"coupon {code}: invalid date {value!r}") from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class CouponRuleEngine:
+    # Holds the compiled coupon table. Lookups read the current table once
+    # and never lock; reload() compiles the new file completely and then
+    # swaps the table in one assignment, so a checkout sees either the old
+    # or the new rules, and a broken file leaves the old rules in place.
+
+    def __init__(
+        self,
+        table: Dict[str, CouponRule],
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._table = table
+        self._path = path
+        self._clock = clock
+        self._file_signature: Optional[Tuple[int, int]] = None
+        self._reload_lock = threading.Lock()
+
+    @classmethod
+    def from_definitions(
+        cls, definitions: Iterable[Dict[str, Any]], clock: Callable[[], float] = time.time
+    ) -> "CouponRuleEngine":
+        return cls(compile_coupons(definitions), clock=clock)
+
+    @classmethod
+    def from_file(cls, path: str, clock: Callable[[], float] = time.time) -> "CouponRuleEngine":
+        engine = cls({}, path, clock)
+        engine.reload()
+        return engine
+
+    @property
+    def table(self) -> Dict[str, CouponRule]:
+        # Treat as read-only; it is shared by every checkout using it.
+        return self._table
+
+    def now(self) -> float:
+        return self._clock()
+
+    def discount(self, code: str, subtotal: Any) -> Any:
+        rule = self._table.get(code)
+        if rule is None:
+            raise ValueError(ERROR_UNKNOWN_COUPON)
+        if rule.has_window and not rule.is_active(self._clock()):
+            raise ValueError(ERROR_COUPON_NOT_ACTIVE)
+        return rule.discount(subtotal)
+
+    def reload(self) -> None:
+        if self._path is None:
+            raise ValueError("coupon rules were not loaded from a file")
+        with self._reload_lock:
+            signature = _file_signature(self._path)
+            with open(self._path, encoding="utf-8") as source:
+                data = json.load(source)
+            definitions = data.get("coupons") if isinstance(data, dict) else data
+            if not isinstance(definitions, list):
+                raise ValueError(f"{self._path}: expected a list of coupons")
+            self._table = compile_coupons(definitions)
+            self._file_signature = signature
+
+    def reload_if_changed(self) -> bool:
+        # Cheap enough to call before every chunk of checkouts.
+        if self._path is None or _file_signature(self._path) == self._file_signature:
+            return False
+        self.reload()
+        return True
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._table
+
+
+def _file_signature(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
@@ -1,5 +1,14 @@
 from typing import Dict, List, Any, Optional, Tuple
 
+from coupon_rules import CouponRuleEngine
+# Re-exported for callers that match on the coupon error messages.
+from coupon_rules import ERROR_COUPON_NOT_ACTIVE, ERROR_UNKNOWN_COUPON  # noqa: F401
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 TAX_RATE = 0.21
 DEFAULT_CURRENCY = "USD"
 
@@ -22,7 +31,31 @@ ERROR_ITEMS_EMPTY = "items must not be empty"
 ERROR_ITEM_MISSING_FIELDS = "item must have price and qty"
 ERROR_PRICE_NOT_POSITIVE = "price must be positive"
 ERROR_QTY_NOT_POSITIVE = "qty must be positive"
-ERROR_UNKNOWN_COUPON = "unknown coupon"
+
+# Built-in coupons; campaign coupons are loaded from a data file with
+# CouponRuleEngine.from_file and installed with set_coupon_engine.
+DEFAULT_COUPONS = [
+    {"code": COUPON_SAVE10, "rate": DISCOUNT_RATE_10_PERCENT},
+    {"code": COUPON_SAVE20, "tiers": [
+        {"min_subtotal": SAVE20_DISCOUNT_THRESHOLD, "rate": DISCOUNT_RATE_20_PERCENT},
+        {"rate": DISCOUNT_RATE_5_PERCENT},
+    ]},
+    {"code": COUPON_VIP, "tiers": [
+        {"min_subtotal": VIP_DISCOUNT_THRESHOLD, "amount": VIP_DISCOUNT_LARGE},
+        {"amount": VIP_DISCOUNT_SMALL},
+    ]},
+]
+
+_coupon_engine = CouponRuleEngine.from_definitions(DEFAULT_COUPONS)
+
+
+def get_coupon_engine() -> CouponRuleEngine:
+    return _coupon_engine
+
+
+def set_coupon_engine(engine: CouponRuleEngine) -> None:
+    global _coupon_engine
+    _coupon_engine = engine
 
 
 def _parse_request(request: Dict[str, Any]) -> Tuple[Any, Any, Optional[str], str]:
@@ -62,28 +95,37 @@ def _calculate_subtotal(items: List[Dict[str, Any]]) -> int:
     return sum(item["price"] * item["qty"] for item in items)
 
 
+def _validate_and_sum(user_id: Any, items: Any) -> int:
+    # _validate_request and _calculate_subtotal in one pass with one lookup
+    # per field. Anything but well-formed items with int prices and
+    # quantities goes back to those two, so errors and results are the
+    # same (sum() of floats may round differently from +=).
+    if user_id is None or type(items) is not list or not items:
+        _validate_request(user_id, items)
+
+    subtotal = 0
+    try:
+        for item in items:
+            price = item["price"]
+            qty = item["qty"]
+            if price <= 0 or qty <= 0:
+                break
+            subtotal += price * qty
+        else:
+            if type(subtotal) is int:
+                return subtotal
+    except (KeyError, TypeError):
+        pass
+
+    _validate_request(user_id, items)
+    return _calculate_subtotal(items)
+
+
 def _calculate_discount(subtotal: int, coupon: Optional[str]) -> int:
     if not coupon:
         return 0
     
-    discount_rules = {
-        COUPON_SAVE10: lambda s: int(s * DISCOUNT_RATE_10_PERCENT),
-        COUPON_SAVE20: lambda s: (
-            int(s * DISCOUNT_RATE_20_PERCENT) 
-            if s >= SAVE20_DISCOUNT_THRESHOLD 
-            else int(s * DISCOUNT_RATE_5_PERCENT)
-        ),
-        COUPON_VIP: lambda s: (
-            VIP_DISCOUNT_LARGE 
-            if s >= VIP_DISCOUNT_THRESHOLD 
-            else VIP_DISCOUNT_SMALL
-        ),
-    }
-    
-    if coupon not in discount_rules:
-        raise ValueError(ERROR_UNKNOWN_COUPON)
-    
-    return discount_rules[coupon](subtotal)
+    return _coupon_engine.discount(coupon, subtotal)
 
 
 def _calculate_tax(amount: int) -> int:
@@ -97,16 +139,14 @@ def _generate_order_id(user_id: Any, items_count: int) -> str:
 def process_checkout(request: Dict[str, Any]) -> Dict[str, Any]:
     user_id, items, coupon, currency = _parse_request(request)
     
-    _validate_request(user_id, items)
-    
-    subtotal = _calculate_subtotal(items)
+    subtotal = _validate_and_sum(user_id, items)
     discount = _calculate_discount(subtotal, coupon)
     
     total_after_discount = max(subtotal - discount, 0)
     tax = _calculate_tax(total_after_discount)
     total = total_after_discount + tax
     
-order_id = _generate_order_id(user_id, len(items))
+    order_id = _generate_order_id(user_id, len(items))
     
     return {
         "order_id": order_id,
@@ -118,3 +158,151 @@ order_id = _generate_order_id(user_id, len(items))
         "total": total,
         "items_count": len(items),
     }
+
+
+_INT64_MAX = 2 ** 63 - 1
+# Largest subtotal whose total, tax included, still fits in int64; the
+# extra 1e-9 covers the float rounding of the tax.
+_BATCH_SUBTOTAL_MAX = int(_INT64_MAX / (1 + TAX_RATE + 1e-9))
+_BATCH_CHUNK_SIZE = 16_384
+
+
+def process_checkout_batch(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Same results as [process_checkout(r) for r in requests], including
+    # the first ValueError raised. Items of all well-formed requests with
+    # int prices and quantities are flattened into columns and priced with
+    # numpy; every other request goes through process_checkout.
+    if np is None:
+        return [process_checkout(request) for request in requests]
+
+    # Bounded chunks keep the columns small enough to stay in cache.
+    results: List[Dict[str, Any]] = []
+    for start in range(0, len(requests), _BATCH_CHUNK_SIZE):
+        results += _process_checkout_chunk(requests[start:start + _BATCH_CHUNK_SIZE])
+    return results
+
+
+def _process_checkout_chunk(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # One table and one clock reading for the whole chunk.
+    engine = _coupon_engine
+    table = engine.table
+    now = engine.now()
+    rules = []
+    rule_ids: Dict[str, int] = {}
+
+    parsed = []
+    prices: List[Any] = []
+    qtys: List[Any] = []
+    item_counts = []
+    coupon_codes = []
+    scalar = set()
+    for index, request in enumerate(requests):
+        # _parse_request inlined; the call costs as much as the lookups.
+        user_id = request.get("user_id")
+        items = request.get("items")
+        coupon = request.get("coupon")
+        currency = request.get("currency", DEFAULT_CURRENCY)
+        coupon_code: Optional[int] = 0
+        if coupon:
+            rule = table.get(coupon) if isinstance(coupon, str) else None
+            if rule is None or (rule.has_window and not rule.is_active(now)):
+                coupon_code = None
+            else:
+                coupon_code = rule_ids.get(coupon)
+                if coupon_code is None:
+                    rules.append(rule)
+                    coupon_code = rule_ids[coupon] = len(rules)
+        if user_id is None or type(items) is not list or not items or coupon_code is None:
+            scalar.add(index)
+            continue
+        try:
+            request_prices = [item["price"] for item in items]
+            request_qtys = [item["qty"] for item in items]
+        except (KeyError, TypeError):
+            scalar.add(index)
+            continue
+        items_count = len(items)
+        parsed.append((index, user_id, currency, items_count))
+        prices += request_prices
+        qtys += request_qtys
+        item_counts.append(items_count)
+        coupon_codes.append(coupon_code)
+
+    price = _int_column(prices)
+    qty = _int_column(qtys)
+    if price is None or qty is None:
+        # Floats and other numbers keep their exact Python arithmetic.
+        return [process_checkout(request) for request in requests]
+
+    if parsed and int(price.max()) * int(qty.max()) * max(item_counts) > _BATCH_SUBTOTAL_MAX:
+        return [process_checkout(request) for request in requests]
+
+    offsets = np.zeros(len(item_counts), dtype=np.int64)
+    np.cumsum(item_counts[:-1], out=offsets[1:])
+    invalid = (price <= 0) | (qty <= 0)
+    first_invalid = None
+    if invalid.any():
+        owner = np.searchsorted(offsets, np.argmax(invalid), side="right") - 1
+        first_invalid = parsed[owner][0]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    for index in sorted(scalar):
+        if first_invalid is not None and first_invalid < index:
+            break
+        results[index] = process_checkout(requests[index])
+    if first_invalid is not None:
+        # Raises the same error process_checkout would for this request.
+        process_checkout(requests[first_invalid])
+
+    if parsed:
+        subtotal = np.add.reduceat(price * qty, offsets)
+        discount = _discount_column(subtotal, np.array(coupon_codes, dtype=np.int64), rules)
+        total_after_discount = np.maximum(subtotal - discount, 0)
+        tax = (total_after_discount * TAX_RATE).astype(np.int64)
+        total = total_after_discount + tax
+
+        for (index, user_id, currency, items_count), row in zip(
+            parsed, zip(subtotal.tolist(), discount.tolist(), tax.tolist(), total.tolist())
+        ):
+            results[index] = {
+                "order_id": _generate_order_id(user_id, items_count),
+                "user_id": user_id,
+                "currency": currency,
+                "subtotal": row[0],
+                "discount": row[1],
+                "tax": row[2],
+                "total": row[3],
+                "items_count": items_count,
+            }
+    return results
+
+
+def _int_column(values: List[Any]) -> Optional["np.ndarray"]:
+    # None unless every value is an int (bool included, as in Python
+    # arithmetic) that fits in int64. Nested sequences would build a 2-D
+    # column or fail on ragged shapes; both leave the chunk to the scalar
+    # path.
+    try:
+        column = np.array(values)
+    except (OverflowError, ValueError):
+        return None
+    if column.ndim != 1:
+        return None
+    if column.dtype == np.bool_:
+        return column.astype(np.int64)
+    if column.size and column.dtype.kind != "i":
+        return None
+    return column.astype(np.int64, copy=False)
+
+
+def _discount_column(subtotal: "np.ndarray", coupon_codes: "np.ndarray", rules: List[Any]) -> "np.ndarray":
+    # Requests are grouped by coupon (code i is rules[i - 1], 0 is no
+    # coupon), so each rule runs once per chunk whatever the number of
+    # coupons in use.
+    discount = np.zeros_like(subtotal)
+    order = np.argsort(coupon_codes, kind="stable")
+    bounds = np.cumsum(np.bincount(coupon_codes, minlength=len(rules) + 1))
+    for code, rule in enumerate(rules, 1):
+        positions = order[bounds[code - 1]:bounds[code]]
+        discount[positions] = rule.discount_column(subtotal[positions])
+    return discount
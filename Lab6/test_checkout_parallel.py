@@ -0,0 +1,91 @@
+import io
+import json
+import random
+import pytest
+from checkout_parallel import ParallelStats, ShardStats, main, process_file_parallel, shard_ranges
+from checkout_stream import process_stream
+
+
+def _write_requests(path, count, trailing_newline=True):
+    rng = random.Random(3)
+    lines = []
+    for user_id in range(count):
+        if user_id % 17 == 0:
+            lines.append("{broken")
+        elif user_id % 23 == 0:
+            lines.append("")
+        elif user_id % 29 == 0:
+            lines.append('{"user_id": %d, "items": [{"price": Infinity, "qty": 1}]}' % user_id)
+        else:
+            items = [{"price": rng.randint(-5, 400), "qty": rng.randint(1, 3)} for _ in range(rng.randint(0, 6))]
+            lines.append(json.dumps({"user_id": user_id, "items": items, "coupon": rng.choice([None, "VIP", "SAVE20"])}))
+    path.write_text("\n".join(lines) + ("\n" if trailing_newline else ""), encoding="utf-8")
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+@pytest.mark.parametrize("shards", [1, 3, 8, 500])
+def test_shards_cover_file_and_start_at_lines(tmp_path, shards, trailing_newline):
+    path = tmp_path / "requests.jsonl"
+    _write_requests(path, 200, trailing_newline)
+    data = path.read_bytes()
+
+    ranges = shard_ranges(str(path), shards)
+
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    assert all(data[start - 1:start] == b"\n" for start, _ in ranges[1:])
+    assert len(ranges) <= shards
+
+
+def test_parallel_output_matches_sequential(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    _write_requests(path, 300)
+    expected_results, expected_errors = io.StringIO(), io.StringIO()
+    with open(path, encoding="utf-8") as source:
+        expected = process_stream(source, expected_results, expected_errors)
+
+    results, errors = io.StringIO(), io.StringIO()
+    stats = process_file_parallel(str(path), results, errors, workers=2, shards=5, chunk_size=7)
+
+    assert results.getvalue() == expected_results.getvalue()
+    assert errors.getvalue() == expected_errors.getvalue()
+    assert (stats.records, stats.failed) == (expected.records, expected.failed)
+    assert [shard.shard for shard in stats.shards] == list(range(5))
+    assert sum(worker.records for worker in stats.per_worker()) == stats.records
+
+
+def test_undecodable_lines_are_per_record_errors(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_bytes(b"".join(
+        b'{"user_id": %d, "items": [{"price": 10, "qty": 1}]}\n' % user_id if user_id % 3 else b"\xc3\x28 bad\n"
+        for user_id in range(30)
+    ))
+
+    results, errors = io.StringIO(), io.StringIO()
+    stats = process_file_parallel(str(path), results, errors, workers=2, shards=4)
+
+    assert (stats.records, stats.failed) == (30, 10)
+    assert [json.loads(line)["line"] for line in errors.getvalue().splitlines()] == list(range(1, 31, 3))
+    assert all(json.loads(line)["error"] == "invalid UTF-8" for line in errors.getvalue().splitlines())
+
+
+def test_per_worker_counters():
+    stats = ParallelStats(6, 1, 1.0, [
+        ShardStats(0, 10, 3, 3, 1, 0.5),
+        ShardStats(1, 11, 2, 2, 0, 0.25),
+        ShardStats(2, 10, 1, 1, 0, 0.25),
+    ])
+
+    assert [tuple(worker) for worker in stats.per_worker()] == [(10, 2, 4, 1, 0.75), (11, 1, 2, 0, 0.25)]
+
+
+def test_cli(tmp_path, capsys):
+    path = tmp_path / "requests.jsonl"
+    _write_requests(path, 50)
+    output, errors = tmp_path / "results.jsonl", tmp_path / "errors.jsonl"
+
+    assert main([str(path), "-o", str(output), "-e", str(errors), "-w", "2"]) == 0
+
+    report = capsys.readouterr().err
+    assert "records/s" in report and "worker " in report
+    assert output.read_text() and errors.read_text()
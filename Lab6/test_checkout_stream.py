@@ -0,0 +1,170 @@
+import io
+import json
+import pytest
+from checkout_stream import main, process_stream
+from order_processing import process_checkout
+
+
+def _lines(*requests):
+    return [json.dumps(request) + "\n" for request in requests]
+
+
+def _run(lines, chunk_size=2):
+    results, errors = io.StringIO(), io.StringIO()
+    stats = process_stream(lines, results, errors, chunk_size=chunk_size)
+    return stats, _read(results), _read(errors)
+
+
+def _read(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_results_match_process_checkout():
+    requests = [
+        {"user_id": user_id, "items": [{"price": 10 * user_id, "qty": 2}], "coupon": "SAVE10"}
+        for user_id in range(1, 6)
+    ]
+
+    stats, results, errors = _run(_lines(*requests))
+
+    assert results == [process_checkout(request) for request in requests]
+    assert errors == []
+    assert (stats.records, stats.failed) == (5, 0)
+
+
+def test_errors_are_reported_per_record():
+    lines = _lines(
+        {"user_id": 1, "items": [{"price": 10, "qty": 1}]},
+        {"user_id": 2, "items": []},
+        {"user_id": 3, "items": [{"price": "10", "qty": 1}]},
+    ) + ["{not json\n", "\n", "[1, 2]\n"] + _lines({"user_id": 7, "items": [{"price": 5, "qty": 1}], "coupon": "???"})
+
+    stats, results, errors = _run(lines)
+
+    assert [result["user_id"] for result in results] == [1]
+    assert [(error["line"], error["user_id"]) for error in errors] == [(2, 2), (3, 3), (4, None), (6, None), (7, 7)]
+    assert errors[0]["error"] == "items must not be empty"
+    assert errors[-1]["error"] == "unknown coupon"
+    assert (stats.records, stats.failed) == (6, 5)
+
+
+def test_input_is_consumed_lazily():
+    consumed = []
+
+    def lines():
+        for user_id in range(10):
+            consumed.append(user_id)
+            yield json.dumps({"user_id": user_id, "items": [{"price": 1, "qty": 1}]}) + "\n"
+
+    class Output(io.StringIO):
+        def writelines(self, lines):
+            # At most one chunk is read ahead of what has been written.
+            written.append(len(consumed))
+            super().writelines(lines)
+
+    written = []
+    process_stream(lines(), Output(), io.StringIO(), chunk_size=3)
+
+    assert written == [3, 6, 9, 10]
+
+
+def test_rejects_non_positive_chunk_size():
+    with pytest.raises(ValueError):
+        process_stream([], io.StringIO(), io.StringIO(), chunk_size=0)
+
+
+def test_cli_writes_results_and_errors(tmp_path, capsys):
+    source = tmp_path / "requests.jsonl"
+    source.write_text("".join(_lines(
+        {"user_id": 1, "items": [{"price": 50, "qty": 2}]},
+        {"user_id": 2},
+    )))
+    output, errors = tmp_path / "results.jsonl", tmp_path / "errors.jsonl"
+
+    assert main([str(source), "-o", str(output), "-e", str(errors), "--chunk-size", "1"]) == 0
+
+    assert [json.loads(line)["total"] for line in output.read_text().splitlines()] == [121]
+    assert [json.loads(line)["error"] for line in errors.read_text().splitlines()] == ["items is required"]
+    assert "2 records, 1 rejected" in capsys.readouterr().err
+
+
+def test_coupon_file_is_reloaded_between_chunks(tmp_path):
+    from checkout_stream import load_coupons
+    import order_processing
+    path = tmp_path / "coupons.json"
+    path.write_text(json.dumps([{"code": "FLASH", "amount": 5}]))
+    previous = order_processing.get_coupon_engine()
+    coupons = load_coupons(str(path))
+
+    def lines():
+        for user_id in range(4):
+            if user_id == 2:
+                path.write_text(json.dumps([{"code": "FLASH", "amount": 15}]))
+            yield json.dumps({"user_id": user_id, "items": [{"price": 100, "qty": 1}], "coupon": "FLASH"}) + "\n"
+
+    results = io.StringIO()
+    try:
+        process_stream(lines(), results, io.StringIO(), chunk_size=2, coupons=coupons)
+    finally:
+        order_processing.set_coupon_engine(previous)
+
+    assert [result["discount"] for result in _read(results)] == [5, 5, 15, 15]
+
+
+def test_failed_coupon_reload_is_a_prefixed_warning(tmp_path, capsys):
+    from checkout_stream import WARNING_PREFIX, load_coupons
+    import order_processing
+    path = tmp_path / "coupons.json"
+    path.write_text(json.dumps([{"code": "FLASH", "amount": 5}]))
+    previous = order_processing.get_coupon_engine()
+    coupons = load_coupons(str(path))
+    path.write_text("[{")
+
+    errors = io.StringIO()
+    try:
+        process_stream(_lines({"user_id": 1, "items": [{"price": 100, "qty": 1}], "coupon": "FLASH"}),
+                       io.StringIO(), errors, coupons=coupons)
+    finally:
+        order_processing.set_coupon_engine(previous)
+
+    warnings = capsys.readouterr().err.splitlines()
+    assert len(warnings) == 1 and warnings[0].startswith(WARNING_PREFIX + "coupon rules not reloaded")
+    assert errors.getvalue() == ""
+
+
+def test_non_finite_and_oversized_numbers_are_per_record_errors():
+    lines = [
+        '{"user_id": 1, "items": [{"price": 10, "qty": 1}]}\n',
+        '{"user_id": 2, "items": [{"price": Infinity, "qty": 1}]}\n',
+        '{"user_id": 3, "items": [{"price": 5, "qty": NaN}]}\n',
+        '{"user_id": 4, "items": [{"price": -Infinity, "qty": 1}]}\n',
+        '{"user_id": 5, "items": [{"price": 1e999, "qty": 1}]}\n',
+        '{"user_id": 6, "items": [{"price": 1' + "0" * 400 + ', "qty": 1}]}\n',
+        '{"user_id": 7, "items": [{"price": 2.5, "qty": 2}]}\n',
+    ]
+
+    stats, results, errors = _run(lines, chunk_size=10)
+
+    assert [result["user_id"] for result in results] == [1, 7]
+    assert [error["line"] for error in errors] == [2, 3, 4, 5, 6]
+    assert all(error["error"].startswith("invalid JSON") for error in errors[:4])
+    assert (stats.records, stats.failed) == (7, 5)
+
+
+def test_deeply_nested_and_undecodable_lines_are_per_record_errors(tmp_path):
+    source = tmp_path / "requests.jsonl"
+    source.write_bytes(b"".join([
+        b'{"user_id": 1, "items": [{"price": 10, "qty": 1}]}\n',
+        b"[" * 100_000 + b"]" * 100_000 + b"\n",
+        b'{"user_id": 3, "items": [{"price": 10, "qty": 1}], "coupon": "\xff\xfe"}\n',
+        '{"user_id": 4, "items": [{"price": 10, "qty": 1}], "name": "\u00e9t\u00e9"}\n'.encode("utf-8"),
+    ]))
+    output, errors = tmp_path / "results.jsonl", tmp_path / "errors.jsonl"
+
+    assert main([str(source), "-o", str(output), "-e", str(errors)]) == 0
+
+    assert [json.loads(line)["user_id"] for line in output.read_text().splitlines()] == [1, 4]
+    reported = [json.loads(line) for line in errors.read_text().splitlines()]
+    assert [(error["line"], error["user_id"]) for error in reported] == [(2, None), (3, None)]
+    assert reported[0]["error"].startswith("invalid JSON")
+    assert reported[1]["error"] == "invalid UTF-8"
@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import threading
+import pytest
+import order_processing
+from coupon_rules import CouponRuleEngine, compile_coupons
+from order_processing import DEFAULT_COUPONS, process_checkout, process_checkout_batch, set_coupon_engine
+
+COUPONS_FILE = os.path.join(os.path.dirname(__file__), "coupons.json")
+
+
+def _old_discount(subtotal, coupon):
+    # The hard-coded rules the engine replaced.
+    if coupon == "SAVE10":
+        return int(subtotal * 0.10)
+    if coupon == "SAVE20":
+        return int(subtotal * 0.20) if subtotal >= 200 else int(subtotal * 0.05)
+    return 50 if subtotal >= 100 else 10
+
+
+@pytest.fixture
+def engine_slot():
+    engine = order_processing.get_coupon_engine()
+    yield
+    set_coupon_engine(engine)
+
+
+def _write(path, coupons):
+    path.write_text(json.dumps({"coupons": coupons}))
+
+
+def test_default_rules_match_hard_coded_rules():
+    engine = CouponRuleEngine.from_definitions(DEFAULT_COUPONS)
+    rng = random.Random(5)
+    for subtotal in [1, 99, 100, 199, 200, 201] + [rng.randint(1, 2 ** 50) for _ in range(500)]:
+        for coupon in ("SAVE10", "SAVE20", "VIP"):
+            assert engine.discount(coupon, subtotal) == _old_discount(subtotal, coupon)
+
+
+def test_coupons_file_matches_defaults():
+    shipped = CouponRuleEngine.from_file(COUPONS_FILE)
+    defaults = CouponRuleEngine.from_definitions(DEFAULT_COUPONS)
+
+    for subtotal in range(1, 500, 7):
+        for coupon in ("SAVE10", "SAVE20", "VIP"):
+            assert shipped.discount(coupon, subtotal) == defaults.discount(coupon, subtotal)
+
+
+def test_tiers_caps_and_amounts():
+    engine = CouponRuleEngine.from_definitions([
+        {"code": "TIERED", "tiers": [{"min_subtotal": 500, "amount": 50}, {"min_subtotal": 1000, "amount": 150}]},
+        {"code": "CAPPED", "rate": 0.5, "cap": 30},
+    ])
+
+    assert [engine.discount("TIERED", subtotal) for subtotal in (499, 500, 999, 1000)] == [0, 50, 50, 150]
+    assert [engine.discount("CAPPED", subtotal) for subtotal in (20, 60, 1000)] == [10, 30, 30]
+
+
+def test_validity_window():
+    now = [0.0]
+    engine = CouponRuleEngine.from_definitions(
+        [{"code": "SPRING", "rate": 0.1, "valid_from": "2026-03-01", "valid_until": "2026-06-01T00:00:00+00:00"}],
+        clock=lambda: now[0],
+    )
+    rule = engine.table["SPRING"]
+
+    for moment, active in ((rule.valid_from - 1, False), (rule.valid_from, True), (rule.valid_until, False)):
+        now[0] = moment
+        if active:
+            assert engine.discount("SPRING", 100) == 10
+        else:
+            with pytest.raises(ValueError, match="coupon is not active"):
+                engine.discount("SPRING", 100)
+
+
+@pytest.mark.parametrize("definition", [
+    {"code": "", "rate": 0.1},
+    {"code": "X"},
+    {"code": "X", "rate": 0.1, "amount": 5},
+    {"code": "X", "rate": 1.5},
+    {"code": "X", "amount": 2.5},
+    {"code": "X", "rate": 0.1, "cap": -1},
+    {"code": "X", "tiers": []},
+    {"code": "X", "rate": 0.1, "valid_from": "someday"},
+])
+def test_invalid_definitions(definition):
+    with pytest.raises(ValueError):
+        compile_coupons([definition])
+
+
+def test_duplicate_codes():
+    with pytest.raises(ValueError, match="duplicate"):
+        compile_coupons([{"code": "X", "rate": 0.1}, {"code": "X", "amount": 1}])
+
+
+def test_reload_swaps_rules_and_keeps_them_on_errors(tmp_path):
+    path = tmp_path / "coupons.json"
+    _write(path, [{"code": "A", "amount": 5}])
+    engine = CouponRuleEngine.from_file(str(path))
+    assert not engine.reload_if_changed()
+
+    _write(path, [{"code": "A", "amount": 7}, {"code": "B", "rate": 0.5}])
+    assert engine.reload_if_changed()
+    assert (engine.discount("A", 100), engine.discount("B", 100)) == (7, 50)
+
+    path.write_text('{"coupons": [{"code": "A", "amount": -1}]}')
+    with pytest.raises(ValueError):
+        engine.reload_if_changed()
+    assert engine.discount("A", 100) == 7
+    with pytest.raises(ValueError, match="unknown coupon"):
+        engine.discount("C", 100)
+
+
+def test_reload_during_checkouts(tmp_path, engine_slot):
+    path = tmp_path / "coupons.json"
+    _write(path, [{"code": "FLASH", "amount": 1}])
+    engine = CouponRuleEngine.from_file(str(path))
+    set_coupon_engine(engine)
+    request = {"user_id": 1, "items": [{"price": 100, "qty": 1}], "coupon": "FLASH"}
+    seen = set()
+    stop = threading.Event()
+
+    def checkouts():
+        while not stop.is_set():
+            seen.add(process_checkout(request)["discount"])
+
+    worker = threading.Thread(target=checkouts)
+    worker.start()
+    for amount in range(2, 30):
+        _write(path, [{"code": "FLASH", "amount": amount}])
+        engine.reload()
+    stop.set()
+    worker.join()
+
+    # Every checkout saw one complete table, old or new.
+    assert seen <= set(range(1, 30))
+    assert process_checkout(request)["discount"] == 29
+
+
+def test_batch_uses_loaded_rules(engine_slot):
+    coupons = [
+        {"code": f"C{index}", "tiers": [{"min_subtotal": index * 10, "rate": 0.01 * (index % 50)}, {"amount": index}],
+         "cap": 1000}
+        for index in range(300)
+    ]
+    set_coupon_engine(CouponRuleEngine.from_definitions(coupons))
+    rng = random.Random(9)
+    requests = [
+        {"user_id": user_id, "items": [{"price": rng.randint(1, 5000), "qty": rng.randint(1, 3)}],
+         "coupon": rng.choice([None, "C%d" % rng.randrange(300)])}
+        for user_id in range(3000)
+    ]
+
+    assert process_checkout_batch(requests) == [process_checkout(request) for request in requests]
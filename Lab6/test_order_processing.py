@@ -1,5 +1,5 @@
 import pytest
-from order_processing import process_checkout
+from order_processing import process_checkout, process_checkout_batch
 
 
 def test_ok_no_coupon():
@@ -23,3 +23,119 @@ def test_ok_save20():
 def test_unknown_coupon():
     with pytest.raises(ValueError):
         process_checkout({"user_id": 1, "items": [{"price": 10, "qty": 1}], "coupon": "???", "currency": "USD"})
+
+
+def _random_requests(rng, count):
+    coupons = [None, "", "SAVE10", "SAVE20", "VIP"]
+    requests = []
+    for user_id in range(count):
+        # Up to 2**40 so totals exercise float rounding in the discount and tax.
+        high = rng.choice([10, 300, 2 ** 40])
+        items = [{"price": rng.randint(1, high), "qty": rng.randint(1, 5)} for _ in range(rng.randint(1, 4))]
+        requests.append({"user_id": user_id, "items": items, "coupon": rng.choice(coupons), "currency": "EUR"})
+    return requests
+
+
+def test_batch_matches_scalar(monkeypatch):
+    import random
+    import order_processing
+    monkeypatch.setattr(order_processing, "_BATCH_CHUNK_SIZE", 300)
+    requests = _random_requests(random.Random(7), 2000)
+
+    assert process_checkout_batch(requests) == [process_checkout(request) for request in requests]
+
+
+def test_batch_keeps_python_arithmetic_for_floats_and_odd_items():
+    requests = [
+        {"user_id": 1, "items": [{"price": 10, "qty": 3}], "coupon": "SAVE10"},
+        {"user_id": 2, "items": [{"price": 19.99, "qty": 3}], "coupon": "SAVE10"},
+        {"user_id": 3, "items": [{"price": True, "qty": 7}], "coupon": "VIP"},
+    ]
+
+    results = process_checkout_batch(requests)
+
+    assert results == [process_checkout(request) for request in requests]
+    assert type(results[1]["subtotal"]) is float
+
+    # List-valued fields must fail like process_checkout, alone or next to
+    # plain items (a 2-D or ragged column in numpy).
+    for odd_item in ({"price": [1, 2], "qty": 1}, {"price": 1, "qty": [1, 2]}, {"price": [[1], [2, 3]], "qty": 1}):
+        odd_request = {"user_id": 4, "items": [odd_item]}
+        for batch in ([odd_request], requests[:1] + [odd_request]):
+            with pytest.raises(TypeError) as expected:
+                [process_checkout(request) for request in batch]
+            with pytest.raises(TypeError) as actual:
+                process_checkout_batch(batch)
+            assert str(actual.value) == str(expected.value)
+
+
+def test_batch_falls_back_when_the_total_would_overflow_int64():
+    # The subtotal still fits in int64, the total with tax does not.
+    requests = [{"user_id": 1, "items": [{"price": 10 ** 9, "qty": 10 ** 9}] * 9}]
+
+    results = process_checkout_batch(requests)
+
+    assert results == [process_checkout(request) for request in requests]
+    assert results[0]["total"] == 10_890_000_000_000_000_000
+
+
+def test_batch_raises_first_error_in_request_order():
+    requests = [
+        {"user_id": 1, "items": [{"price": 10, "qty": 1}]},
+        {"user_id": 2, "items": [{"price": 10, "qty": 0}]},
+        {"user_id": 3, "items": [{"price": 10, "qty": 1}], "coupon": "???"},
+        {"user_id": None, "items": [{"price": 10, "qty": 1}]},
+    ]
+
+    with pytest.raises(ValueError, match="qty must be positive"):
+        process_checkout_batch(requests)
+    with pytest.raises(ValueError, match="unknown coupon"):
+        process_checkout_batch(requests[2:] + requests[:2])
+    with pytest.raises(ValueError, match="user_id is required"):
+        process_checkout_batch(requests[3:] + requests[:3])
+
+
+def test_batch_without_numpy(monkeypatch):
+    import order_processing
+    monkeypatch.setattr(order_processing, "np", None)
+    requests = [{"user_id": 1, "items": [{"price": 100, "qty": 2}], "coupon": "SAVE20"}]
+
+    assert process_checkout_batch(requests) == [process_checkout(requests[0])]
+
+
+def _outcome(function, *args):
+    try:
+        return "ok", function(*args)
+    except (ValueError, TypeError) as error:
+        return type(error), str(error)
+
+
+def _two_pass(user_id, items):
+    from order_processing import _calculate_subtotal, _validate_request
+    _validate_request(user_id, items)
+    return _calculate_subtotal(items)
+
+
+def test_fused_validation_matches_two_passes():
+    import random
+    from order_processing import _validate_and_sum
+    rng = random.Random(11)
+    values = [1, 7, 250, 0, -3, 2.5, 0.1, True, False, "5", None]
+
+    def random_item():
+        kind = rng.random()
+        if kind < 0.05:
+            return rng.choice([None, 3, "price qty", ["price", "qty"]])
+        item = {"price": rng.choice(values), "qty": rng.choice(values)}
+        if kind < 0.15:
+            del item[rng.choice(["price", "qty"])]
+        return item
+
+    for _ in range(5000):
+        user_id = None if rng.random() < 0.02 else 1
+        items = rng.choice([None, {}, "items", []]) if rng.random() < 0.05 else [
+            random_item() if rng.random() < 0.2 else {"price": rng.randint(1, 100), "qty": rng.randint(1, 5)}
+            for _ in range(rng.randint(1, 6))
+        ]
+
+        assert _outcome(_validate_and_sum, user_id, items) == _outcome(_two_pass, user_id, items)
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Awaitable, Iterable, List, Optional, TypeVar
+from uuid import UUID
+from .exceptions import ConcurrencyConflict, OperationTimeout
+from .interfaces import AsyncOrderRepository, AsyncPaymentGateway
+from .use_cases import PaymentResult, _declined, _failed, _paid, _rounds, _unknown
+from domain.entities import Order
+
+T = TypeVar('T')
+
+# Python 3.11+
+_timeout = getattr(asyncio, 'timeout', None)
+
+
+class AsyncPayOrderUseCase:
+    # Same flow and results as PayOrderUseCase. max_concurrency bounds the
+    # payments in flight across all callers; timeout (seconds) applies to
+    # every repository and gateway call separately.
+    def __init__(self, order_repo: AsyncOrderRepository, payment_gateway: AsyncPaymentGateway,
+                 max_retries: int = 3, max_concurrency: int = 10_000, timeout: Optional[float] = None):
+        self.order_repo = order_repo
+        self.payment_gateway = payment_gateway
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def execute(self, order_id: UUID) -> PaymentResult:
+        async with self._semaphore:
+            try:
+                order = await self._reserve_with_retries(order_id)
+
+                try:
+                    payment_success = await self._call(
+                        self.payment_gateway.charge(order_id, order.total_amount), "Payment gateway")
+                except OperationTimeout as e:
+                    # The charge may still go through, so the order stays
+                    # reserved until it is reconciled with the processor
+                    # (the same holds when the call is cancelled).
+                    return _unknown(order_id, e)
+                except Exception:
+                    await self._release(order)
+                    raise
+
+                if not payment_success:
+                    await self._release(order)
+                    return _declined(order_id)
+
+                return _paid(order, await self._confirm(order))
+
+            except Exception as e:
+                return _failed(order_id, e)
+
+    async def execute_many(self, order_ids: Iterable[UUID]) -> List[PaymentResult]:
+        order_ids = list(order_ids)
+        results: List[Optional[PaymentResult]] = [None] * len(order_ids)
+        for positions in _rounds(order_ids):
+            # A fixed set of workers rather than a task per order: waking a
+            # long queue of semaphore waiters costs quadratic time on 3.11.
+            pending = iter(positions)
+
+            async def worker():
+                for position in pending:
+                    results[position] = await self.execute(order_ids[position])
+
+            workers = min(self.max_concurrency, len(positions))
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        return results
+
+    async def _reserve_with_retries(self, order_id: UUID) -> Order:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._reserve(order_id)
+            except ConcurrencyConflict:
+                if attempt == self.max_retries:
+                    raise
+
+    async def _reserve(self, order_id: UUID) -> Order:
+        order = await self._call(self.order_repo.get_by_id(order_id), "Order repository")
+        order.pay()
+        await self._call(self.order_repo.save(order), "Order repository")
+        return order
+
+    async def _release(self, order: Order) -> None:
+        order.revert_payment()
+        await self._call(self.order_repo.save(order), "Order repository")
+
+    async def _confirm(self, order: Order) -> Optional[Exception]:
+        # Same as PayOrderUseCase: the charge went through, so a failed save
+        # here is returned for the result message, and a conflict is retried
+        # on a fresh copy.
+        order.confirm_payment()
+        try:
+            await self._call(self.order_repo.save(order), "Order repository")
+            return None
+        except ConcurrencyConflict as e:
+            error: Exception = e
+        except Exception as e:
+            return e
+
+        for _ in range(self.max_retries):
+            try:
+                order = await self._call(self.order_repo.get_by_id(order.id), "Order repository")
+                order.confirm_payment()
+                await self._call(self.order_repo.save(order), "Order repository")
+                return None
+            except ConcurrencyConflict as e:
+                error = e
+            except Exception as e:
+                return e
+        return error
+
+    async def _call(self, awaitable: Awaitable[T], name: str) -> T:
+        if self.timeout is None:
+            return await awaitable
+        try:
+            if _timeout is None:
+                return await asyncio.wait_for(awaitable, self.timeout)
+            # Unlike wait_for, asyncio.timeout does not wrap the call in a task.
+            async with _timeout(self.timeout):
+                return await awaitable
+        except asyncio.TimeoutError:
+            raise OperationTimeout(f"{name} did not respond within {self.timeout}s") from None
@@ -0,0 +1,10 @@
+class ConcurrencyConflict(Exception):
+    pass
+
+
+class OperationTimeout(Exception):
+    pass
+
+
+class IdempotencyKeyReused(Exception):
+    pass
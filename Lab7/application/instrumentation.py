@@ -0,0 +1,74 @@
+from typing import Callable, Iterable, List, Optional, Tuple, Type
+from uuid import UUID
+from .interfaces import OrderPage, OrderRepository, PaymentGateway, PaymentListener
+from domain.entities import Order
+from domain.value_objects import Money
+
+
+class TimedOrderRepository(OrderRepository):
+    def __init__(self, inner: OrderRepository, listener: PaymentListener, clock: Callable[[], float]):
+        self.inner = inner
+        self._listener = listener
+        self._clock = clock
+
+    def get_by_id(self, order_id: UUID) -> Order:
+        return self._timed("get_by_id", self.inner.get_by_id, order_id)
+
+    def save(self, order: Order) -> None:
+        self._timed("save", self.inner.save, order)
+
+    def get_many(self, order_ids: Iterable[UUID]) -> List[Order]:
+        return self._timed("get_many", self.inner.get_many, order_ids)
+
+    def save_many(self, orders: Iterable[Order]) -> None:
+        self._timed("save_many", self.inner.save_many, orders)
+
+    def find_by_customer(self, customer_id: UUID, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        return self._timed("find_by_customer", self.inner.find_by_customer, customer_id, limit, cursor)
+
+    def find_by_status(self, status: str, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        return self._timed("find_by_status", self.inner.find_by_status, status, limit, cursor)
+
+    def _timed(self, stage, method, *args):
+        return timed(self._listener, self._clock, stage, method, *args)
+
+
+class TimedPaymentGateway(PaymentGateway):
+    def __init__(self, inner: PaymentGateway, listener: PaymentListener, clock: Callable[[], float]):
+        self.inner = inner
+        self._listener = listener
+        self._clock = clock
+
+    def charge(self, order_id: UUID, amount: Money) -> bool:
+        started = self._clock()
+        try:
+            result = self.inner.charge(order_id, amount)
+        except Exception as e:
+            notify(self._listener, "charge", self._clock() - started, "error", type(e))
+            raise
+        notify(self._listener, "charge", self._clock() - started, "approved" if result else "declined")
+        return result
+
+    def charge_many(self, charges: Iterable[Tuple[UUID, Money]]) -> List[bool]:
+        return timed(self._listener, self._clock, "charge_many", self.inner.charge_many, charges)
+
+
+def timed(listener: PaymentListener, clock: Callable[[], float], stage: str, function, *args):
+    started = clock()
+    try:
+        result = function(*args)
+    except Exception as e:
+        notify(listener, stage, clock() - started, "error", type(e))
+        raise
+    notify(listener, stage, clock() - started, "ok")
+    return result
+
+
+def notify(listener: PaymentListener, stage: str, duration: float, outcome: str,
+           error: Optional[Type[BaseException]] = None) -> None:
+    # Timing is best effort: a failing listener must never turn a charge
+    # that went through into an error, or the order would be released.
+    try:
+        listener.on_stage(stage, duration, outcome, error)
+    except Exception:
+        pass
@@ -1,9 +1,25 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional, Tuple, Type
 from uuid import UUID
 from domain.entities import Order
+from domain.events import DomainEvent
 from domain.value_objects import Money
 
 
+@dataclass
+class OrderPage:
+    items: List[Order] = field(default_factory=list)
+    # Pass back as `cursor` to get the next page; None on the last page.
+    next_cursor: Optional[int] = None
+
+
+@dataclass
+class OutboxEntry:
+    id: int
+    event: DomainEvent
+
+
 class OrderRepository(ABC):
     @abstractmethod
     def get_by_id(self, order_id: UUID) -> Order:
@@ -13,8 +29,81 @@ class OrderRepository(ABC):
     def save(self, order: Order) -> None:
         pass
 
+    def get_many(self, order_ids: Iterable[UUID]) -> List[Order]:
+        return [self.get_by_id(order_id) for order_id in order_ids]
+
+    def save_many(self, orders: Iterable[Order]) -> None:
+        for order in orders:
+            self.save(order)
+
+    def find_by_customer(self, customer_id: UUID, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        raise NotImplementedError(f"{type(self).__name__} does not support queries by customer")
+
+    def find_by_status(self, status: str, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        raise NotImplementedError(f"{type(self).__name__} does not support queries by status")
+
+
+class Outbox(ABC):
+    # Implemented by repositories that store Order events in the same
+    # transaction as the order. Entries stay pending until acknowledged.
+    @abstractmethod
+    def fetch_pending(self, limit: int = 100) -> List[OutboxEntry]:
+        pass
+
+    @abstractmethod
+    def acknowledge(self, entry_ids: Iterable[int]) -> None:
+        pass
+
 
 class PaymentGateway(ABC):
     @abstractmethod
     def charge(self, order_id: UUID, amount: Money) -> bool:
         pass
+
+    def charge_many(self, charges: Iterable[Tuple[UUID, Money]]) -> List[bool]:
+        # Gateways with a batch API should override this.
+        return [self.charge(order_id, amount) for order_id, amount in charges]
+
+
+class PaymentListener(ABC):
+    # Receives the duration (seconds, monotonic clock) of every stage
+    # PayOrderUseCase goes through, e.g. "get_by_id", "pay", "save",
+    # "charge", and of the whole "execute" call.
+    @abstractmethod
+    def on_stage(self, stage: str, duration: float, outcome: str,
+                 error: Optional[Type[BaseException]] = None) -> None:
+        pass
+
+
+class IdempotencyStore(ABC):
+    # Remembers the result returned for an idempotency key.
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        pass
+
+    @abstractmethod
+    def put(self, key: str, result: Any) -> None:
+        pass
+
+
+class AsyncOrderRepository(ABC):
+    @abstractmethod
+    async def get_by_id(self, order_id: UUID) -> Order:
+        pass
+
+    @abstractmethod
+    async def save(self, order: Order) -> None:
+        pass
+
+    async def get_many(self, order_ids: Iterable[UUID]) -> List[Order]:
+        return [await self.get_by_id(order_id) for order_id in order_ids]
+
+    async def save_many(self, orders: Iterable[Order]) -> None:
+        for order in orders:
+            await self.save(order)
+
+
+class AsyncPaymentGateway(ABC):
+    @abstractmethod
+    async def charge(self, order_id: UUID, amount: Money) -> bool:
+        pass
@@ -1,7 +1,12 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from uuid import UUID
-from dataclasses import dataclass
-from typing import Tuple
-from .interfaces import OrderRepository, PaymentGateway
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .exceptions import ConcurrencyConflict, IdempotencyKeyReused, OperationTimeout
+from .instrumentation import TimedOrderRepository, TimedPaymentGateway, notify, timed
+from .interfaces import IdempotencyStore, OrderRepository, PaymentGateway, PaymentListener
 from domain.entities import Order
 from domain.exceptions import DomainException
 
@@ -12,49 +17,352 @@ class PaymentResult:
     order_id: UUID
     amount_paid: str
     message: str = ""
+    # False when another attempt could end differently, e.g. after a
+    # timeout, a conflict or an unexpected error.
+    final: bool = field(default=True, repr=False, compare=False)
 
 
 class PayOrderUseCase:
-    def __init__(self, order_repo: OrderRepository, payment_gateway: PaymentGateway):
+    def __init__(self, order_repo: OrderRepository, payment_gateway: PaymentGateway, max_retries: int = 3,
+                 listener: Optional[PaymentListener] = None, clock: Callable[[], float] = time.perf_counter):
         self.order_repo = order_repo
         self.payment_gateway = payment_gateway
+        self.max_retries = max_retries
+        # Without a listener nothing is timed and the calls go straight to
+        # the repository and the gateway.
+        self.listener = listener
+        self._clock = clock
+        if listener is not None:
+            self.order_repo = TimedOrderRepository(order_repo, listener, clock)
+            self.payment_gateway = TimedPaymentGateway(payment_gateway, listener, clock)
     
     def execute(self, order_id: UUID) -> PaymentResult:
+        if self.listener is None:
+            return self._execute(order_id)
+
+        started = self._clock()
+        result = self._execute(order_id)
+        notify(self.listener, "execute", self._clock() - started, _outcome(result))
+        return result
+
+    def _execute(self, order_id: UUID) -> PaymentResult:
         try:
-            order = self.order_repo.get_by_id(order_id)
-            
-            order.pay()
+            order = self._reserve_with_retries(order_id)
             
-            payment_success = self.payment_gateway.charge(order_id, order.total_amount)
+            try:
+                payment_success = self.payment_gateway.charge(order_id, order.total_amount)
+            except OperationTimeout as e:
+                # The charge may still go through, so the order stays
+                # reserved until it is reconciled with the processor.
+                return _unknown(order_id, e)
+            except Exception:
+                self._release(order)
+                raise
             
             if not payment_success:
-                return PaymentResult(
-                    success=False,
-                    order_id=order_id,
-                    amount_paid="0",
-                    message="Payment gateway declined the transaction"
-                )
+                self._release(order)
+                return _declined(order_id)
             
-            self.order_repo.save(order)
-            
-            return PaymentResult(
-                success=True,
-                order_id=order_id,
-                amount_paid=str(order.total_amount.amount),
-                message="Order paid successfully"
-            )
+            return _paid(order, self._confirm(order))
             
-        except DomainException as e:
-            return PaymentResult(
-                success=False,
-                order_id=order_id,
-                amount_paid="0",
-                message=str(e)
-            )
         except Exception as e:
-            return PaymentResult(
-                success=False,
-                order_id=order_id,
-                amount_paid="0",
-                message=f"Unexpected error: {str(e)}"
-            )
+            return _failed(order_id, e)
+
+    def execute_many(self, order_ids: Iterable[UUID], max_concurrency: int = 16) -> List[PaymentResult]:
+        # Same per-order results as calling execute() for each id in turn:
+        # a repeated id waits for a later round, so it sees the outcome of
+        # its previous occurrence.
+        order_ids = list(order_ids)
+        results: List[Optional[PaymentResult]] = [None] * len(order_ids)
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            for positions in _rounds(order_ids):
+                round_ids = [order_ids[position] for position in positions]
+                for position, result in zip(positions, self._execute_round(round_ids, pool)):
+                    results[position] = result
+        return results
+
+    def _execute_round(self, order_ids: List[UUID], pool: ThreadPoolExecutor) -> List[PaymentResult]:
+        results: Dict[UUID, PaymentResult] = {}
+        reserved = self._reserve_many(order_ids, results)
+
+        outcomes = list(pool.map(self._charge, reserved))
+        to_release = []
+        charged = []
+        for order, (payment_success, error) in zip(reserved, outcomes):
+            if payment_success:
+                charged.append(order)
+                results[order.id] = _paid(order)
+            elif isinstance(error, OperationTimeout):
+                results[order.id] = _unknown(order.id, error)
+            else:
+                order.revert_payment()
+                to_release.append(order)
+                results[order.id] = _declined(order.id) if error is None else _failed(order.id, error)
+
+        for order, error in self._save_many(to_release):
+            results[order.id] = _failed(order.id, error)
+        for order in charged:
+            order.confirm_payment()
+        for order, error in self._save_many(charged):
+            if isinstance(error, ConcurrencyConflict):
+                error = self._reconfirm(order.id, error)
+            if error is not None:
+                results[order.id] = _paid(order, error)
+        return [results[order_id] for order_id in order_ids]
+
+    def _reserve_many(self, order_ids: List[UUID], results: Dict[UUID, PaymentResult]) -> List[Order]:
+        try:
+            loaded = self.order_repo.get_many(order_ids)
+        except Exception:
+            loaded = []
+            for order_id in order_ids:
+                try:
+                    loaded.append(self.order_repo.get_by_id(order_id))
+                except Exception as e:
+                    results[order_id] = _failed(order_id, e)
+
+        paid = []
+        for order in loaded:
+            try:
+                self._pay(order)
+                paid.append(order)
+            except Exception as e:
+                results[order.id] = _failed(order.id, e)
+
+        failures = self._save_many(paid)
+        failed_ids = {order.id for order, _ in failures}
+        reserved = [order for order in paid if order.id not in failed_ids]
+        for order, error in failures:
+            if not isinstance(error, ConcurrencyConflict):
+                results[order.id] = _failed(order.id, error)
+                continue
+            # Someone else changed the order: start over as execute() would.
+            try:
+                reserved.append(self._reserve_with_retries(order.id))
+            except Exception as e:
+                results[order.id] = _failed(order.id, e)
+        return reserved
+
+    def _save_many(self, orders: List[Order]) -> List[Tuple[Order, Exception]]:
+        if not orders:
+            return []
+        try:
+            self.order_repo.save_many(orders)
+            return []
+        except Exception:
+            pass
+
+        # Batch rejected (possibly after saving part of it): save what is
+        # still unsaved one by one to find the failing orders.
+        failures = []
+        for order in orders:
+            if order._persisted_version == order._version:
+                continue
+            try:
+                self.order_repo.save(order)
+            except Exception as e:
+                failures.append((order, e))
+        return failures
+
+    def _charge(self, order: Order) -> Tuple[bool, Optional[Exception]]:
+        try:
+            return bool(self.payment_gateway.charge(order.id, order.total_amount)), None
+        except Exception as e:
+            return False, e
+
+    def _reserve_with_retries(self, order_id: UUID) -> Order:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._reserve(order_id)
+            except ConcurrencyConflict:
+                if attempt == self.max_retries:
+                    raise
+
+    def _reserve(self, order_id: UUID) -> Order:
+        # Saving the paid state before charging makes concurrent workers
+        # conflict here, so only one of them ever reaches the gateway.
+        order = self.order_repo.get_by_id(order_id)
+        self._pay(order)
+        self.order_repo.save(order)
+        return order
+
+    def _release(self, order: Order) -> None:
+        order.revert_payment()
+        self.order_repo.save(order)
+
+    def _confirm(self, order: Order) -> Optional[Exception]:
+        # The money is taken and the order is already stored as paid, so the
+        # result stays a success even if this save fails; the error is
+        # returned for the result message rather than dropped.
+        order.confirm_payment()
+        try:
+            self.order_repo.save(order)
+            return None
+        except ConcurrencyConflict as e:
+            return self._reconfirm(order.id, e)
+        except Exception as e:
+            return e
+
+    def _reconfirm(self, order_id: UUID, error: Exception) -> Optional[Exception]:
+        # Someone else saved the order after it was reserved: record the
+        # payment again on a fresh copy so OrderPaid is not lost.
+        for _ in range(self.max_retries):
+            try:
+                order = self.order_repo.get_by_id(order_id)
+                order.confirm_payment()
+                self.order_repo.save(order)
+                return None
+            except ConcurrencyConflict as e:
+                error = e
+            except Exception as e:
+                return e
+        return error
+
+    def _pay(self, order: Order) -> None:
+        if self.listener is None:
+            order.pay()
+        else:
+            timed(self.listener, self._clock, "pay", order.pay)
+
+
+class IdempotentPayOrderUseCase:
+    # Answers retried requests from the store without touching the
+    # repository or the gateway. Concurrent requests with the same key wait
+    # for the one already in flight instead of starting their own. Only
+    # final results are stored, together with the order they belong to; a
+    # key reused for another order is rejected.
+
+    def __init__(self, use_case: PayOrderUseCase, store: IdempotencyStore):
+        self.use_case = use_case
+        self.store = store
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+
+    def execute(self, order_id: UUID, idempotency_key: Optional[str] = None, attempt: int = 0) -> PaymentResult:
+        # Without a key, retries of the same attempt share a result; bump
+        # attempt to pay again after a decline.
+        key = idempotency_key if idempotency_key is not None else f"{order_id}:{attempt}"
+        result = self._stored(key, order_id)
+        if result is not None:
+            return result
+
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                # Re-check: the previous leader may have finished in between.
+                result = self._stored(key, order_id)
+                if result is not None:
+                    return result
+                call = self._in_flight[key] = _InFlight(order_id)
+
+        if not leader:
+            if call.order_id != order_id:
+                return _key_reused(order_id, key, call.order_id)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return replace(call.result)
+
+        try:
+            call.result = self.use_case.execute(order_id)
+            if call.result.final:
+                self.store.put(key, (order_id, call.result))
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return replace(call.result)
+
+    def _stored(self, key: str, order_id: UUID) -> Optional[PaymentResult]:
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        stored_order_id, result = entry
+        if stored_order_id != order_id:
+            return _key_reused(order_id, key, stored_order_id)
+        return replace(result)
+
+
+class _InFlight:
+    __slots__ = ("order_id", "done", "result", "error")
+
+    def __init__(self, order_id: UUID):
+        self.order_id = order_id
+        self.done = threading.Event()
+        self.result: Optional[PaymentResult] = None
+        self.error: Optional[BaseException] = None
+
+
+_DECLINED = "Payment gateway declined the transaction"
+
+
+def _outcome(result: PaymentResult) -> str:
+    if result.success:
+        return "paid"
+    return "declined" if result.message == _DECLINED else "failed"
+
+
+def _rounds(order_ids: List[UUID]) -> List[List[int]]:
+    # Positions grouped so that every id appears at most once per round.
+    rounds: List[List[int]] = []
+    occurrences: Dict[UUID, int] = {}
+    for position, order_id in enumerate(order_ids):
+        occurrence = occurrences.get(order_id, 0)
+        occurrences[order_id] = occurrence + 1
+        if occurrence == len(rounds):
+            rounds.append([])
+        rounds[occurrence].append(position)
+    return rounds
+
+
+def _paid(order: Order, confirm_error: Optional[Exception] = None) -> PaymentResult:
+    message = "Order paid successfully"
+    if confirm_error is not None:
+        message = f"Order paid, but the payment confirmation was not saved: {confirm_error}"
+    return PaymentResult(
+        success=True,
+        order_id=order.id,
+        amount_paid=str(order.total_amount.amount),
+        message=message
+    )
+
+
+def _declined(order_id: UUID) -> PaymentResult:
+    return PaymentResult(
+        success=False,
+        order_id=order_id,
+        amount_paid="0",
+        message=_DECLINED
+    )
+
+
+def _unknown(order_id: UUID, error: Exception) -> PaymentResult:
+    return PaymentResult(
+        success=False,
+        order_id=order_id,
+        amount_paid="0",
+        message=f"Payment outcome unknown, order left reserved for reconciliation: {error}",
+        final=False
+    )
+
+
+def _key_reused(order_id: UUID, key: str, other_order_id: UUID) -> PaymentResult:
+    return _failed(order_id, IdempotencyKeyReused(f"Idempotency key {key} was already used for order {other_order_id}"))
+
+
+def _failed(order_id: UUID, error: Exception) -> PaymentResult:
+    if isinstance(error, (DomainException, ConcurrencyConflict, OperationTimeout, IdempotencyKeyReused)):
+        message = str(error)
+    else:
+        message = f"Unexpected error: {str(error)}"
+    return PaymentResult(
+        success=False,
+        order_id=order_id,
+        amount_paid="0",
+        message=message,
+        final=isinstance(error, DomainException)
+    )
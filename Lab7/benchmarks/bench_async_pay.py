@@ -0,0 +1,41 @@
+import asyncio
+import sys
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.async_use_cases import AsyncPayOrderUseCase
+from infrastructure.async_adapters import AsyncOrderRepositoryAdapter
+from infrastructure.payment_gateways import AsyncFakePaymentGateway
+from infrastructure.repositories import InMemoryOrderRepository
+
+
+GATEWAY_LATENCY = 0.1
+
+
+def main() -> None:
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"{orders} orders, gateway latency {GATEWAY_LATENCY * 1e3:.0f} ms, one thread")
+    for max_concurrency in (1_000, 10_000, orders):
+        repo = InMemoryOrderRepository()
+        order_ids = []
+        for _ in range(orders):
+            order = Order(uuid4(), uuid4())
+            order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+            repo.save(order)
+            order_ids.append(order.id)
+        gateway = AsyncFakePaymentGateway(latency=GATEWAY_LATENCY, success_rate=1.0)
+        use_case = AsyncPayOrderUseCase(AsyncOrderRepositoryAdapter(repo), gateway,
+                                        max_concurrency=max_concurrency, timeout=30.0)
+
+        started = time.perf_counter()
+        results = asyncio.run(use_case.execute_many(order_ids))
+        elapsed = time.perf_counter() - started
+        assert all(result.success for result in results)
+        print(f"max_concurrency {max_concurrency:>7}: {orders / elapsed:>8.0f} orders/s, "
+              f"{gateway.max_in_flight:>6} payments in flight at peak, {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
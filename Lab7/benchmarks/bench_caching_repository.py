@@ -0,0 +1,66 @@
+import random
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.use_cases import PayOrderUseCase
+from infrastructure.caching_repository import CachingOrderRepository
+from infrastructure.payment_gateways import FakePaymentGateway
+from infrastructure.repositories import InMemoryOrderRepository
+
+
+ORDERS = 2_000
+READS = 5_000
+STORE_LATENCY = 0.0005
+
+
+class SlowOrderRepository(InMemoryOrderRepository):
+    # Stand-in for a remote store: every call pays a fixed round-trip.
+
+    def get_by_id(self, order_id):
+        time.sleep(STORE_LATENCY)
+        return super().get_by_id(order_id)
+
+    def save(self, order):
+        time.sleep(STORE_LATENCY)
+        super().save(order)
+
+
+def run(label: str, repo, order_ids) -> None:
+    # Skewed access: a few hot orders get most reads, as with retries and polling.
+    rng = random.Random(1)
+    requests = [order_ids[min(int(rng.paretovariate(1.2)) - 1, ORDERS - 1)] for _ in range(READS)]
+    started = time.perf_counter()
+    for order_id in requests:
+        repo.get_by_id(order_id)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>22} {READS / elapsed:>10.0f} reads/s  {getattr(repo, 'stats', dict)()}")
+
+
+def main() -> None:
+    inner = SlowOrderRepository()
+    order_ids = []
+    for _ in range(ORDERS):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+        inner.save(order)
+        order_ids.append(order.id)
+
+    run("slow store", inner, order_ids)
+    run("cached (LRU 64)", CachingOrderRepository(inner, maxsize=64), order_ids)
+    run("cached (LRU 64, ttl)", CachingOrderRepository(inner, maxsize=64, ttl=0.05), order_ids)
+
+    repo = CachingOrderRepository(inner, maxsize=ORDERS)
+    use_case = PayOrderUseCase(repo, FakePaymentGateway())
+    for order_id in order_ids[:500]:
+        repo.get_by_id(order_id)
+    started = time.perf_counter()
+    for order_id in order_ids[:500]:
+        use_case.execute(order_id)
+    elapsed = time.perf_counter() - started
+    print(f"{'PayOrderUseCase, warm':>22} {500 / elapsed:>10.0f} payments/s  {repo.stats()}")
+
+
+if __name__ == "__main__":
+    main()
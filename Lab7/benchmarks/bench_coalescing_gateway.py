@@ -0,0 +1,53 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+from domain.value_objects import Money
+from infrastructure.coalescing_gateway import CoalescingPaymentGateway
+from infrastructure.payment_gateways import FakePaymentGateway
+
+
+CHARGES = 5_000
+CALLERS = 256
+# Requests the processor accepts at once, in both modes.
+CONNECTIONS = 4
+BATCH_LATENCY = 0.005
+ITEM_LATENCY = 0.00005
+
+
+def make_gateway():
+    return FakePaymentGateway(BATCH_LATENCY, ITEM_LATENCY, seed=1, max_concurrency=CONNECTIONS, record_calls=False)
+
+
+def run(gateway, label):
+    amount = Money(Decimal('10'))
+    order_ids = [uuid4() for _ in range(CHARGES)]
+
+    def timed_charge(order_id):
+        started = time.perf_counter()
+        gateway.charge(order_id, amount)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        latencies = sorted(pool.map(timed_charge, order_ids))
+    elapsed = time.perf_counter() - started
+    p50 = statistics.median(latencies) * 1e3
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e3
+    print(f"{label:>34} {CHARGES / elapsed:>8.0f} charges/s   p50 {p50:>6.1f} ms   p99 {p99:>6.1f} ms")
+
+
+def main() -> None:
+    print(f"{CHARGES} charges from {CALLERS} threads, {CONNECTIONS} connections, gateway latency "
+          f"{BATCH_LATENCY * 1e3:.0f} ms per request + {ITEM_LATENCY * 1e3:.2f} ms per charge")
+    run(make_gateway(), "charge per request")
+    for max_batch_size, max_delay in ((16, 0.001), (64, 0.001), (64, 0.010), (256, 0.010)):
+        inner = make_gateway()
+        with CoalescingPaymentGateway(inner, max_batch_size=max_batch_size, max_delay=max_delay,
+                                      max_concurrent_batches=CONNECTIONS) as gateway:
+            run(gateway, f"coalesced, batch {max_batch_size}, wait {max_delay * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
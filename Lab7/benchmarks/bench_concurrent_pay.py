@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.interfaces import PaymentGateway
+from application.use_cases import PayOrderUseCase
+from infrastructure.repositories import InMemoryOrderRepository
+
+
+ORDERS = 5_000
+ATTEMPTS_PER_ORDER = 4
+
+
+class CountingPaymentGateway(PaymentGateway):
+    def __init__(self):
+        self.charges = Counter()
+        self._lock = threading.Lock()
+
+    def charge(self, order_id, amount):
+        with self._lock:
+            self.charges[order_id] += 1
+        return True
+
+
+def run(threads: int) -> None:
+    repo = InMemoryOrderRepository()
+    gateway = CountingPaymentGateway()
+    use_case = PayOrderUseCase(repo, gateway)
+    order_ids = []
+    for _ in range(ORDERS):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 2, Money(Decimal('9.99')))
+        repo.save(order)
+        order_ids.append(order.id)
+
+    # Every order is requested several times in a row so workers race on it.
+    requests = [order_id for order_id in order_ids for _ in range(ATTEMPTS_PER_ORDER)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(use_case.execute, requests))
+    elapsed = time.perf_counter() - started
+
+    paid = sum(result.success for result in results)
+    double_charged = sum(1 for count in gateway.charges.values() if count > 1)
+    print(f"{threads:>8} {len(requests) / elapsed:>12.0f} {paid:>8} {double_charged:>15}")
+
+
+def main() -> None:
+    print(f"{'threads':>8} {'requests/s':>12} {'paid':>8} {'double charges':>15}")
+    for threads in (1, 4, 16):
+        run(threads)
+
+
+if __name__ == "__main__":
+    main()
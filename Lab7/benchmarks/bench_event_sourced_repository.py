@@ -0,0 +1,51 @@
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from infrastructure.event_sourced_repository import EventSourcedOrderRepository
+from infrastructure.repositories import InMemoryOrderRepository
+
+
+# Not multiples of the snapshot intervals, so loads do replay events.
+HISTORY = [150, 1_550, 10_950]
+PRODUCTS = 20
+LOADS = 200
+
+
+def build(repo, events: int) -> Order:
+    # A long-lived order: a few lines whose quantities keep changing.
+    order = Order(uuid4(), uuid4())
+    repo.save(order)
+    products = [uuid4() for _ in range(PRODUCTS)]
+    for index in range(events):
+        product_id = products[index % PRODUCTS]
+        if index < PRODUCTS:
+            order.add_line(product_id, "Product", 1, Money(Decimal('9.99')))
+        else:
+            order.update_quantity(product_id, index % 5 + 1)
+        repo.save(order)
+    return order
+
+
+def load_time(repo, order_id) -> float:
+    started = time.perf_counter()
+    for _ in range(LOADS):
+        repo.get_by_id(order_id)
+    return (time.perf_counter() - started) / LOADS * 1e6
+
+
+def main() -> None:
+    print(f"get_by_id latency, us, order with {PRODUCTS} lines")
+    print(f"{'events':>8} {'in-memory':>10} {'no snapshots':>13} {'snapshot/100':>13} {'snapshot/1000':>14}")
+    for events in HISTORY:
+        row = []
+        for repo in (InMemoryOrderRepository(), EventSourcedOrderRepository(None),
+                     EventSourcedOrderRepository(100), EventSourcedOrderRepository(1000)):
+            order = build(repo, events)
+            row.append(load_time(repo, order.id))
+        print(f"{events:>8} {row[0]:>10.1f} {row[1]:>13.1f} {row[2]:>13.1f} {row[3]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.interfaces import PaymentGateway
+from application.use_cases import PayOrderUseCase
+from infrastructure.repositories import ShardedOrderRepository
+
+
+ORDERS = 2_000
+GATEWAY_LATENCY = 0.005
+
+
+class SlowPaymentGateway(PaymentGateway):
+    def charge(self, order_id, amount):
+        time.sleep(GATEWAY_LATENCY)
+        return True
+
+
+def make_use_case():
+    repo = ShardedOrderRepository()
+    order_ids = []
+    for _ in range(ORDERS):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+        order_ids.append(order.id)
+        repo.save(order)
+    return PayOrderUseCase(repo, SlowPaymentGateway()), order_ids
+
+
+def main() -> None:
+    print(f"{ORDERS} orders, gateway latency {GATEWAY_LATENCY * 1e3:.0f} ms")
+    use_case, order_ids = make_use_case()
+    started = time.perf_counter()
+    for order_id in order_ids[:200]:
+        use_case.execute(order_id)
+    print(f"{'sequential execute':>28} {200 / (time.perf_counter() - started):>10.0f} orders/s")
+
+    for concurrency in (8, 32, 128, 512):
+        use_case, order_ids = make_use_case()
+        started = time.perf_counter()
+        results = use_case.execute_many(order_ids, max_concurrency=concurrency)
+        elapsed = time.perf_counter() - started
+        assert all(result.success for result in results)
+        print(f"{f'execute_many, {concurrency} threads':>28} {ORDERS / elapsed:>10.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import gc
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.interfaces import PaymentGateway, PaymentListener
+from application.use_cases import PayOrderUseCase
+from infrastructure.metrics import HistogramCollector
+from infrastructure.repositories import InMemoryOrderRepository
+
+
+ORDERS = 50_000
+REPEATS = 5
+
+
+class InstantPaymentGateway(PaymentGateway):
+    def charge(self, order_id, amount):
+        return True
+
+
+class NullListener(PaymentListener):
+    def on_stage(self, stage, duration, outcome, error=None):
+        pass
+
+
+def best_time(make_listener):
+    # Best of several runs over fresh orders, in microseconds per execute.
+    best = float("inf")
+    for _ in range(REPEATS):
+        repo = InMemoryOrderRepository()
+        order_ids = []
+        for _ in range(ORDERS):
+            order = Order(uuid4(), uuid4())
+            order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+            repo.save(order)
+            order_ids.append(order.id)
+        use_case = PayOrderUseCase(repo, InstantPaymentGateway(), listener=make_listener())
+
+        gc.collect()
+        gc.disable()
+        started = time.perf_counter()
+        for order_id in order_ids:
+            use_case.execute(order_id)
+        best = min(best, time.perf_counter() - started)
+        gc.enable()
+    return best / ORDERS * 1e6
+
+
+def main() -> None:
+    print(f"PayOrderUseCase.execute, in-memory repository, instant gateway, best of {REPEATS} x {ORDERS}")
+    baseline = best_time(lambda: None)
+    print(f"{'no listener':>22} {baseline:>7.2f} us")
+    for label, make_listener in (("no-op listener", NullListener), ("HistogramCollector", HistogramCollector)):
+        elapsed = best_time(make_listener)
+        print(f"{label:>22} {elapsed:>7.2f} us  (+{elapsed - baseline:.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
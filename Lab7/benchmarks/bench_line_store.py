@@ -0,0 +1,54 @@
+import gc
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order, OrderLine
+from domain.line_store import ColumnarLineStore
+from domain.value_objects import Money
+
+
+def make_line(index: int) -> OrderLine:
+    # Fresh name and price objects per line, as when decoding a request payload.
+    return OrderLine(uuid4(), "Product %d" % (index % 1000), index % 7 + 1, Money(Decimal(index % 10_000).scaleb(-2)))
+
+
+def measure(label: str, build) -> None:
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>28} {size / 2 ** 20:>9.1f} MiB {size / LINES:>8.1f} B/line")
+    del value
+
+
+def build_order(lines) -> Order:
+    order = Order(uuid4(), uuid4(), lines)
+    for index in range(LINES):
+        line = make_line(index)
+        order.add_line(line.product_id, line.product_name, line.quantity, line.unit_price)
+    # Stands in for the save that clears the pending OrderLineAdded events.
+    order.clear_events()
+    return order
+
+
+LINES = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def main() -> None:
+    print(f"memory for {LINES} order lines")
+    measure("list[OrderLine]", lambda: [make_line(index) for index in range(LINES)])
+    measure("ColumnarLineStore", lambda: ColumnarLineStore(make_line(index) for index in range(LINES)))
+    measure("Order (list lines)", lambda: build_order([]))
+    measure("Order (columnar lines)", lambda: build_order(ColumnarLineStore()))
+
+    store = ColumnarLineStore(make_line(index) for index in range(LINES))
+    started = time.perf_counter()
+    store.totals_by_currency()
+    print(f"{'columnar totals':>28} {(time.perf_counter() - started) * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from infrastructure.log_repository import LogStructuredOrderRepository
+from infrastructure.sqlite_repository import SqliteOrderRepository
+
+
+ORDERS = 50_000
+
+
+def make_orders():
+    orders = []
+    for _ in range(ORDERS):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 2, Money(Decimal('9.99')))
+        order.add_line(uuid4(), "Other product", 1, Money(Decimal('25')))
+        orders.append(order)
+    return orders
+
+
+def run(label: str, factory) -> None:
+    # Pay-once-then-read: create, save as paid, read back.
+    orders = make_orders()
+    with tempfile.TemporaryDirectory() as directory:
+        repo = factory(directory)
+        started = time.perf_counter()
+        for order in orders:
+            repo.save(order)
+        for order in orders:
+            order.pay()
+            repo.save(order)
+        if hasattr(repo, "flush"):
+            repo.flush()
+        write_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for order in orders:
+            repo.get_by_id(order.id)
+        read_elapsed = time.perf_counter() - started
+        repo.close()
+
+    print(f"{label:>28} {2 * ORDERS / write_elapsed:>12.0f} {ORDERS / read_elapsed:>12.0f}")
+
+
+def main() -> None:
+    print(f"{'repository':>28} {'saves/s':>12} {'reads/s':>12}")
+    run("log-structured", lambda d: LogStructuredOrderRepository(d))
+    run("sqlite, write-behind", lambda d: SqliteOrderRepository(os.path.join(d, "orders.db")))
+    run("sqlite, synchronous", lambda d: SqliteOrderRepository(os.path.join(d, "orders.db"), write_behind=False))
+    run("log-structured, fsync", lambda d: LogStructuredOrderRepository(d, durable=True))
+
+
+if __name__ == "__main__":
+    main()
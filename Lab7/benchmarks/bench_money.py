@@ -0,0 +1,40 @@
+import timeit
+import tracemalloc
+from decimal import Decimal
+from domain.value_objects import CompactMoney, Money
+
+
+INSTANCES = 100_000
+
+
+def bytes_per_instance(factory) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    values = [factory(index) for index in range(INSTANCES)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del values
+    return size / INSTANCES
+
+
+def main() -> None:
+    money_size = bytes_per_instance(lambda i: Money(Decimal(i).scaleb(-2)))
+    compact_size = bytes_per_instance(lambda i: CompactMoney(i))
+
+    m1, m2 = Money(Decimal('100.25')), Money(Decimal('0.75'))
+    c1, c2 = CompactMoney(10025), CompactMoney(75)
+    number = 200_000
+    money_add = min(timeit.repeat(lambda: m1 + m2, number=number, repeat=5)) / number
+    compact_add = min(timeit.repeat(lambda: c1 + c2, number=number, repeat=5)) / number
+    money_eq = min(timeit.repeat(lambda: m1 == m2, number=number, repeat=5)) / number
+    compact_eq = min(timeit.repeat(lambda: c1 == c2, number=number, repeat=5)) / number
+
+    print(f"{'':>14} {'Money':>10} {'CompactMoney':>13}")
+    print(f"{'bytes/value':>14} {money_size:>10.0f} {compact_size:>13.0f}")
+    print(f"{'add, ns':>14} {money_add * 1e9:>10.0f} {compact_add * 1e9:>13.0f}")
+    print(f"{'eq, ns':>14} {money_eq * 1e9:>10.0f} {compact_eq * 1e9:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
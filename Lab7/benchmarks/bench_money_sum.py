@@ -0,0 +1,33 @@
+import time
+from array import array
+from decimal import Decimal
+from functools import reduce
+from operator import add
+from domain.value_objects import CompactMoney, Money
+
+
+LINES = 1_000_000
+
+
+def measure(label: str, func) -> None:
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:>32} {elapsed * 1e3:>9.1f} ms  {result.amount}")
+
+
+def main() -> None:
+    monies = [Money(Decimal(index % 10_000).scaleb(-2)) for index in range(LINES)]
+    compact = [CompactMoney(index % 10_000) for index in range(LINES)]
+    minor_units = array('q', (index % 10_000 for index in range(LINES)))
+
+    print(f"summing {LINES} amounts")
+    measure("Money chained __add__", lambda: reduce(add, monies))
+    measure("Money.sum", lambda: Money.sum(monies))
+    measure("CompactMoney chained __add__", lambda: reduce(add, compact))
+    measure("CompactMoney.sum", lambda: CompactMoney.sum(compact))
+    measure("CompactMoney.sum_minor_units", lambda: CompactMoney.sum_minor_units(minor_units))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+
+
+SIZES = [1_000, 2_500, 5_000, 10_000]
+
+
+def build_order(lines: int) -> float:
+    order = Order(uuid4(), uuid4())
+    price = Money(Decimal('9.99'))
+    started = time.perf_counter()
+    for _ in range(lines):
+        order.add_line(uuid4(), "Product", 3, price)
+    order.total_amount
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    print(f"{'lines':>8} {'total, ms':>10} {'per line, us':>13}")
+    for size in SIZES:
+        elapsed = min(build_order(size) for _ in range(3))
+        print(f"{size:>8} {elapsed * 1e3:>10.2f} {elapsed / size * 1e6:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
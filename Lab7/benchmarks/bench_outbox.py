@@ -0,0 +1,71 @@
+import statistics
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.use_cases import PayOrderUseCase
+from infrastructure.outbox_dispatcher import OutboxDispatcher
+from infrastructure.payment_gateways import FakePaymentGateway
+from infrastructure.repositories import InMemoryOrderRepository
+
+
+ORDERS = 20_000
+# A slow consumer: every published batch takes this long.
+PUBLISH_LATENCY = 0.02
+
+
+def prepare():
+    repo = InMemoryOrderRepository()
+    order_ids = []
+    for _ in range(ORDERS):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+        repo.save(order)
+        order_ids.append(order.id)
+    repo.acknowledge(entry.id for entry in repo.fetch_pending(limit=ORDERS))
+    return repo, order_ids
+
+
+def pay_all(repo, order_ids):
+    use_case = PayOrderUseCase(repo, FakePaymentGateway(success_rate=1.0, seed=1, record_calls=False))
+    latencies = []
+    started = time.perf_counter()
+    for order_id in order_ids:
+        call_started = time.perf_counter()
+        use_case.execute(order_id)
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return elapsed, statistics.median(latencies) * 1e6, latencies[int(len(latencies) * 0.99)] * 1e6
+
+
+def main() -> None:
+    print(f"{ORDERS} payments, consumer takes {PUBLISH_LATENCY * 1e3:.0f} ms per batch")
+
+    repo, order_ids = prepare()
+    elapsed, p50, p99 = pay_all(repo, order_ids)
+    print(f"{'no dispatcher':>32} {ORDERS / elapsed:>8.0f} payments/s   p50 {p50:>6.1f} us   p99 {p99:>6.1f} us")
+
+    for batch_size in (100, 1000):
+        repo, order_ids = prepare()
+        published = []
+
+        def publish(events):
+            time.sleep(PUBLISH_LATENCY)
+            published.extend(events)
+
+        dispatcher = OutboxDispatcher(repo, publish, batch_size=batch_size, poll_interval=0.01)
+        elapsed, p50, p99 = pay_all(repo, order_ids)
+        drain_started = time.perf_counter()
+        while repo.fetch_pending(limit=1):
+            time.sleep(0.001)
+        lag = time.perf_counter() - drain_started
+        dispatcher.close()
+        label = f"dispatcher, batch {batch_size}"
+        print(f"{label:>32} {ORDERS / elapsed:>8.0f} payments/s   p50 {p50:>6.1f} us   p99 {p99:>6.1f} us   "
+              f"{len(published)} events, backlog drained {lag * 1e3:.0f} ms after the last payment")
+
+
+if __name__ == "__main__":
+    main()
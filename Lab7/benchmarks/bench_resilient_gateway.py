@@ -0,0 +1,56 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+from domain.value_objects import Money
+from infrastructure.payment_gateways import BimodalLatency, FakePaymentGateway, FixedLatency
+from infrastructure.resilient_gateway import CircuitBreaker, ResilientPaymentGateway
+
+
+CALLS = 1_000
+CALLERS = 32
+
+
+def degraded(slow_share):
+    latency = BimodalLatency(FixedLatency(0.005), FixedLatency(0.5), slow_share)
+    return FakePaymentGateway(latency=latency, success_rate=1.0, seed=42, record_calls=False)
+
+
+def outage():
+    return FakePaymentGateway(latency=FixedLatency(2.0), success_rate=1.0, seed=42, record_calls=False)
+
+
+def run(gateway, label):
+    amount = Money(Decimal('10'))
+
+    def timed_charge(_):
+        started = time.perf_counter()
+        try:
+            gateway.charge(uuid4(), amount)
+        except Exception:
+            pass
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        latencies = sorted(pool.map(timed_charge, range(CALLS)))
+    p50 = statistics.median(latencies) * 1e3
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e3
+    print(f"{label:>40}   p50 {p50:>7.1f} ms   p99 {p99:>7.1f} ms   max {latencies[-1] * 1e3:>7.1f} ms")
+
+
+def main() -> None:
+    print(f"{CALLS} charges from {CALLERS} threads")
+    print("5% of calls take 500 ms instead of 5 ms:")
+    run(degraded(0.05), "no wrapper")
+    run(ResilientPaymentGateway(degraded(0.05), hedge_after=0.02), "hedged after 20 ms")
+
+    print("gateway outage, every call takes 2 s:")
+    run(outage(), "no wrapper")
+    breaker = CircuitBreaker(slow_call_duration=0.05, open_duration=60)
+    run(ResilientPaymentGateway(outage(), breaker, max_retries=0, timeout=0.1),
+        "timeout 100 ms + circuit breaker")
+
+
+if __name__ == "__main__":
+    main()
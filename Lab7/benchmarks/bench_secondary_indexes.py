@@ -0,0 +1,67 @@
+import random
+import sys
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money, OrderStatus
+from infrastructure.repositories import InMemoryOrderRepository
+
+
+ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+CUSTOMERS = ORDERS // 10
+QUERIES = 200
+
+
+def populate(repo: InMemoryOrderRepository):
+    rng = random.Random(1)
+    customers = [uuid4() for _ in range(CUSTOMERS)]
+    price = Money(Decimal('10'))
+    for index in range(ORDERS):
+        order = Order(uuid4(), rng.choice(customers))
+        order.add_line(uuid4(), "Product", 1, price)
+        if index % 100:
+            order.pay()
+        repo.save(order)
+    return customers
+
+
+def scan_customer(repo: InMemoryOrderRepository, customer_id):
+    return [order for order in repo._orders.values() if order.customer_id == customer_id]
+
+
+def all_pending(repo: InMemoryOrderRepository):
+    orders, cursor = [], None
+    while True:
+        page = repo.find_by_status(OrderStatus.PENDING, limit=1000, cursor=cursor)
+        orders.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return orders
+
+
+def timed(label: str, func, queries: int) -> None:
+    started = time.perf_counter()
+    for _ in range(queries):
+        func()
+    elapsed = (time.perf_counter() - started) / queries
+    print(f"{label:>40} {elapsed * 1e3:>10.3f} ms/query")
+
+
+def main() -> None:
+    repo = InMemoryOrderRepository()
+    started = time.perf_counter()
+    customers = populate(repo)
+    print(f"saved {ORDERS} orders in {time.perf_counter() - started:.1f} s")
+    rng = random.Random(2)
+
+    timed("find_by_customer (index)", lambda: repo.find_by_customer(rng.choice(customers)), QUERIES)
+    timed("orders of customer (full scan)", lambda: scan_customer(repo, rng.choice(customers)), 5)
+    timed("find_by_status pending, 100 (index)", lambda: repo.find_by_status(OrderStatus.PENDING), QUERIES)
+    timed("all pending orders (index pages)", lambda: all_pending(repo), 5)
+    timed("all pending orders (full scan)",
+          lambda: [o for o in repo._orders.values() if o.status == OrderStatus.PENDING], 5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from infrastructure.repositories import ShardedOrderRepository
+
+
+ORDERS = 10_000
+OPERATIONS_PER_THREAD = 20_000
+BATCH = 100
+
+
+def populate(repo: ShardedOrderRepository):
+    orders = []
+    for _ in range(ORDERS):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+        orders.append(order)
+    repo.save_many(orders)
+    return [order.id for order in orders]
+
+
+def single_operations(repo, order_ids, seed):
+    rng = random.Random(seed)
+    for _ in range(OPERATIONS_PER_THREAD):
+        order = repo.get_by_id(rng.choice(order_ids))
+        repo.save(order)
+
+
+def batched_operations(repo, order_ids, seed):
+    rng = random.Random(seed)
+    for _ in range(OPERATIONS_PER_THREAD // BATCH):
+        ids = rng.sample(order_ids, BATCH)
+        repo.save_many(repo.get_many(ids))
+
+
+def run(label, shards, threads, workload) -> None:
+    repo = ShardedOrderRepository(shards)
+    order_ids = populate(repo)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda seed: workload(repo, order_ids, seed), range(threads)))
+    elapsed = time.perf_counter() - started
+    operations = threads * OPERATIONS_PER_THREAD
+    print(f"{label:>22} {shards:>7} {threads:>8} {operations / elapsed:>12.0f}")
+
+
+def main() -> None:
+    print(f"{'workload':>22} {'shards':>7} {'threads':>8} {'get+save/s':>12}")
+    for threads in (1, 4, 16):
+        run("single, global lock", 1, threads, single_operations)
+        run("single, sharded", 16, threads, single_operations)
+        run("batched, global lock", 1, threads, batched_operations)
+        run("batched, sharded", 16, threads, batched_operations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from infrastructure.sqlite_repository import SqliteOrderRepository
+
+
+SAVES = 20_000
+LOOKUPS = 20_000
+DATABASE_ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def make_order() -> Order:
+    order = Order(uuid4(), uuid4())
+    order.add_line(uuid4(), "Product", 2, Money(Decimal('9.99')))
+    order.add_line(uuid4(), "Other product", 1, Money(Decimal('25')))
+    return order
+
+
+def saves_per_second(directory: str, write_behind: bool) -> float:
+    orders = [make_order() for _ in range(SAVES)]
+    path = os.path.join(directory, f"saves-{write_behind}.db")
+    with SqliteOrderRepository(path, write_behind=write_behind) as repo:
+        started = time.perf_counter()
+        for order in orders:
+            repo.save(order)
+        repo.flush()
+        return SAVES / (time.perf_counter() - started)
+
+
+def lookup_latency(directory: str) -> None:
+    path = os.path.join(directory, "lookups.db")
+    order_ids = []
+    with SqliteOrderRepository(path) as repo:
+        for start in range(0, DATABASE_ORDERS, 10_000):
+            orders = [make_order() for _ in range(min(10_000, DATABASE_ORDERS - start))]
+            repo.save_many(orders)
+            order_ids.extend(order.id for order in orders)
+
+    with SqliteOrderRepository(path) as repo:
+        sample = random.Random(1).sample(order_ids, LOOKUPS)
+        timings = []
+        for order_id in sample:
+            started = time.perf_counter()
+            repo.get_by_id(order_id)
+            timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    print(f"get_by_id on {DATABASE_ORDERS} orders: "
+          f"p50 {timings[len(timings) // 2] * 1e6:.1f} us, p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"save(): write-behind off {saves_per_second(directory, False):.0f}/s, "
+              f"on {saves_per_second(directory, True):.0f}/s")
+        lookup_latency(directory)
+
+
+if __name__ == "__main__":
+    main()
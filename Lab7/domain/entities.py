@@ -1,18 +1,24 @@
-from dataclasses import dataclass, field
+from bisect import bisect_left
+from copy import copy
+from dataclasses import dataclass, field, replace
 from decimal import Decimal
-from typing import List
+from typing import Dict, Iterable, List, Optional
 from uuid import UUID, uuid4
 from .value_objects import Money, OrderStatus
+from .events import (
+    DomainEvent, OrderLineAdded, OrderLineQuantityChanged, OrderLineRemoved, OrderLinesMerged, OrderPaid,
+    OrderPaymentReverted, OrderPaymentStarted,
+)
 from .exceptions import DomainException
 
 
-@dataclass
+@dataclass(frozen=True)
 class OrderLine:
     product_id: UUID
     product_name: str
     quantity: int
     unit_price: Money
-    
+
     @property
     def total_price(self) -> Money:
         return Money(self.unit_price.amount * Decimal(self.quantity))
@@ -25,43 +31,242 @@ class Order:
     lines: List[OrderLine] = field(default_factory=list)
     status: str = OrderStatus.PENDING
     _version: int = field(default=0, init=False)
-    
+    # Version of the stored copy this instance was loaded from or last saved
+    # as; None for an order that was never saved. Used by repositories for
+    # optimistic concurrency checks.
+    _persisted_version: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    # Running totals and the product index are maintained by the methods
+    # below, so lines must not be mutated directly.
+    _total: Decimal = field(default=Decimal('0'), init=False, repr=False, compare=False)
+    _subtotals: Dict[str, Decimal] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _line_counts: Dict[str, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _exponents: Dict[int, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _line_index: Dict[UUID, List[int]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Events raised since the last save. Every repository clears them on
+    # save; those with an outbox store them together with the order first.
+    _events: List[DomainEvent] = field(default_factory=list, init=False, repr=False, compare=False)
+
     def __post_init__(self):
         self._validate_invariants()
-    
+
     def add_line(self, product_id: UUID, product_name: str, quantity: int, unit_price: Money) -> None:
         if self.status == OrderStatus.PAID:
             raise DomainException("Cannot modify order after payment")
-        
-        self.lines.append(OrderLine(product_id, product_name, quantity, unit_price))
-        self._validate_invariants()
-    
+
+        line = OrderLine(product_id, product_name, quantity, unit_price)
+        line_total = line.total_price
+        self.lines.append(line)
+        stored = self.lines[-1]
+        if stored is not line:
+            # Columnar stores hand back a normalised copy; account for what
+            # will later be read back on removal.
+            line, line_total = stored, stored.total_price
+        self._line_index.setdefault(product_id, []).append(len(self.lines) - 1)
+        self._add_to_totals(line, line_total.amount)
+        self._version += 1
+        self._events.append(OrderLineAdded(self.id, self._version, line))
+
     def remove_line(self, product_id: UUID) -> None:
         if self.status == OrderStatus.PAID:
             raise DomainException("Cannot modify order after payment")
-        
-        self.lines = [line for line in self.lines if line.product_id != product_id]
-        self._validate_invariants()
-    
+
+        positions = self._line_index.get(product_id)
+        if not positions:
+            return
+
+        self._remove_at(positions)
+        self._version += 1
+        self._events.append(OrderLineRemoved(self.id, self._version, product_id))
+
+    def get_line(self, product_id: UUID) -> Optional[OrderLine]:
+        positions = self._line_index.get(product_id)
+        if not positions:
+            return None
+        return self.lines[positions[0]]
+
+    def update_quantity(self, product_id: UUID, quantity: int) -> None:
+        if self.status == OrderStatus.PAID:
+            raise DomainException("Cannot modify order after payment")
+
+        if quantity <= 0:
+            raise DomainException("Quantity must be positive")
+
+        positions = self._line_index.get(product_id)
+        if not positions:
+            raise DomainException(f"Product {product_id} is not in the order")
+
+        first = positions[0]
+        self._replace_at(first, replace(self.lines[first], quantity=quantity))
+        self._remove_at(positions[1:])
+        self._version += 1
+        self._events.append(OrderLineQuantityChanged(self.id, self._version, product_id, quantity))
+
+    def merge_duplicate_lines(self) -> None:
+        if self.status == OrderStatus.PAID:
+            raise DomainException("Cannot modify order after payment")
+
+        duplicated = [product_id for product_id, positions in self._line_index.items() if len(positions) > 1]
+        lines_before = len(self.lines)
+        for product_id in duplicated:
+            positions = sorted(self._line_index[product_id])
+            quantities: Dict[Money, int] = {}
+            first_lines: Dict[Money, OrderLine] = {}
+            for position in positions:
+                line = self.lines[position]
+                quantities[line.unit_price] = quantities.get(line.unit_price, 0) + line.quantity
+                first_lines.setdefault(line.unit_price, line)
+
+            # Lines with a different unit price stay separate; merged lines
+            # take the lowest positions and the rest are removed.
+            for position, (price, line) in zip(positions, first_lines.items()):
+                self._replace_at(position, replace(line, quantity=quantities[price]))
+            self._remove_at(positions[len(first_lines):])
+
+        if len(self.lines) != lines_before:
+            self._version += 1
+            self._events.append(OrderLinesMerged(self.id, self._version))
+
     def pay(self) -> None:
         if self.status == OrderStatus.PAID:
             raise DomainException("Order is already paid")
-        
+
         if not self.lines:
             raise DomainException("Cannot pay empty order")
-        
+
         self.status = OrderStatus.PAID
         self._version += 1
-    
+        self._events.append(OrderPaymentStarted(self.id, self._version))
+
+    def confirm_payment(self) -> None:
+        # pay() reserves the order before the charge; this records that the
+        # money was actually taken.
+        if self.status != OrderStatus.PAID:
+            raise DomainException("Order is not paid")
+
+        self._version += 1
+        self._events.append(OrderPaid(self.id, self._version, self.total_amount))
+
+    def revert_payment(self) -> None:
+        if self.status != OrderStatus.PAID:
+            raise DomainException("Order is not paid")
+
+        self.status = OrderStatus.PENDING
+        self._version += 1
+        self._events.append(OrderPaymentReverted(self.id, self._version))
+
     @property
     def total_amount(self) -> Money:
-        if not self.lines:
+        if not self._exponents:
             return Money(Decimal('0'))
-        
-        total = self.lines[0].total_price
-        for line in self.lines[1:]:
-            total = total + line.total_price
-        return total
-    
+
+        # Keep the exponent a left-to-right fold over the lines would produce.
+        exponent = min(self._exponents)
+        total = self._total
+        if total.as_tuple().exponent != exponent:
+            total = total.quantize(Decimal((0, (1,), exponent)))
+        return Money(total)
+
+    @staticmethod
+    def total_amount_many(orders: Iterable['Order']) -> Money:
+        return Money.sum([order.total_amount for order in orders])
+
+    def apply(self, event: DomainEvent) -> None:
+        # Replays a recorded change through the method that made it, so the
+        # rebuilt order matches the original, line positions included.
+        if event.order_id != self.id or event.version != self._version + 1:
+            raise DomainException(f"Event {event.version} does not follow version {self._version} of order {self.id}")
+        _REPLAY[type(event)](self, event)
+        del self._events[-1]
+
+    @property
+    def events(self) -> List[DomainEvent]:
+        return list(self._events)
+
+    def clear_events(self) -> None:
+        self._events.clear()
+
+    @property
+    def subtotals(self) -> Dict[str, Money]:
+        return {currency: Money(amount, currency) for currency, amount in self._subtotals.items()}
+
+    def _add_to_totals(self, line: OrderLine, amount: Decimal) -> None:
+        self._total += amount
+        currency = line.unit_price.currency
+        self._subtotals[currency] = self._subtotals.get(currency, Decimal('0')) + amount
+        self._line_counts[currency] = self._line_counts.get(currency, 0) + 1
+        exponent = amount.as_tuple().exponent
+        self._exponents[exponent] = self._exponents.get(exponent, 0) + 1
+
+    def _subtract_from_totals(self, line: OrderLine, amount: Decimal) -> None:
+        self._total -= amount
+        currency = line.unit_price.currency
+        self._subtotals[currency] -= amount
+        self._line_counts[currency] -= 1
+        if not self._line_counts[currency]:
+            del self._line_counts[currency]
+            del self._subtotals[currency]
+        exponent = amount.as_tuple().exponent
+        self._exponents[exponent] -= 1
+        if not self._exponents[exponent]:
+            del self._exponents[exponent]
+
+    def __deepcopy__(self, memo: dict) -> 'Order':
+        # Lines and money are immutable, so only the containers need copying.
+        clone = copy(self)
+        clone.lines = self.lines.copy()
+        clone._subtotals = dict(self._subtotals)
+        clone._line_counts = dict(self._line_counts)
+        clone._exponents = dict(self._exponents)
+        clone._line_index = {product_id: list(positions) for product_id, positions in self._line_index.items()}
+        clone._events = self._events.copy()
+        return clone
+
+    def _replace_at(self, position: int, line: OrderLine) -> None:
+        line_total = line.total_price
+        old_line = self.lines[position]
+        self.lines[position] = line
+        stored = self.lines[position]
+        if stored is not line:
+            line, line_total = stored, stored.total_price
+        self._subtract_from_totals(old_line, old_line.total_price.amount)
+        self._add_to_totals(line, line_total.amount)
+
+    def _remove_at(self, positions: List[int]) -> None:
+        # Deleting keeps the remaining lines in order; every later index
+        # entry moves up by the number of removed lines before it.
+        removed = sorted(positions)
+        for position in reversed(removed):
+            line = self.lines[position]
+            self._subtract_from_totals(line, line.total_price.amount)
+            del self.lines[position]
+
+        gone = set(removed)
+        for product_id in list(self._line_index):
+            kept = [position - bisect_left(removed, position)
+                    for position in self._line_index[product_id] if position not in gone]
+            if kept:
+                self._line_index[product_id] = kept
+            else:
+                del self._line_index[product_id]
+
     def _validate_invariants(self):
-        calculated_total = self.total_amount
+        self._total = Decimal('0')
+        self._subtotals = {}
+        self._line_counts = {}
+        self._exponents = {}
+        self._line_index = {}
+        for position, line in enumerate(self.lines):
+            self._line_index.setdefault(line.product_id, []).append(position)
+            self._add_to_totals(line, line.total_price.amount)
+
+
+_REPLAY = {
+    OrderLineAdded: lambda order, event: order.add_line(
+        event.line.product_id, event.line.product_name, event.line.quantity, event.line.unit_price),
+    OrderLineRemoved: lambda order, event: order.remove_line(event.product_id),
+    OrderLineQuantityChanged: lambda order, event: order.update_quantity(event.product_id, event.quantity),
+    OrderLinesMerged: lambda order, event: order.merge_duplicate_lines(),
+    OrderPaymentStarted: lambda order, event: order.pay(),
+    OrderPaid: lambda order, event: order.confirm_payment(),
+    OrderPaymentReverted: lambda order, event: order.revert_payment(),
+}
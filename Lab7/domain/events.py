@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from uuid import UUID
+from .value_objects import Money
+
+if TYPE_CHECKING:
+    from .entities import OrderLine
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    order_id: UUID
+    # Order._version right after the change: orders the events of one order
+    # and lets consumers drop redelivered duplicates.
+    version: int
+
+
+@dataclass(frozen=True)
+class OrderLineAdded(DomainEvent):
+    line: 'OrderLine'
+
+
+@dataclass(frozen=True)
+class OrderPaid(DomainEvent):
+    amount: Money
+
+
+@dataclass(frozen=True)
+class OrderLineRemoved(DomainEvent):
+    product_id: UUID
+
+
+@dataclass(frozen=True)
+class OrderLineQuantityChanged(DomainEvent):
+    product_id: UUID
+    quantity: int
+
+
+@dataclass(frozen=True)
+class OrderLinesMerged(DomainEvent):
+    pass
+
+
+@dataclass(frozen=True)
+class OrderPaymentStarted(DomainEvent):
+    pass
+
+
+@dataclass(frozen=True)
+class OrderPaymentReverted(DomainEvent):
+    pass
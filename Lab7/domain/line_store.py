@@ -0,0 +1,169 @@
+from array import array
+from decimal import Decimal
+from operator import mul
+from typing import Any, Dict, Iterable, Iterator, List
+from uuid import UUID
+from .entities import OrderLine
+from .value_objects import DEFAULT_MINOR_UNITS, MINOR_UNITS, CompactMoney, Money, sum_minor_units
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_INT64_MAX = 2 ** 63 - 1
+_PRODUCT_ID_SIZE = 16
+
+
+class ColumnarLineStore:
+    # Opt-in replacement for Order.lines: parallel arrays instead of one
+    # OrderLine object per line. Lines are materialised on access, so the
+    # returned OrderLine is a read-only snapshot; change lines through Order.
+
+    def __init__(self, lines: Iterable[OrderLine] = ()):
+        self._product_ids = bytearray()
+        self._quantities = array('q')
+        self._prices = array('q')
+        self._name_ids = array('I')
+        self._currency_ids = array('B')
+        self._names: List[str] = []
+        self._name_positions: Dict[str, int] = {}
+        self._currencies: List[str] = []
+        self._currency_positions: Dict[str, int] = {}
+        for line in lines:
+            self.append(line)
+
+    def append(self, line: OrderLine) -> None:
+        price = CompactMoney.from_money(line.unit_price)
+        name_id = self._intern_name(line.product_name)
+        currency_id = self._intern_currency(price.currency)
+        self._quantities.append(line.quantity)
+        self._prices.append(price.minor)
+        self._name_ids.append(name_id)
+        self._currency_ids.append(currency_id)
+        self._product_ids += line.product_id.bytes
+
+    def copy(self) -> 'ColumnarLineStore':
+        clone = ColumnarLineStore()
+        clone._product_ids = bytearray(self._product_ids)
+        clone._quantities = array('q', self._quantities)
+        clone._prices = array('q', self._prices)
+        clone._name_ids = array('I', self._name_ids)
+        clone._currency_ids = array('B', self._currency_ids)
+        clone._names = list(self._names)
+        clone._name_positions = dict(self._name_positions)
+        clone._currencies = list(self._currencies)
+        clone._currency_positions = dict(self._currency_positions)
+        return clone
+
+    def pop(self) -> OrderLine:
+        if not self._quantities:
+            raise IndexError("pop from empty line store")
+
+        line = self[-1]
+        self._quantities.pop()
+        self._prices.pop()
+        self._name_ids.pop()
+        self._currency_ids.pop()
+        del self._product_ids[-_PRODUCT_ID_SIZE:]
+        return line
+
+    def __getitem__(self, index: int) -> OrderLine:
+        index = self._position(index)
+        start = index * _PRODUCT_ID_SIZE
+        currency = self._currencies[self._currency_ids[index]]
+        return OrderLine(
+            UUID(bytes=bytes(self._product_ids[start:start + _PRODUCT_ID_SIZE])),
+            self._names[self._name_ids[index]],
+            self._quantities[index],
+            Money(_to_decimal(self._prices[index], currency), currency),
+        )
+
+    def __setitem__(self, index: int, line: OrderLine) -> None:
+        index = self._position(index)
+        price = CompactMoney.from_money(line.unit_price)
+        self._quantities[index] = line.quantity
+        self._prices[index] = price.minor
+        self._name_ids[index] = self._intern_name(line.product_name)
+        self._currency_ids[index] = self._intern_currency(price.currency)
+        start = index * _PRODUCT_ID_SIZE
+        self._product_ids[start:start + _PRODUCT_ID_SIZE] = line.product_id.bytes
+
+    def __delitem__(self, index: int) -> None:
+        index = self._position(index)
+        del self._quantities[index]
+        del self._prices[index]
+        del self._name_ids[index]
+        del self._currency_ids[index]
+        start = index * _PRODUCT_ID_SIZE
+        del self._product_ids[start:start + _PRODUCT_ID_SIZE]
+
+    def __len__(self) -> int:
+        return len(self._quantities)
+
+    def __iter__(self) -> Iterator[OrderLine]:
+        for index in range(len(self._quantities)):
+            yield self[index]
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (ColumnarLineStore, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"ColumnarLineStore({list(self)!r})"
+
+    def totals_by_currency(self) -> Dict[str, Money]:
+        totals = {}
+        for currency_id, currency in enumerate(self._currencies):
+            minor = self._total_minor_units(currency_id)
+            if minor is not None:
+                totals[currency] = Money(_to_decimal(minor, currency), currency)
+        return totals
+
+    def _total_minor_units(self, currency_id: int):
+        if np is not None and self._quantities:
+            quantities = np.frombuffer(self._quantities, dtype=np.int64)
+            prices = np.frombuffer(self._prices, dtype=np.int64)
+            mask = np.frombuffer(self._currency_ids, dtype=np.uint8) == currency_id
+            if not mask.any():
+                return None
+            quantities, prices = quantities[mask], prices[mask]
+            bound = int(np.abs(quantities).max()) * int(prices.max())
+            if bound <= _INT64_MAX // len(quantities):
+                return sum_minor_units(quantities * prices)
+            return sum(map(mul, quantities.tolist(), prices.tolist()))
+
+        selected = [
+            quantity * price
+            for quantity, price, line_currency in zip(self._quantities, self._prices, self._currency_ids)
+            if line_currency == currency_id
+        ]
+        return sum(selected) if selected else None
+
+    def _position(self, index: int) -> int:
+        size = len(self._quantities)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("line store index out of range")
+        return index
+
+    def _intern_name(self, name: str) -> int:
+        position = self._name_positions.get(name)
+        if position is None:
+            position = self._name_positions[name] = len(self._names)
+            self._names.append(name)
+        return position
+
+    def _intern_currency(self, currency: str) -> int:
+        position = self._currency_positions.get(currency)
+        if position is None:
+            position = self._currency_positions[currency] = len(self._currencies)
+            self._currencies.append(currency)
+        return position
+
+
+def _to_decimal(minor: int, currency: str) -> Decimal:
+    return Decimal(minor).scaleb(-MINOR_UNITS.get(currency, DEFAULT_MINOR_UNITS))
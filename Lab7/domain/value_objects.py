@@ -1,6 +1,26 @@
+import sys
+from array import array
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Any
+from itertools import islice
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Digits after the decimal point (ISO 4217 minor units); unlisted currencies use cents.
+MINOR_UNITS = {"USD": 2, "EUR": 2, "GBP": 2, "RUB": 2, "JPY": 0, "KWD": 3}
+DEFAULT_MINOR_UNITS = 2
+
+_INT64_MAX = 2 ** 63 - 1
+
+_amount_of = attrgetter("amount")
+_currency_of = attrgetter("currency")
+_minor_of = attrgetter("minor")
 
 
 @dataclass(frozen=True)
@@ -22,6 +42,145 @@ class Money:
             return False
         return self.amount == other.amount and self.currency == other.currency
 
+    @classmethod
+    def sum(cls, monies: Iterable['Money'], currency: Optional[str] = None) -> 'Money':
+        monies = _as_sequence(monies)
+        if not monies:
+            return cls(Decimal('0'), currency or "USD")
+
+        currency = _single_currency(monies, currency)
+        # Same fold as chaining __add__, but validated once and without
+        # allocating a Money per partial sum.
+        total = sum(map(_amount_of, islice(monies, 1, None)), monies[0].amount)
+        return cls(total, currency)
+
+    @classmethod
+    def sum_by_currency(cls, monies: Iterable['Money']) -> Dict[str, 'Money']:
+        groups: Dict[str, list] = {}
+        for money in monies:
+            groups.setdefault(money.currency, []).append(money.amount)
+        return {
+            currency: cls(sum(islice(amounts, 1, None), amounts[0]), currency)
+            for currency, amounts in groups.items()
+        }
+
+
+class CompactMoney:
+    __slots__ = ("minor", "currency")
+
+    minor: int
+    currency: str
+
+    def __init__(self, minor: int, currency: str = "USD"):
+        if minor < 0:
+            raise ValueError("Amount cannot be negative")
+        _set_minor(self, int(minor))
+        _set_currency(self, sys.intern(currency))
+
+    @classmethod
+    def from_decimal(cls, amount: Decimal, currency: str = "USD", rounding: Optional[str] = None) -> 'CompactMoney':
+        scaled = amount.scaleb(MINOR_UNITS.get(currency, DEFAULT_MINOR_UNITS))
+        if rounding is None:
+            minor = scaled.to_integral_value()
+            if minor != scaled:
+                raise ValueError(f"Amount {amount} has more precision than {currency} minor units")
+        else:
+            minor = scaled.to_integral_value(rounding=rounding)
+        return cls(int(minor), currency)
+
+    @classmethod
+    def from_money(cls, money: Money, rounding: Optional[str] = None) -> 'CompactMoney':
+        return cls.from_decimal(money.amount, money.currency, rounding)
+
+    @property
+    def amount(self) -> Decimal:
+        return Decimal(self.minor).scaleb(-MINOR_UNITS.get(self.currency, DEFAULT_MINOR_UNITS))
+
+    def to_money(self) -> Money:
+        return Money(self.amount, self.currency)
+
+    @classmethod
+    def sum(cls, monies: Iterable['CompactMoney'], currency: Optional[str] = None) -> 'CompactMoney':
+        monies = _as_sequence(monies)
+        if not monies:
+            return cls(0, currency or "USD")
+
+        currency = _single_currency(monies, currency)
+        return _new_compact_money(sum(map(_minor_of, monies)), sys.intern(currency))
+
+    @classmethod
+    def sum_minor_units(cls, values: Any, currency: str = "USD") -> 'CompactMoney':
+        return cls(sum_minor_units(values), currency)
+
+    def __add__(self, other: 'CompactMoney') -> 'CompactMoney':
+        if self.currency is not other.currency and self.currency != other.currency:
+            raise ValueError("Cannot add money with different currencies")
+        return _new_compact_money(self.minor + other.minor, self.currency)
+
+    def __mul__(self, quantity: int) -> 'CompactMoney':
+        if quantity < 0:
+            raise ValueError("Amount cannot be negative")
+        return _new_compact_money(self.minor * quantity, self.currency)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, CompactMoney):
+            return False
+        return self.minor == other.minor and self.currency == other.currency
+
+    def __hash__(self) -> int:
+        return hash((self.minor, self.currency))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CompactMoney is immutable")
+
+    def __reduce__(self):
+        return CompactMoney, (self.minor, self.currency)
+
+    def __repr__(self) -> str:
+        return f"CompactMoney(amount={self.amount}, currency={self.currency!r})"
+
+
+_set_minor = CompactMoney.minor.__set__
+_set_currency = CompactMoney.currency.__set__
+
+
+def _new_compact_money(minor: int, currency: str) -> CompactMoney:
+    # Results of add/mul on valid instances are valid, so skip __init__ checks.
+    money = object.__new__(CompactMoney)
+    _set_minor(money, minor)
+    _set_currency(money, currency)
+    return money
+
+
+def sum_minor_units(values: Any) -> int:
+    # NumPy only pays off when the values already live in a contiguous int64
+    # buffer (ndarray or array('q')); converting Python ints is slower than sum().
+    if np is not None:
+        if isinstance(values, array) and values.typecode == 'q':
+            values = np.frombuffer(values, dtype=np.int64)
+        if isinstance(values, np.ndarray) and values.dtype == np.int64:
+            if not len(values):
+                return 0
+            if int(values.min()) >= 0 and int(values.max()) <= _INT64_MAX // len(values):
+                return int(values.sum())
+            return sum(values.tolist())
+    return sum(values)
+
+
+def _as_sequence(values: Iterable[Any]) -> Sequence[Any]:
+    if isinstance(values, (list, tuple)):
+        return values
+    return list(values)
+
+
+def _single_currency(monies: Sequence[Any], currency: Optional[str]) -> str:
+    currencies = set(map(_currency_of, monies))
+    if currency is not None:
+        currencies.add(currency)
+    if len(currencies) > 1:
+        raise ValueError("Cannot add money with different currencies")
+    return currencies.pop()
+
 
 class OrderStatus:
     PENDING = "pending"
@@ -0,0 +1,32 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Iterable, List, Optional
+from uuid import UUID
+from domain.entities import Order
+from application.interfaces import AsyncOrderRepository, OrderRepository
+
+
+class AsyncOrderRepositoryAdapter(AsyncOrderRepository):
+    # Exposes a blocking repository to AsyncPayOrderUseCase. Without an
+    # executor calls run inline, which suits in-memory repositories; pass
+    # one for repositories that do I/O (SQLite, log-structured).
+    def __init__(self, inner: OrderRepository, executor: Optional[Executor] = None):
+        self.inner = inner
+        self.executor = executor
+
+    async def get_by_id(self, order_id: UUID) -> Order:
+        return await self._run(self.inner.get_by_id, order_id)
+
+    async def save(self, order: Order) -> None:
+        await self._run(self.inner.save, order)
+
+    async def get_many(self, order_ids: Iterable[UUID]) -> List[Order]:
+        return await self._run(self.inner.get_many, list(order_ids))
+
+    async def save_many(self, orders: Iterable[Order]) -> None:
+        await self._run(self.inner.save_many, list(orders))
+
+    async def _run(self, method, *args):
+        if self.executor is None:
+            return method(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, method, *args)
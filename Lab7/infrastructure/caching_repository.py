@@ -0,0 +1,98 @@
+import time
+from copy import deepcopy
+from typing import Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+from domain.entities import Order
+from application.interfaces import OrderPage, OrderRepository, Outbox, OutboxEntry
+from .lru_cache import LRUCache
+
+
+class CachingOrderRepository(OrderRepository, Outbox):
+    # Read-through, write-through cache in front of any OrderRepository.
+    # Cached orders are private copies, so callers can mutate what they get.
+
+    def __init__(self, inner: OrderRepository, maxsize: int = 10_000, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self._inner = inner
+        self._cache: LRUCache[Order] = LRUCache(maxsize, ttl, clock)
+
+    def get_by_id(self, order_id: UUID) -> Order:
+        cached = self._cache.get(order_id)
+        if cached is not None:
+            return deepcopy(cached)
+
+        order = self._inner.get_by_id(order_id)
+        self._remember(order)
+        return order
+
+    def get_many(self, order_ids: Iterable[UUID]) -> List[Order]:
+        order_ids = list(order_ids)
+        found: Dict[UUID, Order] = {}
+        missing = []
+        for order_id in order_ids:
+            cached = self._cache.get(order_id)
+            if cached is None:
+                missing.append(order_id)
+            else:
+                found[order_id] = deepcopy(cached)
+
+        if missing:
+            for order in self._inner.get_many(missing):
+                self._remember(order)
+                found[order.id] = order
+
+        orders = []
+        seen = set()
+        for order_id in order_ids:
+            order = found[order_id]
+            orders.append(deepcopy(order) if order_id in seen else order)
+            seen.add(order_id)
+        return orders
+
+    def save(self, order: Order) -> None:
+        try:
+            self._inner.save(order)
+        except Exception:
+            # The stored version may differ from what we cached (e.g. after a
+            # ConcurrencyConflict), so let the next read go to the store.
+            self._cache.pop(order.id)
+            raise
+        self._remember(order)
+
+    def save_many(self, orders: Iterable[Order]) -> None:
+        orders = list(orders)
+        try:
+            self._inner.save_many(orders)
+        except Exception:
+            for order in orders:
+                self._cache.pop(order.id)
+            raise
+        for order in orders:
+            self._remember(order)
+
+    def find_by_customer(self, customer_id: UUID, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        return self._inner.find_by_customer(customer_id, limit, cursor)
+
+    def find_by_status(self, status: str, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        return self._inner.find_by_status(status, limit, cursor)
+
+    def fetch_pending(self, limit: int = 100) -> List[OutboxEntry]:
+        return self._outbox().fetch_pending(limit)
+
+    def acknowledge(self, entry_ids: Iterable[int]) -> None:
+        self._outbox().acknowledge(entry_ids)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    def _outbox(self) -> Outbox:
+        if not isinstance(self._inner, Outbox):
+            raise NotImplementedError(f"{type(self._inner).__name__} has no outbox")
+        return self._inner
+
+    def _remember(self, order: Order) -> None:
+        # A slow read must not replace a newer version cached by a save.
+        version = order._version
+        cached = deepcopy(order)
+        cached.clear_events()
+        self._cache.put(order.id, cached, keep_existing=lambda cached: cached._version > version)
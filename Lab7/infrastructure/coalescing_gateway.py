@@ -0,0 +1,115 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+from domain.value_objects import Money
+from application.interfaces import PaymentGateway
+
+
+class CoalescingPaymentGateway(PaymentGateway):
+    # Concurrent charge() calls are queued and sent to inner.charge_many in
+    # batches of up to max_batch_size, waiting at most max_delay seconds
+    # after the first queued charge. While max_concurrent_batches batches are
+    # in flight the queue keeps growing, so batches get larger under load.
+
+    def __init__(self, inner: PaymentGateway, max_batch_size: int = 100, max_delay: float = 0.005,
+                 max_concurrent_batches: int = 4):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+        self._inner = inner
+        self._max_batch_size = max_batch_size
+        self._max_delay = max_delay
+        self._max_concurrent_batches = max_concurrent_batches
+        self._queue: List[_PendingCharge] = []
+        self._batches_in_flight = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._senders = ThreadPoolExecutor(max_concurrent_batches, thread_name_prefix="payment-batch")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="payment-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def charge(self, order_id: UUID, amount: Money) -> bool:
+        pending = _PendingCharge(order_id, amount)
+        with self._wakeup:
+            if self._closed:
+                raise RuntimeError("Payment gateway is closed")
+            self._queue.append(pending)
+            if len(self._queue) == 1 or len(self._queue) >= self._max_batch_size:
+                self._wakeup.notify()
+
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def charge_many(self, charges: Iterable[Tuple[UUID, Money]]) -> List[bool]:
+        return self._inner.charge_many(charges)
+
+    def close(self) -> None:
+        # Charges already queued are still sent.
+        with self._wakeup:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        self._dispatcher.join()
+        self._senders.shutdown(wait=True)
+
+    def __enter__(self) -> 'CoalescingPaymentGateway':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _dispatch_loop(self) -> None:
+        with self._wakeup:
+            while True:
+                while not self._queue and not self._closed:
+                    self._wakeup.wait()
+                if not self._queue:
+                    return
+
+                deadline = self._queue[0].queued_at + self._max_delay
+                while len(self._queue) < self._max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                while self._batches_in_flight >= self._max_concurrent_batches:
+                    self._wakeup.wait()
+
+                batch = self._queue[:self._max_batch_size]
+                del self._queue[:self._max_batch_size]
+                self._batches_in_flight += 1
+                self._senders.submit(self._send, batch)
+
+    def _send(self, batch: List['_PendingCharge']) -> None:
+        try:
+            results = self._inner.charge_many([(pending.order_id, pending.amount) for pending in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"charge_many returned {len(results)} results for {len(batch)} charges")
+            for pending, result in zip(batch, results):
+                pending.result = bool(result)
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
+            with self._wakeup:
+                self._batches_in_flight -= 1
+                self._wakeup.notify()
+
+
+class _PendingCharge:
+    __slots__ = ("order_id", "amount", "queued_at", "done", "result", "error")
+
+    def __init__(self, order_id: UUID, amount: Money):
+        self.order_id = order_id
+        self.amount = amount
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = False
+        self.error: Optional[Exception] = None
@@ -0,0 +1,61 @@
+import json
+from decimal import Decimal
+from uuid import UUID
+from domain.entities import OrderLine
+from domain.events import (
+    DomainEvent, OrderLineAdded, OrderLineQuantityChanged, OrderLineRemoved, OrderLinesMerged, OrderPaid,
+    OrderPaymentReverted, OrderPaymentStarted,
+)
+from domain.value_objects import Money
+
+
+_EVENT_TYPES = {event_type.__name__: event_type for event_type in (
+    OrderLineAdded, OrderLineRemoved, OrderLineQuantityChanged, OrderLinesMerged, OrderPaymentStarted, OrderPaid,
+    OrderPaymentReverted,
+)}
+
+
+def encode_event(event: DomainEvent) -> str:
+    event_type = type(event).__name__
+    if event_type not in _EVENT_TYPES:
+        raise ValueError(f"Unknown event type {event_type}")
+    payload = {"type": event_type, "order_id": str(event.order_id), "version": event.version}
+    if isinstance(event, OrderLineAdded):
+        line = event.line
+        payload.update(product_id=str(line.product_id), product_name=line.product_name, quantity=line.quantity,
+                       **_encode_money("unit_price", line.unit_price))
+    elif isinstance(event, OrderPaid):
+        payload.update(_encode_money("amount", event.amount))
+    elif isinstance(event, (OrderLineRemoved, OrderLineQuantityChanged)):
+        payload["product_id"] = str(event.product_id)
+        if isinstance(event, OrderLineQuantityChanged):
+            payload["quantity"] = event.quantity
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def decode_event(data: str) -> DomainEvent:
+    payload = json.loads(data)
+    event_type = _EVENT_TYPES.get(payload["type"])
+    if event_type is None:
+        raise ValueError(f"Unknown event type {payload['type']}")
+    order_id, version = UUID(payload["order_id"]), payload["version"]
+    if event_type is OrderLineAdded:
+        line = OrderLine(UUID(payload["product_id"]), payload["product_name"], payload["quantity"],
+                         _decode_money("unit_price", payload))
+        return OrderLineAdded(order_id, version, line)
+    if event_type is OrderPaid:
+        return OrderPaid(order_id, version, _decode_money("amount", payload))
+    if event_type is OrderLineRemoved:
+        return OrderLineRemoved(order_id, version, UUID(payload["product_id"]))
+    if event_type is OrderLineQuantityChanged:
+        return OrderLineQuantityChanged(order_id, version, UUID(payload["product_id"]), payload["quantity"])
+    return event_type(order_id, version)
+
+
+def _encode_money(name: str, money: Money) -> dict:
+    # Amounts as strings, so Decimal values round-trip exactly.
+    return {name: str(money.amount), name + "_currency": money.currency}
+
+
+def _decode_money(name: str, payload: dict) -> Money:
+    return Money(Decimal(payload[name]), payload[name + "_currency"])
@@ -0,0 +1,77 @@
+import threading
+from copy import deepcopy
+from typing import Dict, List, Optional
+from uuid import UUID
+from domain.entities import Order
+from domain.events import DomainEvent
+from application.exceptions import ConcurrencyConflict
+from application.interfaces import OrderRepository
+
+
+class EventSourcedOrderRepository(OrderRepository):
+    # Every change of an order is kept as an append-only stream of its
+    # events; Order._version is the position in the stream. An order is
+    # loaded from its latest snapshot plus the events recorded after it, and
+    # a new snapshot is taken once snapshot_interval events have piled up,
+    # so a load never replays more than that. With snapshot_interval=None
+    # only the first save is snapshotted and loads replay the whole history.
+
+    def __init__(self, snapshot_interval: Optional[int] = 100):
+        if snapshot_interval is not None and snapshot_interval < 1:
+            raise ValueError("snapshot_interval must be positive")
+        self._snapshot_interval = snapshot_interval
+        self._streams: Dict[UUID, List[DomainEvent]] = {}
+        self._snapshots: Dict[UUID, Order] = {}
+        self._versions: Dict[UUID, int] = {}
+        self._locks: Dict[UUID, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def get_by_id(self, order_id: UUID) -> Order:
+        with self._lock_for(order_id):
+            snapshot = self._snapshots.get(order_id)
+            if snapshot is None:
+                raise ValueError(f"Order {order_id} not found")
+            behind = self._versions[order_id] - snapshot._version
+            events = self._streams[order_id][-behind:] if behind else []
+            order = deepcopy(snapshot)
+
+        for event in events:
+            order.apply(event)
+        order._persisted_version = order._version
+        return order
+
+    def save(self, order: Order) -> None:
+        events = order._events
+        with self._lock_for(order.id):
+            stored_version = self._versions.get(order.id)
+            if stored_version != order._persisted_version:
+                raise ConcurrencyConflict(f"Order {order.id} was modified concurrently")
+            if stored_version is not None and stored_version + len(events) != order._version:
+                raise ValueError(f"Order {order.id} has changes that were not recorded as events")
+
+            self._streams.setdefault(order.id, []).extend(events)
+            self._versions[order.id] = order._version
+            snapshot = self._snapshots.get(order.id)
+            if snapshot is None or (self._snapshot_interval is not None
+                                    and order._version - snapshot._version >= self._snapshot_interval):
+                # Changes made before the first save that were not recorded
+                # as events (lines passed to the constructor) are only in
+                # this first snapshot.
+                snapshot = deepcopy(order)
+                snapshot.clear_events()
+                self._snapshots[order.id] = snapshot
+        order._persisted_version = order._version
+        order.clear_events()
+
+    def history(self, order_id: UUID) -> List[DomainEvent]:
+        with self._lock_for(order_id):
+            if order_id not in self._versions:
+                raise ValueError(f"Order {order_id} not found")
+            return list(self._streams[order_id])
+
+    def _lock_for(self, order_id: UUID) -> threading.Lock:
+        lock = self._locks.get(order_id)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(order_id, threading.Lock())
+        return lock
@@ -0,0 +1,25 @@
+import time
+from typing import Any, Callable, Optional
+from application.interfaces import IdempotencyStore
+from .lru_cache import LRUCache
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    # Bounded: the least recently used keys are evicted first and every key
+    # expires ttl seconds after it was stored.
+
+    def __init__(self, maxsize: int = 100_000, ttl: Optional[float] = 24 * 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        self._results: LRUCache[Any] = LRUCache(maxsize, ttl, clock)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._results.get(key)
+
+    def put(self, key: str, result: Any) -> None:
+        self._results.put(key, result)
+
+    def stats(self) -> dict:
+        return self._results.stats()
+
+    def __len__(self) -> int:
+        return len(self._results)
@@ -0,0 +1,376 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+from domain.entities import Order
+from application.exceptions import ConcurrencyConflict
+from application.interfaces import OrderRepository
+from .order_codec import decode_order, encode_order
+
+
+# Record: payload size and CRC32, then an encode_order() payload, which
+# starts with the order id and version.
+_RECORD_HEADER = struct.Struct("<II")
+_PAYLOAD_PREFIX = struct.Struct("<16s16sq")
+
+# Index file: header, then an open-addressing table of slots. A slot holds
+# the order id, the segment and offset of its latest record, the record size
+# (0 marks an empty slot) and the order version.
+_INDEX_HEADER = struct.Struct("<4sIQQIQ")
+_INDEX_HEADER_SIZE = 64
+_INDEX_MAGIC = b"OLIX"
+_SLOT = struct.Struct("<16sIIQQ")
+_MAX_LOAD = 0.7
+
+_INDEX_FILE = "index.bin"
+_CHECKPOINT_FILE = "index.checkpoint"
+
+
+class LogStructuredOrderRepository(OrderRepository):
+    # Every save appends a record to the active segment; a memory-mapped hash
+    # index points at the latest record of each order. On open the index is
+    # reused after a clean close, otherwise restored from the last checkpoint
+    # (or rebuilt) and brought up to date by replaying the log.
+
+    def __init__(self, directory: str, segment_size: int = 64 * 2 ** 20, durable: bool = False,
+                 compaction_interval: Optional[float] = None, garbage_ratio: float = 0.5):
+        self._directory = directory
+        self._segment_size = segment_size
+        self._durable = durable
+        self._garbage_ratio = garbage_ratio
+        self._lock = threading.RLock()
+        self._readers: Dict[int, int] = {}
+        self._live_bytes: Dict[int, int] = {}
+        os.makedirs(directory, exist_ok=True)
+
+        self._index = _HashIndex.open(self._path(_INDEX_FILE), self._path(_CHECKPOINT_FILE))
+        self._recover()
+        self._index.mark_dirty()
+
+        self._stop = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        if compaction_interval is not None:
+            self._compactor = threading.Thread(
+                target=self._compact_loop, args=(compaction_interval,), name="order-log-compactor", daemon=True
+            )
+            self._compactor.start()
+
+    def get_by_id(self, order_id: UUID) -> Order:
+        with self._lock:
+            slot = self._index.get(order_id.bytes)
+            if slot is None:
+                raise ValueError(f"Order {order_id} not found")
+            segment, offset, size, _ = slot
+            record = os.pread(self._readers[segment], size, offset)
+        return decode_order(record[_RECORD_HEADER.size:])
+
+    def save(self, order: Order) -> None:
+        self.save_many([order])
+
+    def save_many(self, orders: List[Order]) -> None:
+        orders = list(orders)
+        records = [_encode_record(encode_order(order)) for order in orders]
+        with self._lock:
+            versions: Dict[bytes, Optional[int]] = {}
+            for order in orders:
+                key = order.id.bytes
+                if key not in versions:
+                    slot = self._index.get(key)
+                    versions[key] = None if slot is None else slot[3]
+                if versions[key] != order._persisted_version:
+                    raise ConcurrencyConflict(f"Order {order.id} was modified concurrently")
+                versions[key] = order._version
+
+            for order, record in zip(orders, records):
+                self._append(order.id.bytes, order._version, record)
+            self._sync_writer()
+
+        for order in orders:
+            order._persisted_version = order._version
+            order.clear_events()
+
+    def checkpoint(self) -> None:
+        with self._lock:
+            self._sync_writer(force=True)
+            self._index.checkpoint(self._active, self._writer.tell())
+
+    def compact(self) -> None:
+        with self._lock:
+            garbage = [
+                segment for segment, total in self._segment_sizes().items()
+                if segment != self._active and total and
+                1 - self._live_bytes.get(segment, 0) / total >= self._garbage_ratio
+            ]
+            if not garbage:
+                return
+
+            for segment in garbage:
+                for offset, record, key, version in self._scan(segment, 0):
+                    slot = self._index.get(key)
+                    if slot is not None and slot[0] == segment and slot[1] == offset:
+                        self._append(key, version, record)
+
+            # Copies must be durable and indexed by a checkpoint before the
+            # old segments can go.
+            self._sync_writer(force=True)
+            self._index.checkpoint(self._active, self._writer.tell())
+            for segment in garbage:
+                os.close(self._readers.pop(segment))
+                self._live_bytes.pop(segment, None)
+                os.remove(self._segment_path(segment))
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._writer.closed:
+                return
+            self._sync_writer(force=True)
+            self._index.close(self._active, self._writer.tell())
+            self._writer.close()
+            for descriptor in self._readers.values():
+                os.close(descriptor)
+            self._readers.clear()
+
+    def __enter__(self) -> 'LogStructuredOrderRepository':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _recover(self) -> None:
+        segments = self._segments()
+        position_segment, position_offset = self._index.position
+        if segments and position_segment not in segments:
+            # The index refers to a segment that no longer exists.
+            self._index.reset()
+            position_segment, position_offset = segments[0], 0
+
+        for segment in segments:
+            self._readers[segment] = os.open(self._segment_path(segment), os.O_RDONLY)
+        for segment in segments:
+            if segment < position_segment:
+                continue
+            start = position_offset if segment == position_segment else 0
+            end = start
+            for offset, record, key, version in self._scan(segment, start):
+                self._index.put(key, segment, offset, len(record), version)
+                end = offset + len(record)
+            if end != os.path.getsize(self._segment_path(segment)):
+                if segment != segments[-1]:
+                    raise RuntimeError(f"Corrupted order log segment {segment}")
+                # A torn record at the tail of the log: drop it.
+                os.truncate(self._segment_path(segment), end)
+
+        for segment, _, size, _ in self._index.slots():
+            self._live_bytes[segment] = self._live_bytes.get(segment, 0) + size
+
+        self._active = segments[-1] if segments else 1
+        self._open_writer()
+
+    def _append(self, key: bytes, version: int, record: bytes) -> None:
+        if self._writer.tell() >= self._segment_size:
+            self._sync_writer(force=True)
+            self._writer.close()
+            self._active += 1
+            self._open_writer()
+
+        offset = self._writer.tell()
+        self._writer.write(record)
+        previous = self._index.put(key, self._active, offset, len(record), version)
+        if previous is not None:
+            self._live_bytes[previous[0]] -= previous[2]
+        self._live_bytes[self._active] = self._live_bytes.get(self._active, 0) + len(record)
+
+    def _open_writer(self) -> None:
+        path = self._segment_path(self._active)
+        self._writer = open(path, "ab")
+        if self._active not in self._readers:
+            self._readers[self._active] = os.open(path, os.O_RDONLY)
+
+    def _sync_writer(self, force: bool = False) -> None:
+        self._writer.flush()
+        if self._durable or force:
+            os.fsync(self._writer.fileno())
+
+    def _scan(self, segment: int, offset: int) -> Iterator[Tuple[int, bytes, bytes, int]]:
+        with open(self._segment_path(segment), "rb") as segment_file:
+            segment_file.seek(offset)
+            while True:
+                header = segment_file.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    return
+                size, checksum = _RECORD_HEADER.unpack(header)
+                payload = segment_file.read(size)
+                if len(payload) < size or zlib.crc32(payload) != checksum:
+                    return
+                key, _, version = _PAYLOAD_PREFIX.unpack_from(payload)
+                yield offset, header + payload, key, version
+                offset += len(header) + size
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(name[len("segment-"):-len(".log")]) for name in os.listdir(self._directory)
+            if name.startswith("segment-") and name.endswith(".log")
+        )
+
+    def _segment_sizes(self) -> Dict[int, int]:
+        return {segment: os.path.getsize(self._segment_path(segment)) for segment in self._readers}
+
+    def _segment_path(self, segment: int) -> str:
+        return self._path(f"segment-{segment:08d}.log")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self._directory, name)
+
+    def _compact_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.compact()
+
+
+class _HashIndex:
+    def __init__(self, path: str, checkpoint_path: str, capacity: int):
+        self._path = path
+        self._checkpoint_path = checkpoint_path
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._capacity = capacity
+        self._count = 0
+        self.position = (0, 0)
+
+    @classmethod
+    def open(cls, path: str, checkpoint_path: str, capacity: int = 1024) -> '_HashIndex':
+        for candidate in (path, checkpoint_path):
+            header = _read_header(candidate)
+            if header is not None and header[1]:
+                if candidate != path:
+                    with open(candidate, "rb") as source, open(path, "wb") as target:
+                        target.write(source.read())
+                index = cls(path, checkpoint_path, header[2])
+                index._count = header[3]
+                index.position = (header[4], header[5])
+                return index
+
+        _create_index_file(path, capacity)
+        return cls(path, checkpoint_path, capacity)
+
+    def get(self, key: bytes) -> Optional[Tuple[int, int, int, int]]:
+        slot_offset = self._find(key)
+        stored_key, segment, size, offset, version = _SLOT.unpack_from(self._map, slot_offset)
+        if not size:
+            return None
+        return segment, offset, size, version
+
+    def put(self, key: bytes, segment: int, offset: int, size: int, version: int) -> Optional[Tuple[int, int, int, int]]:
+        slot_offset = self._find(key)
+        _, previous_segment, previous_size, previous_offset, previous_version = _SLOT.unpack_from(self._map, slot_offset)
+        _SLOT.pack_into(self._map, slot_offset, key, segment, size, offset, version)
+        if previous_size:
+            return previous_segment, previous_offset, previous_size, previous_version
+
+        self._count += 1
+        if self._count > self._capacity * _MAX_LOAD:
+            self._grow()
+        return None
+
+    def slots(self) -> Iterator[Tuple[int, int, int, int]]:
+        for slot in range(self._capacity):
+            _, segment, size, offset, version = _SLOT.unpack_from(self._map, _INDEX_HEADER_SIZE + slot * _SLOT.size)
+            if size:
+                yield segment, offset, size, version
+
+    def mark_dirty(self) -> None:
+        self._write_header(clean=False)
+
+    def reset(self) -> None:
+        self._map.close()
+        self._file.close()
+        _create_index_file(self._path, self._capacity)
+        self._file = open(self._path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._count = 0
+        self.position = (0, 0)
+
+    def checkpoint(self, segment: int, offset: int) -> None:
+        self.position = (segment, offset)
+        self._write_header(clean=True)
+        self._map.flush()
+        temporary = self._checkpoint_path + ".tmp"
+        with open(temporary, "wb") as checkpoint:
+            checkpoint.write(self._map)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temporary, self._checkpoint_path)
+        self._write_header(clean=False)
+
+    def close(self, segment: int, offset: int) -> None:
+        self.position = (segment, offset)
+        self._write_header(clean=True)
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+    def _find(self, key: bytes) -> int:
+        mask = self._capacity - 1
+        slot = _slot_hash(key) & mask
+        while True:
+            slot_offset = _INDEX_HEADER_SIZE + slot * _SLOT.size
+            stored_key, _, size, _, _ = _SLOT.unpack_from(self._map, slot_offset)
+            if not size or stored_key == key:
+                return slot_offset
+            slot = (slot + 1) & mask
+
+    def _grow(self) -> None:
+        entries = [
+            _SLOT.unpack_from(self._map, _INDEX_HEADER_SIZE + slot * _SLOT.size)
+            for slot in range(self._capacity)
+        ]
+        self._map.close()
+        self._file.close()
+        self._capacity *= 2
+        _create_index_file(self._path, self._capacity)
+        self._file = open(self._path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        for key, segment, size, offset, version in entries:
+            if size:
+                _SLOT.pack_into(self._map, self._find(key), key, segment, size, offset, version)
+        self._write_header(clean=False)
+
+    def _write_header(self, clean: bool) -> None:
+        segment, offset = self.position
+        _INDEX_HEADER.pack_into(self._map, 0, _INDEX_MAGIC, int(clean), self._capacity, self._count, segment, offset)
+
+
+def _read_header(path: str) -> Optional[tuple]:
+    try:
+        with open(path, "rb") as index_file:
+            data = index_file.read(_INDEX_HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(data) < _INDEX_HEADER.size:
+        return None
+    header = _INDEX_HEADER.unpack_from(data)
+    if header[0] != _INDEX_MAGIC:
+        return None
+    if os.path.getsize(path) != _INDEX_HEADER_SIZE + header[2] * _SLOT.size:
+        return None
+    return header
+
+
+def _create_index_file(path: str, capacity: int) -> None:
+    with open(path, "wb") as index_file:
+        index_file.truncate(_INDEX_HEADER_SIZE + capacity * _SLOT.size)
+        index_file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, 0, capacity, 0, 0, 0))
+
+
+def _slot_hash(key: bytes) -> int:
+    # Deterministic across processes, unlike hash(); uuid4 bytes are random.
+    return int.from_bytes(key[:8], "little") ^ int.from_bytes(key[8:], "little")
+
+
+def _encode_record(payload: bytes) -> bytes:
+    return _RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
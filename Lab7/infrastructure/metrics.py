@@ -0,0 +1,103 @@
+import math
+import threading
+from collections import Counter
+from typing import Dict, Optional, Type
+from application.interfaces import PaymentListener
+
+
+# Sub-buckets per power of two: recorded durations are kept to within ~4%.
+_SUB_BUCKETS = 16
+
+
+class HistogramCollector(PaymentListener):
+    # In-process latency histograms per stage. Memory is bounded by the
+    # number of log-scaled buckets, not by the number of calls.
+
+    def __init__(self):
+        self._stages: Dict[str, _StageHistogram] = {}
+        self._lock = threading.Lock()
+
+    def on_stage(self, stage: str, duration: float, outcome: str,
+                 error: Optional[Type[BaseException]] = None) -> None:
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _StageHistogram()
+            histogram.add(duration, outcome, error)
+
+    def percentile(self, stage: str, q: float) -> float:
+        with self._lock:
+            return self._stages[stage].percentile(q)
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "p50": histogram.percentile(50),
+                    "p95": histogram.percentile(95),
+                    "p99": histogram.percentile(99),
+                    "max": histogram.max,
+                    "outcomes": dict(histogram.outcomes),
+                    "errors": dict(histogram.errors),
+                }
+                for stage, histogram in self._stages.items()
+            }
+
+    def format_report(self) -> str:
+        rows = [f"{'stage':<12} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  outcomes"]
+        for stage, stats in self.report().items():
+            outcomes = ", ".join(f"{outcome}={count}" for outcome, count in sorted(stats["outcomes"].items()))
+            rows.append(f"{stage:<12} {stats['count']:>8} {stats['p50'] * 1e3:>9.3f} "
+                        f"{stats['p95'] * 1e3:>9.3f} {stats['p99'] * 1e3:>9.3f}  {outcomes}")
+        return "\n".join(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+class _StageHistogram:
+    __slots__ = ("buckets", "count", "max", "outcomes", "errors")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.max = 0.0
+        self.outcomes: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def add(self, duration: float, outcome: str, error: Optional[Type[BaseException]]) -> None:
+        bucket = _bucket(duration)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        if duration > self.max:
+            self.max = duration
+        self.outcomes[outcome] += 1
+        if error is not None:
+            self.errors[error.__name__] += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(_upper_bound(bucket), self.max)
+        return self.max
+
+
+def _bucket(duration: float) -> int:
+    if duration <= 0:
+        return -(1 << 30)
+    mantissa, exponent = math.frexp(duration)
+    return exponent * _SUB_BUCKETS + int((mantissa - 0.5) * 2 * _SUB_BUCKETS)
+
+
+def _upper_bound(bucket: int) -> float:
+    if bucket == -(1 << 30):
+        return 0.0
+    exponent, sub = divmod(bucket, _SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 1) / (2 * _SUB_BUCKETS), exponent)
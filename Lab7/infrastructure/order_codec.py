@@ -0,0 +1,65 @@
+import struct
+from decimal import Decimal
+from typing import List, Tuple
+from uuid import UUID
+from domain.entities import Order, OrderLine
+from domain.value_objects import Money
+
+
+# Line layout: product id, quantity, then length-prefixed name, price and
+# currency. Prices are stored as Decimal strings so exponents survive.
+_LINE_HEADER = struct.Struct("<16sqHBB")
+_COUNT = struct.Struct("<I")
+# Order layout: id, customer id, version, length-prefixed status, then lines.
+_ORDER_HEADER = struct.Struct("<16s16sqB")
+
+
+def encode_lines(lines) -> bytes:
+    parts = [_COUNT.pack(len(lines))]
+    for line in lines:
+        name = line.product_name.encode("utf-8")
+        price = str(line.unit_price.amount).encode("ascii")
+        currency = line.unit_price.currency.encode("ascii")
+        parts.append(_LINE_HEADER.pack(line.product_id.bytes, line.quantity, len(name), len(price), len(currency)))
+        parts.append(name)
+        parts.append(price)
+        parts.append(currency)
+    return b"".join(parts)
+
+
+def decode_lines(data: bytes, offset: int = 0) -> Tuple[List[OrderLine], int]:
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    lines = []
+    for _ in range(count):
+        product_id, quantity, name_size, price_size, currency_size = _LINE_HEADER.unpack_from(data, offset)
+        offset += _LINE_HEADER.size
+        name = data[offset:offset + name_size].decode("utf-8")
+        offset += name_size
+        price = Decimal(data[offset:offset + price_size].decode("ascii"))
+        offset += price_size
+        currency = data[offset:offset + currency_size].decode("ascii")
+        offset += currency_size
+        lines.append(OrderLine(UUID(bytes=product_id), name, quantity, Money(price, currency)))
+    return lines, offset
+
+
+def encode_order(order: Order) -> bytes:
+    status = order.status.encode("ascii")
+    header = _ORDER_HEADER.pack(order.id.bytes, order.customer_id.bytes, order._version, len(status))
+    return header + status + encode_lines(order.lines)
+
+
+def decode_order(data: bytes) -> Order:
+    order_id, customer_id, version, status_size = _ORDER_HEADER.unpack_from(data)
+    offset = _ORDER_HEADER.size
+    status = data[offset:offset + status_size].decode("ascii")
+    lines, _ = decode_lines(data, offset + status_size)
+    return restore_order(UUID(bytes=order_id), UUID(bytes=customer_id), status, version, lines)
+
+
+def restore_order(order_id: UUID, customer_id: UUID, status: str, version: int, lines: List[OrderLine]) -> Order:
+    order = Order(order_id, customer_id, lines, status)
+    order._version = version
+    order._persisted_version = version
+    return order
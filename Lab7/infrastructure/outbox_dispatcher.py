@@ -0,0 +1,71 @@
+import threading
+from typing import Callable, List
+from domain.events import DomainEvent
+from application.interfaces import Outbox
+
+
+class OutboxDispatcher:
+    # Hands outbox events to `publish` in batches of up to batch_size from a
+    # background thread, so saving an order never waits for consumers.
+    # Entries are acknowledged only after publish returns: a failing publish
+    # or a crash in between means redelivery, never loss (at-least-once).
+    # Consumers can drop duplicates by (order_id, version).
+
+    def __init__(self, outbox: Outbox, publish: Callable[[List[DomainEvent]], None], batch_size: int = 100,
+                 poll_interval: float = 0.05, retry_interval: float = 1.0, background: bool = True):
+        self._outbox = outbox
+        self._publish = publish
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._retry_interval = retry_interval
+        self.delivered = 0
+        self.failures = 0
+        self._delivering = threading.Lock()
+        self._stopped = threading.Event()
+        self._worker = None
+        if background:
+            self._worker = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+            self._worker.start()
+
+    def drain(self) -> int:
+        # Delivers everything pending now; publish errors are raised.
+        delivered = 0
+        while True:
+            batch = self._deliver_batch()
+            if not batch:
+                return delivered
+            delivered += batch
+
+    def close(self, drain: bool = True) -> None:
+        self._stopped.set()
+        if self._worker is not None:
+            self._worker.join()
+        if drain:
+            self.drain()
+
+    def __enter__(self) -> 'OutboxDispatcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                delivered = self._deliver_batch()
+            except Exception:
+                self.failures += 1
+                self._stopped.wait(self._retry_interval)
+                continue
+            if not delivered:
+                self._stopped.wait(self._poll_interval)
+
+    def _deliver_batch(self) -> int:
+        with self._delivering:
+            entries = self._outbox.fetch_pending(self._batch_size)
+            if not entries:
+                return 0
+            self._publish([entry.event for entry in entries])
+            self._outbox.acknowledge([entry.id for entry in entries])
+            self.delivered += len(entries)
+            return len(entries)
@@ -1,9 +1,154 @@
 from uuid import UUID
+import asyncio
+import math
 import random
+import threading
+import time
+from typing import Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
 from domain.value_objects import Money
-from application.interfaces import PaymentGateway
+from application.interfaces import AsyncPaymentGateway, PaymentGateway
+
+
+class FixedLatency:
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+
+class LogNormalLatency:
+    # Long right tail: median is the typical call, sigma widens the tail
+    # (p99 is about median * exp(2.33 * sigma)).
+    def __init__(self, median: float, sigma: float = 0.5):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(math.log(self.median), self.sigma)
+
+
+class BimodalLatency:
+    # Most calls take the fast path; slow_share of them take the slow one.
+    def __init__(self, fast: 'LatencyModel', slow: 'LatencyModel', slow_share: float = 0.05):
+        self.fast = fast
+        self.slow = slow
+        self.slow_share = slow_share
+
+    def sample(self, rng: random.Random) -> float:
+        model = self.slow if rng.random() < self.slow_share else self.fast
+        return model.sample(rng)
+
+
+LatencyModel = Union[FixedLatency, LogNormalLatency, BimodalLatency]
+
+
+class Outage(NamedTuple):
+    # Seconds since the gateway was created. Calls started inside the
+    # window wait `latency` and then fail with ConnectionError.
+    start: float
+    end: float
+    latency: float = 0.0
+
+
+class GatewayCall(NamedTuple):
+    started: float
+    queued: float
+    duration: float
+    items: int
+    approved: int
+    failed: bool
 
 
 class FakePaymentGateway(PaymentGateway):
+    # Simulated latency of a request is batch_latency plus item_latency per
+    # charge in it plus a sample from `latency`; a single charge is a batch
+    # of one. All randomness comes from one generator seeded with `seed`,
+    # so a run with the same seed and the same call order is repeatable.
+    # max_concurrency limits requests in progress; further callers queue.
+
+    def __init__(self, batch_latency: float = 0.0, item_latency: float = 0.0,
+                 latency: Optional[LatencyModel] = None, success_rate: float = 0.8, seed: Optional[int] = None,
+                 outages: Sequence[Outage] = (), max_concurrency: Optional[int] = None, record_calls: bool = True,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.batch_latency = batch_latency
+        self.item_latency = item_latency
+        self.latency = latency
+        self.success_rate = success_rate
+        self.outages = list(outages)
+        self.record_calls = record_calls
+        self.calls: List[GatewayCall] = []
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._calls_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency is not None else None
+        self._clock = clock
+        self._sleep = sleep
+        self._created_at = clock()
+
     def charge(self, order_id: UUID, amount: Money) -> bool:
-        return random.random() < 0.8
+        return self._request(1)[0]
+
+    def charge_many(self, charges: Iterable[Tuple[UUID, Money]]) -> List[bool]:
+        return self._request(len(list(charges)))
+
+    def reset_calls(self) -> None:
+        with self._calls_lock:
+            self.calls.clear()
+
+    def _request(self, items: int) -> List[bool]:
+        arrived = self._clock()
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            started = self._clock()
+            outage = self._outage_at(started - self._created_at)
+            with self._rng_lock:
+                if outage is None:
+                    latency = self.batch_latency + items * self.item_latency
+                    if self.latency is not None:
+                        latency += self.latency.sample(self._rng)
+                    results = [self._rng.random() < self.success_rate for _ in range(items)]
+                else:
+                    latency, results = outage.latency, None
+            if latency:
+                self._sleep(latency)
+            finished = self._clock()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+        if self.record_calls:
+            call = GatewayCall(arrived - self._created_at, started - arrived, finished - started, items,
+                               sum(results) if results is not None else 0, results is None)
+            with self._calls_lock:
+                self.calls.append(call)
+        if results is None:
+            raise ConnectionError("Payment gateway outage")
+        return results
+
+    def _outage_at(self, elapsed: float) -> Optional[Outage]:
+        for outage in self.outages:
+            if outage.start <= elapsed < outage.end:
+                return outage
+        return None
+
+
+class AsyncFakePaymentGateway(AsyncPaymentGateway):
+    def __init__(self, latency: Union[float, LatencyModel] = 0.0, success_rate: float = 0.8,
+                 seed: Optional[int] = None):
+        self.latency = FixedLatency(latency) if isinstance(latency, (int, float)) else latency
+        self.success_rate = success_rate
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # One event loop thread, so no lock is needed around the generator.
+        self._rng = random.Random(seed)
+
+    async def charge(self, order_id: UUID, amount: Money) -> bool:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency.sample(self._rng))
+        finally:
+            self.in_flight -= 1
+        return self._rng.random() < self.success_rate
@@ -1,18 +1,226 @@
-from typing import Dict
+import threading
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from contextlib import ExitStack
+from copy import deepcopy
+from itertools import count, islice
+from typing import Dict, Iterable, List, Optional
 from uuid import UUID
 from domain.entities import Order
-from application.interfaces import OrderRepository
+from domain.events import DomainEvent
+from application.exceptions import ConcurrencyConflict
+from application.interfaces import OrderPage, OrderRepository, Outbox, OutboxEntry
 
 
-class InMemoryOrderRepository(OrderRepository):
+class InMemoryOrderRepository(OrderRepository, Outbox):
     def __init__(self):
         self._orders: Dict[UUID, Order] = {}
+        self._locks: Dict[UUID, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # Secondary indexes hold sorted insertion sequence numbers, which
+        # double as stable pagination cursors.
+        self._index_lock = threading.Lock()
+        self._sequences: Dict[UUID, int] = {}
+        self._ids_by_sequence: Dict[int, UUID] = {}
+        self._by_customer: Dict[UUID, List[int]] = {}
+        self._by_status: Dict[str, List[int]] = {}
+        # Outbox entries by id, oldest first, guarded by their own lock.
+        # OrderedDict, because a dict slows down iterating from the front
+        # after many deletions there.
+        self._outbox_lock = threading.Lock()
+        self._outbox: 'OrderedDict[int, DomainEvent]' = OrderedDict()
+        self._outbox_ids = count()
     
     def get_by_id(self, order_id: UUID) -> Order:
         order = self._orders.get(order_id)
-        if not order:
+        if order is None:
             raise ValueError(f"Order {order_id} not found")
-        return order
+        return deepcopy(order)
     
     def save(self, order: Order) -> None:
-        self._orders[order.id] = order
+        snapshot = _snapshot(order)
+        with self._lock_for(order.id):
+            stored = self._orders.get(order.id)
+            _check_version(stored, order)
+            # Most saves leave customer and status alone; those replace the
+            # order without taking the lock shared by every save and query.
+            if stored is not None and stored.customer_id == snapshot.customer_id \
+                    and stored.status == snapshot.status:
+                self._orders[order.id] = snapshot
+            else:
+                with self._index_lock:
+                    self._orders[order.id] = snapshot
+                    self._update_indexes(stored, snapshot)
+            if order._events:
+                with self._outbox_lock:
+                    for event in order._events:
+                        self._outbox[next(self._outbox_ids)] = event
+        order._persisted_version = order._version
+        order.clear_events()
+
+    def fetch_pending(self, limit: int = 100) -> List[OutboxEntry]:
+        with self._outbox_lock:
+            return [OutboxEntry(entry_id, event) for entry_id, event in islice(self._outbox.items(), limit)]
+
+    def acknowledge(self, entry_ids: Iterable[int]) -> None:
+        with self._outbox_lock:
+            for entry_id in entry_ids:
+                self._outbox.pop(entry_id, None)
+
+    def find_by_customer(self, customer_id: UUID, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        return self._page(self._by_customer, customer_id, limit, cursor)
+
+    def find_by_status(self, status: str, limit: int = 100, cursor: Optional[int] = None) -> OrderPage:
+        return self._page(self._by_status, status, limit, cursor)
+
+    def _page(self, index: Dict, key, limit: int, cursor: Optional[int]) -> OrderPage:
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        with self._index_lock:
+            sequences = index.get(key, [])
+            start = 0 if cursor is None else bisect_right(sequences, cursor)
+            selected = sequences[start:start + limit]
+            orders = [self._orders[self._ids_by_sequence[sequence]] for sequence in selected]
+            has_more = start + limit < len(sequences)
+        next_cursor = selected[-1] if has_more else None
+        return OrderPage([deepcopy(order) for order in orders], next_cursor)
+
+    def _update_indexes(self, stored: Optional[Order], order: Order) -> None:
+        sequence = self._sequences.get(order.id)
+        if sequence is None:
+            sequence = self._sequences[order.id] = len(self._sequences)
+            self._ids_by_sequence[sequence] = order.id
+        else:
+            _remove_sorted(self._by_customer, stored.customer_id, sequence)
+            _remove_sorted(self._by_status, stored.status, sequence)
+        insort(self._by_customer.setdefault(order.customer_id, []), sequence)
+        insort(self._by_status.setdefault(order.status, []), sequence)
+
+    def _lock_for(self, order_id: UUID) -> threading.Lock:
+        lock = self._locks.get(order_id)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(order_id, threading.Lock())
+        return lock
+
+
+class ShardedOrderRepository(OrderRepository, Outbox):
+    def __init__(self, shards: int = 16):
+        if shards < 1:
+            raise ValueError("shards must be positive")
+        self._shards: List[Dict[UUID, Order]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        # Each shard keeps the events of its orders; an entry id encodes the
+        # shard (id % shards) and grows across shards.
+        self._outboxes: List['OrderedDict[int, DomainEvent]'] = [OrderedDict() for _ in range(shards)]
+        self._outbox_ids = count()
+
+    def get_by_id(self, order_id: UUID) -> Order:
+        index = self._shard_index(order_id)
+        with self._locks[index]:
+            order = self._shards[index].get(order_id)
+        if order is None:
+            raise ValueError(f"Order {order_id} not found")
+        return deepcopy(order)
+
+    def save(self, order: Order) -> None:
+        snapshot = _snapshot(order)
+        index = self._shard_index(order.id)
+        with self._locks[index]:
+            shard = self._shards[index]
+            _check_version(shard.get(order.id), order)
+            shard[order.id] = snapshot
+            self._append_events(index, order)
+        order._persisted_version = order._version
+        order.clear_events()
+
+    def get_many(self, order_ids: Iterable[UUID]) -> List[Order]:
+        order_ids = list(order_ids)
+        found: Dict[UUID, Order] = {}
+        for index, shard_ids in self._group_by_shard(order_ids).items():
+            shard = self._shards[index]
+            with self._locks[index]:
+                for order_id in shard_ids:
+                    order = shard.get(order_id)
+                    if order is not None:
+                        found[order_id] = order
+
+        for order_id in order_ids:
+            if order_id not in found:
+                raise ValueError(f"Order {order_id} not found")
+        return [deepcopy(found[order_id]) for order_id in order_ids]
+
+    def save_many(self, orders: Iterable[Order]) -> None:
+        # All-or-nothing: every involved shard is locked (in index order, so
+        # concurrent batches cannot deadlock) while the whole batch is checked.
+        orders = list(orders)
+        snapshots = [_snapshot(order) for order in orders]
+        indexes = sorted(self._group_by_shard(order.id for order in orders))
+        with ExitStack() as stack:
+            for index in indexes:
+                stack.enter_context(self._locks[index])
+
+            pending: Dict[UUID, Order] = {}
+            for order, snapshot in zip(orders, snapshots):
+                current = pending.get(order.id) or self._shards[self._shard_index(order.id)].get(order.id)
+                _check_version(current, order)
+                pending[order.id] = snapshot
+
+            for order_id, snapshot in pending.items():
+                self._shards[self._shard_index(order_id)][order_id] = snapshot
+            for order in {id(order): order for order in orders}.values():
+                self._append_events(self._shard_index(order.id), order)
+
+        for order in orders:
+            order._persisted_version = order._version
+            order.clear_events()
+
+    def fetch_pending(self, limit: int = 100) -> List[OutboxEntry]:
+        entries = []
+        for index, outbox in enumerate(self._outboxes):
+            with self._locks[index]:
+                entries.extend(OutboxEntry(entry_id, event) for entry_id, event in islice(outbox.items(), limit))
+        entries.sort(key=lambda entry: entry.id)
+        return entries[:limit]
+
+    def acknowledge(self, entry_ids: Iterable[int]) -> None:
+        for entry_id in entry_ids:
+            index = entry_id % len(self._shards)
+            with self._locks[index]:
+                self._outboxes[index].pop(entry_id, None)
+
+    def _append_events(self, index: int, order: Order) -> None:
+        outbox = self._outboxes[index]
+        for event in order._events:
+            outbox[next(self._outbox_ids) * len(self._shards) + index] = event
+
+    def _shard_index(self, order_id: UUID) -> int:
+        return hash(order_id) % len(self._shards)
+
+    def _group_by_shard(self, order_ids: Iterable[UUID]) -> Dict[int, List[UUID]]:
+        groups: Dict[int, List[UUID]] = {}
+        for order_id in order_ids:
+            groups.setdefault(self._shard_index(order_id), []).append(order_id)
+        return groups
+
+
+def _remove_sorted(index: Dict, key, sequence: int) -> None:
+    sequences = index[key]
+    del sequences[bisect_right(sequences, sequence) - 1]
+    if not sequences:
+        del index[key]
+
+
+def _snapshot(order: Order) -> Order:
+    # Stored orders are private copies, so callers only ever change the
+    # repository through save().
+    snapshot = deepcopy(order)
+    snapshot._persisted_version = order._version
+    snapshot.clear_events()
+    return snapshot
+
+
+def _check_version(stored: Optional[Order], order: Order) -> None:
+    stored_version = None if stored is None else stored._version
+    if stored_version != order._persisted_version:
+        raise ConcurrencyConflict(f"Order {order.id} was modified concurrently")
@@ -0,0 +1,178 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, List, Optional, Tuple, Type
+from uuid import UUID
+from domain.value_objects import Money
+from application.exceptions import OperationTimeout
+from application.interfaces import PaymentGateway
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    # Opens when, over the last window_size calls (and at least min_calls),
+    # the share of failed calls or of calls slower than slow_call_duration
+    # reaches its threshold. After open_duration it lets half_open_calls
+    # trial calls through and closes again only if all of them succeed.
+
+    def __init__(self, window_size: int = 50, min_calls: int = 10, failure_threshold: float = 0.5,
+                 slow_call_threshold: float = 0.5, slow_call_duration: float = 1.0, open_duration: float = 5.0,
+                 half_open_calls: int = 3, clock: Callable[[], float] = time.monotonic):
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._min_calls = min_calls
+        self._failure_threshold = failure_threshold
+        self._slow_call_threshold = slow_call_threshold
+        self._slow_call_duration = slow_call_duration
+        self._open_duration = open_duration
+        self._half_open_calls = half_open_calls
+        self._clock = clock
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trials_started = 0
+        self._trials_passed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._expire_open()
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            self._expire_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._trials_started < self._half_open_calls:
+                self._trials_started += 1
+                return True
+            return False
+
+    def record(self, failed: bool, duration: float) -> None:
+        slow = duration >= self._slow_call_duration
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if failed or slow:
+                    self._open()
+                else:
+                    self._trials_passed += 1
+                    if self._trials_passed >= self._half_open_calls:
+                        self._state = self.CLOSED
+                return
+            if self._state == self.OPEN:
+                # A call let through before the circuit opened.
+                return
+
+            self._window.append((failed, slow))
+            calls = len(self._window)
+            if calls < self._min_calls:
+                return
+            failures = sum(1 for failed, _ in self._window if failed)
+            slow_calls = sum(1 for _, slow in self._window if slow)
+            if failures / calls >= self._failure_threshold or slow_calls / calls >= self._slow_call_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._window.clear()
+
+    def _expire_open(self) -> None:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self._open_duration:
+            self._state = self.HALF_OPEN
+            self._trials_started = 0
+            self._trials_passed = 0
+
+
+class ResilientPaymentGateway(PaymentGateway):
+    # Wraps a gateway with a circuit breaker, optional retries with
+    # full-jitter backoff, a per-attempt timeout and optional hedging: a
+    # second identical request once hedge_after seconds pass without an
+    # answer. Retries and hedges resend the same order_id, so both are off
+    # by default; enable them only for a processor that treats repeated
+    # charges of one order as one. A timed-out request keeps running on the
+    # worker pool in the background and may still charge, so OperationTimeout
+    # is retried only when it is listed in retry_on.
+
+    def __init__(self, inner: PaymentGateway, breaker: Optional[CircuitBreaker] = None, max_retries: int = 0,
+                 backoff: float = 0.05, max_backoff: float = 1.0,
+                 retry_on: Tuple[Type[Exception], ...] = (ConnectionError,),
+                 timeout: Optional[float] = None, hedge_after: Optional[float] = None, max_workers: int = 64,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None):
+        self._inner = inner
+        self._breaker = breaker if breaker is not None else CircuitBreaker(clock=clock)
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._retry_on = retry_on
+        self._timeout = timeout
+        self._hedge_after = hedge_after
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng if rng is not None else random.Random()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if timeout is not None or hedge_after is not None:
+            self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="payment-call")
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    def charge(self, order_id: UUID, amount: Money) -> bool:
+        for attempt in range(self._max_retries + 1):
+            if not self._breaker.allow():
+                raise CircuitOpenError("Payment gateway circuit is open")
+
+            started = self._clock()
+            try:
+                result = self._attempt(order_id, amount)
+            except Exception as e:
+                self._breaker.record(True, self._clock() - started)
+                if attempt == self._max_retries or not isinstance(e, self._retry_on):
+                    raise
+                self._sleep(self._rng.uniform(0, min(self._max_backoff, self._backoff * 2 ** attempt)))
+                continue
+            self._breaker.record(False, self._clock() - started)
+            return result
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def _attempt(self, order_id: UUID, amount: Money) -> bool:
+        if self._pool is None:
+            return self._inner.charge(order_id, amount)
+
+        deadline = None if self._timeout is None else self._clock() + self._timeout
+        pending: List[Future] = [self._pool.submit(self._inner.charge, order_id, amount)]
+        hedged = self._hedge_after is None
+        error: Optional[BaseException] = None
+        while pending:
+            wait_for = None if deadline is None else max(0.0, deadline - self._clock())
+            if not hedged:
+                wait_for = self._hedge_after if wait_for is None else min(wait_for, self._hedge_after)
+            done, not_done = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            pending = list(not_done)
+
+            if deadline is not None and self._clock() >= deadline:
+                break
+            if not hedged and not done:
+                hedged = True
+                pending.append(self._pool.submit(self._inner.charge, order_id, amount))
+        if pending:
+            raise OperationTimeout(f"Payment gateway did not respond within {self._timeout}s")
+        raise error
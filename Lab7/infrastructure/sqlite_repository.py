@@ -0,0 +1,230 @@
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from domain.entities import Order
+from application.exceptions import ConcurrencyConflict
+from application.interfaces import OrderRepository, Outbox, OutboxEntry
+from .event_codec import decode_event, encode_event
+from .order_codec import decode_lines, encode_lines, restore_order
+
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS orders (
+    id BLOB PRIMARY KEY,
+    customer_id BLOB NOT NULL,
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    lines BLOB NOT NULL
+) WITHOUT ROWID
+"""
+_CREATE_OUTBOX = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL
+)
+"""
+_SELECT_ORDER = "SELECT id, customer_id, status, version, lines FROM orders WHERE id = ?"
+_SELECT_VERSION = "SELECT version FROM orders WHERE id = ?"
+_UPSERT_ORDER = "INSERT OR REPLACE INTO orders (id, customer_id, status, version, lines) VALUES (?, ?, ?, ?, ?)"
+_INSERT_EVENT = "INSERT INTO outbox (event) VALUES (?)"
+_SELECT_EVENTS = "SELECT id, event FROM outbox ORDER BY id LIMIT ?"
+_DELETE_EVENT = "DELETE FROM outbox WHERE id = ?"
+# Stay below SQLite's default limit on host parameters per statement.
+_SELECT_CHUNK = 500
+
+Row = Tuple[bytes, bytes, str, int, bytes]
+
+
+class SqliteOrderRepository(OrderRepository, Outbox):
+    # With write_behind enabled, save() only checks the version and queues the
+    # row; a background thread writes queued rows in one transaction once
+    # batch_size rows are waiting or flush_interval seconds have passed.
+    # Version checks are done in-process, so one repository instance should
+    # own the database file. Order events go to the outbox table in the same
+    # transaction as the order rows. A failed background write keeps the
+    # queue, is retried with exponential backoff up to max_retry_interval,
+    # and is raised by save() and flush() until a write succeeds.
+
+    def __init__(self, path: str, write_behind: bool = True, batch_size: int = 1000, flush_interval: float = 0.05,
+                 max_retry_interval: float = 1.0):
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_CREATE_TABLE)
+        self._connection.execute(_CREATE_OUTBOX)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_retry_interval = max(max_retry_interval, flush_interval)
+        self._flush_error: Optional[Exception] = None
+        self._pending: Dict[UUID, Row] = {}
+        self._pending_events: List[str] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        if write_behind:
+            self._flusher = threading.Thread(target=self._flush_loop, name="sqlite-order-flusher", daemon=True)
+            self._flusher.start()
+
+    def get_by_id(self, order_id: UUID) -> Order:
+        with self._lock:
+            row = self._pending.get(order_id)
+            if row is None:
+                row = self._connection.execute(_SELECT_ORDER, (order_id.bytes,)).fetchone()
+        if row is None:
+            raise ValueError(f"Order {order_id} not found")
+        return _decode_row(row)
+
+    def get_many(self, order_ids: Iterable[UUID]) -> List[Order]:
+        order_ids = list(order_ids)
+        rows: Dict[bytes, Row] = {}
+        with self._lock:
+            missing = []
+            for order_id in order_ids:
+                row = self._pending.get(order_id)
+                if row is None:
+                    missing.append(order_id.bytes)
+                else:
+                    rows[order_id.bytes] = row
+            for start in range(0, len(missing), _SELECT_CHUNK):
+                chunk = missing[start:start + _SELECT_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                query = f"SELECT id, customer_id, status, version, lines FROM orders WHERE id IN ({placeholders})"
+                for row in self._connection.execute(query, chunk):
+                    rows[row[0]] = row
+
+        for order_id in order_ids:
+            if order_id.bytes not in rows:
+                raise ValueError(f"Order {order_id} not found")
+        return [_decode_row(rows[order_id.bytes]) for order_id in order_ids]
+
+    def save(self, order: Order) -> None:
+        self.save_many([order])
+
+    def save_many(self, orders: Iterable[Order]) -> None:
+        orders = list(orders)
+        rows = [_encode_row(order) for order in orders]
+        events = [encode_event(event) for order in {id(order): order for order in orders}.values()
+                  for event in order._events]
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Repository is closed")
+            if self._flush_error is not None:
+                raise self._flush_error
+
+            versions: Dict[UUID, Optional[int]] = {}
+            for order in orders:
+                if order.id not in versions:
+                    versions[order.id] = self._stored_version(order.id)
+                if versions[order.id] != order._persisted_version:
+                    raise ConcurrencyConflict(f"Order {order.id} was modified concurrently")
+                versions[order.id] = order._version
+
+            if self._flusher is None:
+                self._write(rows, events)
+            else:
+                for order, row in zip(orders, rows):
+                    self._pending[order.id] = row
+                self._pending_events.extend(events)
+                if len(self._pending) >= self._batch_size:
+                    self._wakeup.notify()
+
+        for order in orders:
+            order._persisted_version = order._version
+            order.clear_events()
+
+    def fetch_pending(self, limit: int = 100) -> List[OutboxEntry]:
+        # Only events already written to the database are handed out.
+        with self._lock:
+            rows = self._connection.execute(_SELECT_EVENTS, (limit,)).fetchall()
+        return [OutboxEntry(entry_id, decode_event(event)) for entry_id, event in rows]
+
+    def acknowledge(self, entry_ids: Iterable[int]) -> None:
+        entry_ids = [(entry_id,) for entry_id in entry_ids]
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(_DELETE_EVENT, entry_ids)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._rollback()
+                raise
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_pending()
+            self._flush_error = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            try:
+                self._flush_pending()
+            finally:
+                self._connection.close()
+
+    def __enter__(self) -> 'SqliteOrderRepository':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _stored_version(self, order_id: UUID) -> Optional[int]:
+        row = self._pending.get(order_id)
+        if row is not None:
+            return row[3]
+        row = self._connection.execute(_SELECT_VERSION, (order_id.bytes,)).fetchone()
+        return None if row is None else row[0]
+
+    def _flush_loop(self) -> None:
+        delay = self._flush_interval
+        with self._wakeup:
+            while not self._closed:
+                self._wakeup.wait(delay)
+                try:
+                    self._flush_pending()
+                except Exception as error:
+                    # _flush_pending leaves the queue in place on failure.
+                    self._flush_error = error
+                    delay = min(delay * 2, self._max_retry_interval)
+                else:
+                    self._flush_error = None
+                    delay = self._flush_interval
+
+    def _flush_pending(self) -> None:
+        if self._pending or self._pending_events:
+            self._write(list(self._pending.values()), self._pending_events)
+            self._pending.clear()
+            self._pending_events = []
+
+    def _write(self, rows: List[Row], events: List[str]) -> None:
+        self._connection.execute("BEGIN")
+        try:
+            self._connection.executemany(_UPSERT_ORDER, rows)
+            self._connection.executemany(_INSERT_EVENT, [(event,) for event in events])
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._rollback()
+            raise
+
+    def _rollback(self) -> None:
+        # A failed COMMIT (e.g. SQLITE_BUSY) can leave the transaction open,
+        # and every later BEGIN would fail on it.
+        if self._connection.in_transaction:
+            self._connection.execute("ROLLBACK")
+
+
+def _encode_row(order: Order) -> Row:
+    return order.id.bytes, order.customer_id.bytes, order.status, order._version, encode_lines(order.lines)
+
+
+def _decode_row(row: Row) -> Order:
+    order_id, customer_id, status, version, lines = row
+    return restore_order(UUID(bytes=order_id), UUID(bytes=customer_id), status, version, decode_lines(lines)[0])
@@ -0,0 +1,16 @@
+from decimal import Decimal
+from typing import Tuple
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+
+
+# Two currencies and a non-ASCII name, for repositories that encode lines.
+MIXED_LINES = (("Товар", 2, Money(Decimal('10.50'))), ("Product", 1, Money(Decimal('3'), "EUR")))
+
+
+def make_order(*lines: Tuple[str, int, Money]) -> Order:
+    order = Order(uuid4(), uuid4())
+    for name, quantity, price in lines or (("Product", 1, Money(Decimal('10'))),):
+        order.add_line(uuid4(), name, quantity, price)
+    return order
@@ -0,0 +1,158 @@
+import asyncio
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.interfaces import AsyncPaymentGateway
+from application.async_use_cases import AsyncPayOrderUseCase
+from application.use_cases import PayOrderUseCase
+from infrastructure.async_adapters import AsyncOrderRepositoryAdapter
+from infrastructure.payment_gateways import AsyncFakePaymentGateway
+from infrastructure.repositories import InMemoryOrderRepository
+from application.exceptions import ConcurrencyConflict
+from tests.test_use_cases import FailingConfirmRepository, ScriptedPaymentGateway, build_orders, paid_events
+
+
+class AsyncScriptedPaymentGateway(AsyncPaymentGateway):
+    def __init__(self, scripted: ScriptedPaymentGateway, latency: float = 0.0):
+        self.scripted = scripted
+        self.latency = latency
+        self.calls = 0
+
+    async def charge(self, order_id, amount):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self.scripted.charge(order_id, amount)
+
+
+def make_order(repo):
+    order = Order(uuid4(), uuid4())
+    order.add_line(uuid4(), "Test Product", 2, Money(Decimal('50')))
+    repo.save(order)
+    return order.id
+
+
+class TestAsyncPayOrderUseCase:
+    @pytest.fixture
+    def setup(self):
+        self.order_repo = InMemoryOrderRepository()
+        self.order_id = make_order(self.order_repo)
+        return self.order_repo
+
+    def run(self, gateway, order_id=None, **kwargs):
+        use_case = AsyncPayOrderUseCase(AsyncOrderRepositoryAdapter(self.order_repo), gateway, **kwargs)
+        return asyncio.run(use_case.execute(order_id or self.order_id))
+
+    def test_successful_payment(self, setup):
+        result = self.run(AsyncFakePaymentGateway(success_rate=1.0))
+
+        assert result.success is True
+        assert result.amount_paid == "100"
+        assert self.order_repo.get_by_id(self.order_id).status == "paid"
+
+    def test_declined_payment_leaves_order_pending(self, setup):
+        result = self.run(AsyncFakePaymentGateway(success_rate=0.0))
+
+        assert result.success is False
+        assert "declined" in result.message.lower()
+        assert self.order_repo.get_by_id(self.order_id).status == "pending"
+
+    def test_double_payment_error(self, setup):
+        gateway = AsyncFakePaymentGateway(success_rate=1.0)
+        assert self.run(gateway).success is True
+
+        result = self.run(gateway)
+        assert result.success is False
+        assert "already paid" in result.message.lower()
+
+    def test_gateway_timeout_leaves_order_reserved(self, setup):
+        result = self.run(AsyncFakePaymentGateway(latency=1.0, success_rate=1.0), timeout=0.01)
+
+        assert result.success is False
+        assert result.message.startswith("Payment outcome unknown")
+        assert "Payment gateway did not respond" in result.message
+        assert self.order_repo.get_by_id(self.order_id).status == "paid"
+
+    def test_gateway_error_releases_order(self, setup):
+        result = self.run(AsyncScriptedPaymentGateway(ScriptedPaymentGateway(failing={self.order_id})))
+
+        assert result.message == "Unexpected error: gateway unavailable"
+        assert self.order_repo.get_by_id(self.order_id).status == "pending"
+
+    def test_cancelled_call_leaves_order_reserved(self, setup):
+        use_case = AsyncPayOrderUseCase(AsyncOrderRepositoryAdapter(self.order_repo),
+                                        AsyncFakePaymentGateway(latency=1.0))
+
+        async def cancel_midway():
+            task = asyncio.create_task(use_case.execute(self.order_id))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0)
+
+        asyncio.run(cancel_midway())
+        assert self.order_repo.get_by_id(self.order_id).status == "paid"
+
+
+@pytest.mark.parametrize("errors, message", [
+    ([ConcurrencyConflict("modified concurrently")], "Order paid successfully"),
+    ([IOError("disk full")], "Order paid, but the payment confirmation was not saved: disk full"),
+])
+def test_confirmation_save_failures(errors, message):
+    repo = FailingConfirmRepository(errors)
+    order_id = make_order(repo)
+    use_case = AsyncPayOrderUseCase(AsyncOrderRepositoryAdapter(repo), AsyncFakePaymentGateway(success_rate=1.0))
+
+    result = asyncio.run(use_case.execute(order_id))
+
+    assert (result.success, result.message) == (True, message)
+    assert len(paid_events(repo)) == (0 if isinstance(errors[0], IOError) else 1)
+
+
+class TestAsyncExecuteMany:
+    def test_matches_sequential_execute(self):
+        order_ids = [uuid4() for _ in range(20)]
+        empty_id = uuid4()
+        requested = order_ids + order_ids[:5] + [empty_id, uuid4()]
+        declined = set(order_ids[:3])
+        failing = set(order_ids[3:6])
+
+        sequential_repo = InMemoryOrderRepository()
+        build_orders(sequential_repo, order_ids)
+        sequential_repo.save(Order(empty_id, uuid4()))
+        sequential = PayOrderUseCase(sequential_repo, ScriptedPaymentGateway(declined, failing))
+        expected = [sequential.execute(order_id) for order_id in requested]
+
+        async_repo = InMemoryOrderRepository()
+        build_orders(async_repo, order_ids)
+        async_repo.save(Order(empty_id, uuid4()))
+        use_case = AsyncPayOrderUseCase(AsyncOrderRepositoryAdapter(async_repo),
+                                        AsyncScriptedPaymentGateway(ScriptedPaymentGateway(declined, failing)))
+        assert asyncio.run(use_case.execute_many(requested)) == expected
+
+    def test_semaphore_bounds_payments_in_flight(self):
+        repo = InMemoryOrderRepository()
+        order_ids = [make_order(repo) for _ in range(50)]
+        gateway = AsyncFakePaymentGateway(latency=0.01, success_rate=1.0)
+        use_case = AsyncPayOrderUseCase(AsyncOrderRepositoryAdapter(repo), gateway, max_concurrency=8)
+
+        results = asyncio.run(use_case.execute_many(order_ids))
+
+        assert all(result.success for result in results)
+        assert gateway.max_in_flight == 8
+
+    def test_concurrent_calls_charge_each_order_once(self):
+        repo = InMemoryOrderRepository()
+        order_ids = [make_order(repo) for _ in range(10)]
+        gateway = AsyncScriptedPaymentGateway(ScriptedPaymentGateway(set(), set()), latency=0.001)
+        use_case = AsyncPayOrderUseCase(AsyncOrderRepositoryAdapter(repo), gateway)
+
+        async def pay_concurrently():
+            return await asyncio.gather(*(use_case.execute(order_id) for order_id in order_ids * 5))
+
+        results = asyncio.run(pay_concurrently())
+
+        assert sum(result.success for result in results) == len(order_ids)
+        assert gateway.calls == len(order_ids)
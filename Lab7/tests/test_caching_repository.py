@@ -0,0 +1,142 @@
+import threading
+import pytest
+from application.exceptions import ConcurrencyConflict
+from infrastructure.caching_repository import CachingOrderRepository
+from infrastructure.lru_cache import LRUCache
+from infrastructure.repositories import InMemoryOrderRepository
+from tests.helpers import make_order
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingOrderRepository(InMemoryOrderRepository):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def get_by_id(self, order_id):
+        self.reads += 1
+        return super().get_by_id(order_id)
+
+
+class TestLRUCache:
+    def test_eviction_order(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.stats() == {"hits": 1, "misses": 0, "evictions": 1, "size": 2}
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = LRUCache(10, ttl=5, clock=clock)
+        cache.put("a", 1)
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5
+        assert cache.get("a") is None
+
+    def test_keep_existing(self):
+        cache = LRUCache(10)
+        cache.put("a", 2)
+        cache.put("a", 1, keep_existing=lambda existing: existing > 1)
+        assert cache.get("a") == 2
+
+
+class TestCachingOrderRepository:
+    @pytest.fixture
+    def setup(self):
+        self.inner = CountingOrderRepository()
+        self.repo = CachingOrderRepository(self.inner, maxsize=100)
+        self.order = make_order()
+        self.repo.save(self.order)
+
+    def test_reads_are_served_from_cache(self, setup):
+        first = self.repo.get_by_id(self.order.id)
+        first.pay()
+        second = self.repo.get_by_id(self.order.id)
+
+        assert self.inner.reads == 0
+        assert second.status == "pending"
+        assert self.repo.stats()["hits"] == 2
+
+    def test_read_through(self):
+        inner = CountingOrderRepository()
+        order = make_order()
+        inner.save(order)
+        repo = CachingOrderRepository(inner)
+
+        repo.get_by_id(order.id)
+        repo.get_by_id(order.id)
+
+        assert inner.reads == 1
+        assert repo.stats()["misses"] == 1
+
+    def test_write_through(self, setup):
+        order = self.repo.get_by_id(self.order.id)
+        order.pay()
+        self.repo.save(order)
+
+        assert self.inner.get_by_id(self.order.id).status == "paid"
+        assert self.repo.get_by_id(self.order.id).status == "paid"
+
+    def test_conflict_invalidates_entry(self, setup):
+        stale = self.repo.get_by_id(self.order.id)
+        concurrent = self.inner.get_by_id(self.order.id)
+        concurrent.pay()
+        self.inner.save(concurrent)
+        stale.pay()
+
+        with pytest.raises(ConcurrencyConflict):
+            self.repo.save(stale)
+
+        assert self.repo.get_by_id(self.order.id).status == "paid"
+
+    def test_stale_read_does_not_replace_newer_version(self, setup):
+        old = self.inner.get_by_id(self.order.id)
+        newer = self.repo.get_by_id(self.order.id)
+        newer.pay()
+        self.repo.save(newer)
+
+        self.repo._remember(old)
+
+        assert self.repo.get_by_id(self.order.id).status == "paid"
+
+    def test_get_many(self, setup):
+        other = make_order()
+        self.inner.save(other)
+
+        orders = self.repo.get_many([other.id, self.order.id, other.id])
+
+        assert [order.id for order in orders] == [other.id, self.order.id, other.id]
+        assert orders[0] is not orders[2]
+
+    def test_concurrent_access(self, setup):
+        orders = [make_order() for _ in range(50)]
+        self.repo.save_many(orders)
+        errors = []
+
+        def worker():
+            try:
+                for order in orders * 20:
+                    assert self.repo.get_by_id(order.id).id == order.id
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
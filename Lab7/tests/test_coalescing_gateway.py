@@ -0,0 +1,102 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+from domain.value_objects import Money
+from application.interfaces import PaymentGateway
+from infrastructure.coalescing_gateway import CoalescingPaymentGateway
+from infrastructure.payment_gateways import FakePaymentGateway
+
+
+class RecordingPaymentGateway(PaymentGateway):
+    def __init__(self, declined=(), latency=0.0, error=None):
+        self.declined = set(declined)
+        self.latency = latency
+        self.error = error
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def charge(self, order_id, amount):
+        return self.charge_many([(order_id, amount)])[0]
+
+    def charge_many(self, charges):
+        charges = list(charges)
+        with self._lock:
+            self.batches.append(len(charges))
+        time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+        return [order_id not in self.declined for order_id, _ in charges]
+
+
+def charge_concurrently(gateway, order_ids):
+    amount = Money(Decimal('10'))
+    with ThreadPoolExecutor(max_workers=len(order_ids)) as pool:
+        return list(pool.map(lambda order_id: gateway.charge(order_id, amount), order_ids))
+
+
+class TestCoalescingPaymentGateway:
+    def test_routes_each_result_to_its_caller(self):
+        order_ids = [uuid4() for _ in range(50)]
+        declined = set(order_ids[::3])
+        inner = RecordingPaymentGateway(declined, latency=0.01)
+
+        with CoalescingPaymentGateway(inner, max_batch_size=16, max_delay=0.01) as gateway:
+            results = charge_concurrently(gateway, order_ids)
+
+        assert results == [order_id not in declined for order_id in order_ids]
+        assert sum(inner.batches) == len(order_ids)
+        assert len(inner.batches) < len(order_ids)
+        assert max(inner.batches) <= 16
+
+    def test_single_charge_is_sent_after_max_delay(self):
+        inner = RecordingPaymentGateway()
+
+        with CoalescingPaymentGateway(inner, max_batch_size=100, max_delay=0.02) as gateway:
+            started = time.monotonic()
+            assert gateway.charge(uuid4(), Money(Decimal('10'))) is True
+            elapsed = time.monotonic() - started
+
+        assert inner.batches == [1]
+        assert 0.015 <= elapsed < 1
+
+    def test_batch_error_is_raised_in_every_caller(self):
+        inner = RecordingPaymentGateway(error=ConnectionError("gateway unavailable"))
+
+        with CoalescingPaymentGateway(inner, max_batch_size=4, max_delay=0.05) as gateway:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [pool.submit(gateway.charge, uuid4(), Money(Decimal('10'))) for _ in range(4)]
+                for future in futures:
+                    with pytest.raises(ConnectionError):
+                        future.result()
+
+    def test_rejects_charges_after_close(self):
+        gateway = CoalescingPaymentGateway(RecordingPaymentGateway())
+        gateway.close()
+
+        with pytest.raises(RuntimeError):
+            gateway.charge(uuid4(), Money(Decimal('10')))
+
+
+class TestChargeMany:
+    def test_default_charges_one_by_one(self):
+        class SingleChargeGateway(PaymentGateway):
+            def charge(self, order_id, amount):
+                return amount.amount < 100
+
+        charges = [(uuid4(), Money(Decimal('50'))), (uuid4(), Money(Decimal('150')))]
+
+        assert SingleChargeGateway().charge_many(charges) == [True, False]
+
+    def test_fake_gateway_latency_is_per_batch_plus_per_item(self):
+        gateway = FakePaymentGateway(batch_latency=0.02, item_latency=0.001)
+        charges = [(uuid4(), Money(Decimal('10'))) for _ in range(20)]
+
+        started = time.monotonic()
+        results = gateway.charge_many(charges)
+        elapsed = time.monotonic() - started
+
+        assert len(results) == 20
+        assert elapsed >= 0.04
@@ -1,8 +1,13 @@
+import copy
+from array import array
 import pytest
 from uuid import uuid4
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_EVEN
+from domain import line_store
 from domain.entities import Order, OrderLine
-from domain.value_objects import Money, OrderStatus
+from domain.events import OrderLineAdded, OrderPaid
+from domain.line_store import ColumnarLineStore
+from domain.value_objects import CompactMoney, Money, OrderStatus
 from domain.exceptions import DomainException
 
 
@@ -22,6 +27,75 @@ class TestMoney:
         with pytest.raises(ValueError):
             Money(Decimal('-10'))
 
+    def test_money_sum(self):
+        monies = [Money(Decimal('100')), Money(Decimal('0.50')), Money(Decimal('49.50'))]
+        assert Money.sum(monies) == Money(Decimal('150'))
+        assert Money.sum(iter(monies)).amount == (monies[0] + monies[1] + monies[2]).amount
+        assert Money.sum([], "EUR") == Money(Decimal('0'), "EUR")
+
+    def test_money_sum_different_currencies(self):
+        with pytest.raises(ValueError):
+            Money.sum([Money(Decimal('1')), Money(Decimal('1'), "EUR")])
+
+        with pytest.raises(ValueError):
+            Money.sum([Money(Decimal('1'))], "EUR")
+
+    def test_money_sum_by_currency(self):
+        totals = Money.sum_by_currency([Money(Decimal('1')), Money(Decimal('2'), "EUR"), Money(Decimal('3'))])
+        assert totals == {"USD": Money(Decimal('4')), "EUR": Money(Decimal('2'), "EUR")}
+
+
+class TestCompactMoney:
+    def test_from_decimal_round_trip(self):
+        money = CompactMoney.from_decimal(Decimal('100.50'))
+        assert money.minor == 10050
+        assert money.amount == Decimal('100.50')
+        assert money.to_money() == Money(Decimal('100.50'))
+
+    def test_currency_minor_units(self):
+        assert CompactMoney.from_decimal(Decimal('150'), "JPY").minor == 150
+        assert CompactMoney.from_decimal(Decimal('1.234'), "KWD").minor == 1234
+
+    def test_inexact_amount_requires_rounding(self):
+        with pytest.raises(ValueError):
+            CompactMoney.from_decimal(Decimal('0.125'))
+
+        assert CompactMoney.from_decimal(Decimal('0.125'), rounding=ROUND_HALF_EVEN).minor == 12
+        assert CompactMoney.from_decimal(Decimal('0.135'), rounding=ROUND_HALF_EVEN).minor == 14
+
+    def test_addition_and_multiplication(self):
+        m1 = CompactMoney.from_money(Money(Decimal('100')))
+        m2 = CompactMoney.from_money(Money(Decimal('0.50')))
+        assert (m1 + m2).amount == Decimal('100.50')
+        assert (m2 * 3).minor == 150
+
+    def test_different_currencies(self):
+        with pytest.raises(ValueError):
+            CompactMoney(100) + CompactMoney(100, "EUR")
+
+    def test_negative_amount(self):
+        with pytest.raises(ValueError):
+            CompactMoney(-1)
+
+    def test_sum(self):
+        assert CompactMoney.sum([CompactMoney(150), CompactMoney(50)]) == CompactMoney(200)
+        assert CompactMoney.sum([], "EUR") == CompactMoney(0, "EUR")
+
+        with pytest.raises(ValueError):
+            CompactMoney.sum([CompactMoney(1), CompactMoney(1, "EUR")])
+
+    def test_sum_minor_units(self):
+        values = array('q', [2 ** 62, 2 ** 62, 5])
+        assert CompactMoney.sum_minor_units(values).minor == 2 ** 63 + 5
+        assert CompactMoney.sum_minor_units([1, 2, 3], "EUR") == CompactMoney(6, "EUR")
+
+    def test_is_immutable_value(self):
+        money = CompactMoney(100)
+        with pytest.raises(AttributeError):
+            money.minor = 200
+        assert copy.deepcopy(money) == money
+        assert hash(CompactMoney(100)) == hash(money)
+
 
 class TestOrder:
     def test_create_order(self):
@@ -76,3 +150,256 @@ class TestOrder:
         order.add_line(uuid4(), "Product 2", 1, Money(Decimal('40')))
         
         assert order.total_amount == Money(Decimal('100'))  
+
+    def test_total_amount_after_remove_line(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(uuid4(), "Product 1", 2, Money(Decimal('50')))
+        order.add_line(product_id, "Product 2", 1, Money(Decimal('0.50')))
+        order.remove_line(product_id)
+
+        assert order.total_amount == Money(Decimal('100'))
+        assert str(order.total_amount.amount) == "100"
+
+    def test_total_amount_for_initial_lines(self):
+        lines = [
+            OrderLine(uuid4(), "Product 1", 2, Money(Decimal('30'))),
+            OrderLine(uuid4(), "Product 2", 1, Money(Decimal('40'))),
+        ]
+        order = Order(uuid4(), uuid4(), lines)
+
+        assert order.total_amount == Money(Decimal('100'))
+
+    def test_subtotals_per_currency(self):
+        order = Order(uuid4(), uuid4())
+        eur_product_id = uuid4()
+        order.add_line(uuid4(), "Product 1", 2, Money(Decimal('30')))
+        order.add_line(eur_product_id, "Product 2", 1, Money(Decimal('40'), "EUR"))
+
+        assert order.subtotals == {"USD": Money(Decimal('60')), "EUR": Money(Decimal('40'), "EUR")}
+
+        order.remove_line(eur_product_id)
+
+        assert order.subtotals == {"USD": Money(Decimal('60'))}
+
+    def test_remove_line_keeps_lookup_consistent(self):
+        order = Order(uuid4(), uuid4())
+        first_id, second_id, third_id = uuid4(), uuid4(), uuid4()
+        order.add_line(first_id, "Product 1", 1, Money(Decimal('10')))
+        order.add_line(second_id, "Product 2", 1, Money(Decimal('20')))
+        order.add_line(third_id, "Product 3", 1, Money(Decimal('30')))
+
+        order.remove_line(first_id)
+
+        assert len(order.lines) == 2
+        assert order.get_line(first_id) is None
+        assert order.get_line(second_id).product_name == "Product 2"
+        assert order.get_line(third_id).product_name == "Product 3"
+        assert order.total_amount == Money(Decimal('50'))
+
+    def test_remove_line_removes_all_lines_of_product(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(product_id, "Product", 1, Money(Decimal('10')))
+        order.add_line(uuid4(), "Other", 1, Money(Decimal('20')))
+        order.add_line(product_id, "Product", 2, Money(Decimal('10')))
+
+        order.remove_line(product_id)
+
+        assert [line.product_name for line in order.lines] == ["Other"]
+        assert order.total_amount == Money(Decimal('20'))
+
+    @pytest.mark.parametrize("lines", [list, ColumnarLineStore], ids=["list", "columnar"])
+    def test_removing_lines_keeps_the_order_of_the_rest(self, lines):
+        order = Order(uuid4(), uuid4(), lines())
+        ids = [uuid4() for _ in range(4)]
+        for index, product_id in enumerate(ids + [ids[1], ids[2]]):
+            order.add_line(product_id, f"Product {index}", index + 1, Money(Decimal('10')))
+
+        order.remove_line(ids[0])
+        order.update_quantity(ids[1], 7)
+
+        assert [line.product_name for line in order.lines] == ["Product 1", "Product 2", "Product 3", "Product 5"]
+        assert order.get_line(ids[1]).quantity == 7
+        assert order.get_line(ids[3]).product_name == "Product 3"
+        order.remove_line(ids[2])
+        assert [line.product_name for line in order.lines] == ["Product 1", "Product 3"]
+        assert order.total_amount == Money(Decimal('110'))
+
+    def test_update_quantity(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(product_id, "Product", 1, Money(Decimal('10')))
+        order.add_line(product_id, "Product", 4, Money(Decimal('10')))
+
+        order.update_quantity(product_id, 3)
+
+        assert len(order.lines) == 1
+        assert order.get_line(product_id).quantity == 3
+        assert order.total_amount == Money(Decimal('30'))
+
+    def test_update_quantity_errors(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(product_id, "Product", 1, Money(Decimal('10')))
+
+        with pytest.raises(DomainException, match="Quantity must be positive"):
+            order.update_quantity(product_id, 0)
+
+        with pytest.raises(DomainException, match="is not in the order"):
+            order.update_quantity(uuid4(), 1)
+
+        order.pay()
+
+        with pytest.raises(DomainException, match="Cannot modify order after payment"):
+            order.update_quantity(product_id, 2)
+
+    def test_merge_duplicate_lines(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        other_id = uuid4()
+        order.add_line(product_id, "Product", 1, Money(Decimal('10')))
+        order.add_line(other_id, "Other", 1, Money(Decimal('5')))
+        order.add_line(product_id, "Product", 2, Money(Decimal('10')))
+        order.add_line(product_id, "Product", 1, Money(Decimal('12')))
+        order.add_line(other_id, "Other", 3, Money(Decimal('5')))
+
+        order.merge_duplicate_lines()
+
+        quantities = sorted((line.product_name, line.quantity, line.unit_price.amount) for line in order.lines)
+        assert quantities == [("Other", 4, Decimal('5')), ("Product", 1, Decimal('12')), ("Product", 3, Decimal('10'))]
+        assert order.get_line(other_id).quantity == 4
+        assert order.total_amount == Money(Decimal('62'))
+
+    def test_deepcopy_is_independent(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(product_id, "Product", 1, Money(Decimal('10')))
+
+        clone = copy.deepcopy(order)
+        clone.update_quantity(product_id, 3)
+        clone.add_line(uuid4(), "Other", 1, Money(Decimal('5')))
+
+        assert clone.total_amount == Money(Decimal('35'))
+        assert order.total_amount == Money(Decimal('10'))
+        assert order.get_line(product_id).quantity == 1
+        assert len(order.lines) == 1
+
+    def test_total_amount_many(self):
+        first = Order(uuid4(), uuid4())
+        first.add_line(uuid4(), "Product 1", 2, Money(Decimal('30')))
+        second = Order(uuid4(), uuid4())
+        second.add_line(uuid4(), "Product 2", 1, Money(Decimal('40.50')))
+
+        assert Order.total_amount_many([first, second, Order(uuid4(), uuid4())]) == Money(Decimal('100.50'))
+
+
+class TestOrderEvents:
+    def test_add_line_records_event(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(product_id, "Product", 2, Money(Decimal('10')))
+
+        assert order.events == [OrderLineAdded(order.id, 1, OrderLine(product_id, "Product", 2, Money(Decimal('10'))))]
+
+    def test_confirm_payment_records_order_paid(self):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 2, Money(Decimal('10')))
+        order.pay()
+        order.confirm_payment()
+
+        assert order.events[-1] == OrderPaid(order.id, order._version, Money(Decimal('20')))
+        assert order.status == OrderStatus.PAID
+
+    def test_confirm_requires_paid_order(self):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+
+        with pytest.raises(DomainException, match="not paid"):
+            order.confirm_payment()
+
+    def test_apply_replays_events_in_order(self):
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(product_id, "Product", 2, Money(Decimal('10')))
+        order.add_line(uuid4(), "Other", 1, Money(Decimal('5')))
+        order.update_quantity(product_id, 3)
+        order.pay()
+
+        replayed = Order(order.id, order.customer_id)
+        for event in order.events:
+            replayed.apply(event)
+
+        assert replayed == order
+        assert replayed.events == []
+        with pytest.raises(DomainException, match="does not follow"):
+            replayed.apply(order.events[0])
+
+    def test_clear_events(self):
+        order = Order(uuid4(), uuid4(), [OrderLine(uuid4(), "Restored", 1, Money(Decimal('5')))])
+        assert order.events == []
+
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+        copied = copy.deepcopy(order)
+        order.clear_events()
+
+        assert order.events == []
+        assert len(copied.events) == 1
+
+
+class TestColumnarLineStore:
+    def test_order_with_columnar_lines(self):
+        order = Order(uuid4(), uuid4(), ColumnarLineStore())
+        product_id = uuid4()
+        order.add_line(product_id, "Product 1", 2, Money(Decimal('30')))
+        order.add_line(uuid4(), "Product 2", 1, Money(Decimal('40.50')))
+
+        assert len(order.lines) == 2
+        assert order.lines[0] == OrderLine(product_id, "Product 1", 2, Money(Decimal('30')))
+        assert order.total_amount == Money(Decimal('100.50'))
+
+        order.remove_line(product_id)
+
+        assert [line.product_name for line in order.lines] == ["Product 2"]
+        assert order.total_amount == Money(Decimal('40.50'))
+
+    def test_lines_match_list_backed_order(self):
+        lines = [
+            OrderLine(uuid4(), "Product 1", 3, Money(Decimal('1.25'))),
+            OrderLine(uuid4(), "Product 2", 1, Money(Decimal('7'), "EUR")),
+        ]
+        store = ColumnarLineStore(lines)
+
+        assert list(store) == lines
+        assert store == lines
+        assert Order(uuid4(), uuid4(), store).total_amount == Order(uuid4(), uuid4(), list(lines)).total_amount
+
+    def test_price_must_fit_minor_units(self):
+        order = Order(uuid4(), uuid4(), ColumnarLineStore())
+
+        with pytest.raises(ValueError):
+            order.add_line(uuid4(), "Product", 1, Money(Decimal('0.001')))
+
+        assert len(order.lines) == 0
+
+    def test_totals_by_currency(self, monkeypatch):
+        store = ColumnarLineStore([
+            OrderLine(uuid4(), "Product 1", 3, Money(Decimal('1.25'))),
+            OrderLine(uuid4(), "Product 2", 2, Money(Decimal('7'), "EUR")),
+            OrderLine(uuid4(), "Product 3", 1, Money(Decimal('0.25'))),
+        ])
+        expected = {"USD": Money(Decimal('4')), "EUR": Money(Decimal('14'), "EUR")}
+
+        assert store.totals_by_currency() == expected
+
+        monkeypatch.setattr(line_store, "np", None)
+
+        assert store.totals_by_currency() == expected
+
+    def test_copy_is_independent(self):
+        store = ColumnarLineStore([OrderLine(uuid4(), "Product 1", 3, Money(Decimal('1.25')))])
+        clone = store.copy()
+        clone.append(OrderLine(uuid4(), "Product 2", 1, Money(Decimal('2'))))
+
+        assert len(store) == 1
+        assert len(clone) == 2
@@ -0,0 +1,107 @@
+import random
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order, OrderLine
+from domain.events import OrderLineAdded, OrderLineRemoved, OrderPaymentStarted
+from domain.value_objects import Money
+from application.use_cases import PayOrderUseCase
+from infrastructure.event_sourced_repository import EventSourcedOrderRepository
+from tests.test_use_cases import ScriptedPaymentGateway
+
+
+def mutate_randomly(order: Order, rng: random.Random, products) -> None:
+    action = rng.random()
+    product_id = rng.choice(products)
+    if action < 0.5 or order.get_line(product_id) is None:
+        order.add_line(product_id, "Product", rng.randint(1, 5), Money(Decimal(rng.randint(100, 999)).scaleb(-2)))
+    elif action < 0.7:
+        order.remove_line(product_id)
+    elif action < 0.9:
+        order.update_quantity(product_id, rng.randint(1, 5))
+    else:
+        order.merge_duplicate_lines()
+
+
+class TestEventSourcedOrderRepository:
+    @pytest.mark.parametrize("snapshot_interval", [None, 1, 7])
+    def test_rehydrated_order_matches_saved_one(self, snapshot_interval):
+        repo = EventSourcedOrderRepository(snapshot_interval)
+        rng = random.Random(snapshot_interval)
+        products = [uuid4() for _ in range(5)]
+        order = Order(uuid4(), uuid4())
+        repo.save(order)
+
+        for _ in range(60):
+            for _ in range(rng.randint(1, 3)):
+                mutate_randomly(order, rng, products)
+            repo.save(order)
+            loaded = repo.get_by_id(order.id)
+
+            assert loaded == order
+            assert loaded.lines == order.lines
+            assert loaded.total_amount == order.total_amount
+            assert loaded._version == order._version
+
+    def test_history_is_the_full_event_stream(self):
+        repo = EventSourcedOrderRepository(snapshot_interval=2)
+        order = Order(uuid4(), uuid4())
+        product_id = uuid4()
+        order.add_line(product_id, "Product", 1, Money(Decimal('10')))
+        order.add_line(uuid4(), "Other", 1, Money(Decimal('5')))
+        repo.save(order)
+        order.remove_line(product_id)
+        order.pay()
+        repo.save(order)
+
+        history = repo.history(order.id)
+
+        assert [type(event) for event in history] == [OrderLineAdded, OrderLineAdded, OrderLineRemoved,
+                                                      OrderPaymentStarted]
+        assert [event.version for event in history] == [1, 2, 3, 4]
+
+    def test_snapshots_bound_replayed_events(self, monkeypatch):
+        repo = EventSourcedOrderRepository(snapshot_interval=10)
+        order = Order(uuid4(), uuid4())
+        repo.save(order)
+        for index in range(95):
+            order.add_line(uuid4(), f"Product {index}", 1, Money(Decimal('1')))
+            repo.save(order)
+
+        replayed = []
+        original_apply = Order.apply
+        monkeypatch.setattr(Order, "apply", lambda self, event: (replayed.append(event), original_apply(self, event)))
+        loaded = repo.get_by_id(order.id)
+
+        assert len(loaded.lines) == 95
+        assert len(replayed) < 10
+
+    def test_constructor_lines_are_kept_by_the_first_snapshot(self):
+        repo = EventSourcedOrderRepository(snapshot_interval=None)
+        order = Order(uuid4(), uuid4(), [OrderLine(uuid4(), "Restored", 2, Money(Decimal('4')))])
+        repo.save(order)
+        order.add_line(uuid4(), "Added", 1, Money(Decimal('1')))
+        repo.save(order)
+
+        assert repo.get_by_id(order.id).total_amount == Money(Decimal('9'))
+
+    def test_rejects_changes_without_events(self):
+        repo = EventSourcedOrderRepository()
+        order = Order(uuid4(), uuid4())
+        repo.save(order)
+        order._version += 1
+
+        with pytest.raises(ValueError, match="not recorded"):
+            repo.save(order)
+
+    def test_pay_order_use_case(self):
+        repo = EventSourcedOrderRepository(snapshot_interval=3)
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 2, Money(Decimal('50')))
+        repo.save(order)
+
+        result = PayOrderUseCase(repo, ScriptedPaymentGateway()).execute(order.id)
+
+        assert result.success is True
+        assert repo.get_by_id(order.id).status == "paid"
+        assert len(repo.history(order.id)) == 3
@@ -0,0 +1,176 @@
+import threading
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.value_objects import Money
+from application.interfaces import PaymentGateway
+from application.use_cases import IdempotentPayOrderUseCase, PayOrderUseCase
+from infrastructure.idempotency_store import InMemoryIdempotencyStore
+from tests.test_caching_repository import CountingOrderRepository, FakeClock
+
+
+class BlockingPaymentGateway(PaymentGateway):
+    def __init__(self, results=(True,)):
+        self.results = list(results)
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def charge(self, order_id, amount):
+        self.calls += 1
+        self.release.wait()
+        result = self.results[min(self.calls, len(self.results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class TestIdempotentPayOrderUseCase:
+    @pytest.fixture
+    def setup(self):
+        self.order_repo = CountingOrderRepository()
+        self.gateway = BlockingPaymentGateway()
+        self.store = InMemoryIdempotencyStore()
+        self.use_case = IdempotentPayOrderUseCase(PayOrderUseCase(self.order_repo, self.gateway), self.store)
+
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Test Product", 2, Money(Decimal('50')))
+        self.order_repo.save(order)
+        self.order_id = order.id
+
+    def test_retry_is_answered_from_store(self, setup):
+        first = self.use_case.execute(self.order_id, "key-1")
+        reads = self.order_repo.reads
+
+        retry = self.use_case.execute(self.order_id, "key-1")
+
+        assert first.success is True
+        assert retry == first
+        assert self.order_repo.reads == reads
+        assert self.gateway.calls == 1
+
+    def test_new_key_reaches_use_case(self, setup):
+        self.use_case.execute(self.order_id, "key-1")
+
+        result = self.use_case.execute(self.order_id, "key-2")
+
+        assert result.success is False
+        assert "already paid" in result.message.lower()
+
+    def test_default_key_is_order_and_attempt(self, setup):
+        self.gateway.results = [False, True]
+
+        declined = self.use_case.execute(self.order_id)
+        assert declined.success is False
+        assert self.use_case.execute(self.order_id) == declined
+
+        assert self.use_case.execute(self.order_id, attempt=1).success is True
+        assert self.gateway.calls == 2
+
+    def test_concurrent_duplicates_share_one_gateway_call(self, setup):
+        self.gateway.release.clear()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.use_case.execute(self.order_id, "key")))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        while self.gateway.calls == 0:
+            threading.Event().wait(0.001)
+        self.gateway.release.set()
+        for thread in threads:
+            thread.join()
+
+        assert self.gateway.calls == 1
+        assert len(results) == 8
+        assert all(result.success for result in results)
+
+    def test_key_reused_for_another_order_is_rejected(self, setup):
+        other = Order(uuid4(), uuid4())
+        other.add_line(uuid4(), "Other Product", 1, Money(Decimal('10')))
+        self.order_repo.save(other)
+        self.use_case.execute(self.order_id, "key")
+
+        result = self.use_case.execute(other.id, "key")
+
+        assert result.success is False
+        assert result.message == f"Idempotency key key was already used for order {self.order_id}"
+        assert self.gateway.calls == 1
+        assert self.order_repo.get_by_id(other.id).status == "pending"
+
+    def test_only_final_outcomes_are_stored(self, setup):
+        self.gateway.results = [ConnectionError("gateway unavailable"), True]
+
+        failed = self.use_case.execute(self.order_id, "key")
+        assert failed.message == "Unexpected error: gateway unavailable"
+
+        paid = self.use_case.execute(self.order_id, "key")
+        assert paid.success is True
+        assert self.use_case.execute(self.order_id, "key") == paid
+        assert self.gateway.calls == 2
+
+    def test_domain_errors_are_stored(self, setup):
+        empty = Order(uuid4(), uuid4())
+        self.order_repo.save(empty)
+
+        failed = self.use_case.execute(empty.id, "key")
+        empty.add_line(uuid4(), "Late Product", 1, Money(Decimal('10')))
+        self.order_repo.save(empty)
+
+        assert "empty order" in failed.message
+        assert self.use_case.execute(empty.id, "key") == failed
+
+    def test_leader_error_is_raised_to_waiting_duplicates(self, setup):
+        release = threading.Event()
+
+        class CrashingUseCase:
+            def execute(self, order_id):
+                release.wait()
+                raise RuntimeError("use case crashed")
+
+        use_case = IdempotentPayOrderUseCase(CrashingUseCase(), self.store)
+        errors = []
+
+        def call():
+            try:
+                use_case.execute(self.order_id, "key")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        threading.Event().wait(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert [(type(error), str(error)) for error in errors] == [(RuntimeError, "use case crashed")] * 4
+
+    def test_returned_results_are_copies(self, setup):
+        self.use_case.execute(self.order_id, "key").message = "changed"
+
+        assert self.use_case.execute(self.order_id, "key").message == "Order paid successfully"
+
+
+class TestInMemoryIdempotencyStore:
+    def test_expires_after_ttl(self):
+        clock = FakeClock()
+        store = InMemoryIdempotencyStore(ttl=10, clock=clock)
+        store.put("key", "result")
+
+        clock.now = 9
+        assert store.get("key") == "result"
+        clock.now = 10
+        assert store.get("key") is None
+
+    def test_evicts_least_recently_used(self):
+        store = InMemoryIdempotencyStore(maxsize=2)
+        store.put("a", 1)
+        store.put("b", 2)
+        store.get("a")
+        store.put("c", 3)
+
+        assert store.get("b") is None
+        assert store.get("a") == 1
+        assert store.stats()["evictions"] == 1
@@ -0,0 +1,145 @@
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from domain.entities import Order
+from domain.exceptions import DomainException
+from domain.value_objects import Money
+from application.interfaces import PaymentListener
+from application.use_cases import PayOrderUseCase
+from infrastructure.metrics import HistogramCollector
+from infrastructure.repositories import InMemoryOrderRepository
+from tests.test_use_cases import ScriptedPaymentGateway
+
+
+class RecordingListener(PaymentListener):
+    def __init__(self):
+        self.stages = []
+
+    def on_stage(self, stage, duration, outcome, error=None):
+        assert duration >= 0
+        self.stages.append((stage, outcome, error))
+
+
+class FailingListener(RecordingListener):
+    def on_stage(self, stage, duration, outcome, error=None):
+        super().on_stage(stage, duration, outcome, error)
+        raise RuntimeError("metrics backend down")
+
+
+class TestPaymentListener:
+    @pytest.fixture
+    def setup(self):
+        self.order_repo = InMemoryOrderRepository()
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Test Product", 2, Money(Decimal('50')))
+        self.order_repo.save(order)
+        self.order_id = order.id
+        self.listener = RecordingListener()
+
+    def execute(self, gateway, order_id=None):
+        use_case = PayOrderUseCase(self.order_repo, gateway, listener=self.listener)
+        return use_case.execute(order_id or self.order_id)
+
+    def test_successful_payment_stages(self, setup):
+        self.execute(ScriptedPaymentGateway())
+
+        assert self.listener.stages == [
+            ("get_by_id", "ok", None),
+            ("pay", "ok", None),
+            ("save", "ok", None),
+            ("charge", "approved", None),
+            ("save", "ok", None),
+            ("execute", "paid", None),
+        ]
+
+    def test_declined_payment_stages(self, setup):
+        self.execute(ScriptedPaymentGateway(declined={self.order_id}))
+
+        assert self.listener.stages[3:] == [
+            ("charge", "declined", None),
+            ("save", "ok", None),
+            ("execute", "declined", None),
+        ]
+
+    def test_gateway_error_reports_exception_type(self, setup):
+        self.execute(ScriptedPaymentGateway(failing={self.order_id}))
+
+        assert ("charge", "error", ConnectionError) in self.listener.stages
+        assert self.listener.stages[-1] == ("execute", "failed", None)
+
+    def test_domain_error_in_pay(self, setup):
+        empty_order = Order(uuid4(), uuid4())
+        self.order_repo.save(empty_order)
+
+        self.execute(ScriptedPaymentGateway(), empty_order.id)
+
+        assert self.listener.stages == [
+            ("get_by_id", "ok", None),
+            ("pay", "error", DomainException),
+            ("execute", "failed", None),
+        ]
+
+    def test_failing_listener_does_not_change_the_payment(self, setup):
+        self.listener = FailingListener()
+        gateway = ScriptedPaymentGateway()
+
+        result = self.execute(gateway)
+
+        assert (result.success, result.message) == (True, "Order paid successfully")
+        assert gateway.charges[self.order_id] == 1
+        assert self.order_repo.get_by_id(self.order_id).status == "paid"
+        assert [stage for stage, _, _ in self.listener.stages] == [
+            "get_by_id", "pay", "save", "charge", "save", "execute"]
+
+    def test_no_listener_uses_collaborators_directly(self, setup):
+        gateway = ScriptedPaymentGateway()
+        use_case = PayOrderUseCase(self.order_repo, gateway)
+
+        assert use_case.order_repo is self.order_repo
+        assert use_case.payment_gateway is gateway
+
+
+class TestHistogramCollector:
+    def test_percentiles(self):
+        collector = HistogramCollector()
+        for millis in range(1, 101):
+            collector.on_stage("charge", millis / 1000, "approved")
+
+        report = collector.report()["charge"]
+
+        assert report["count"] == 100
+        assert report["p50"] == pytest.approx(0.050, rel=0.05)
+        assert report["p95"] == pytest.approx(0.095, rel=0.05)
+        assert report["p99"] == pytest.approx(0.099, rel=0.05)
+        assert report["max"] == 0.1
+
+    def test_counts_outcomes_and_errors(self):
+        collector = HistogramCollector()
+        collector.on_stage("charge", 0.01, "approved")
+        collector.on_stage("charge", 0.02, "error", ConnectionError)
+        collector.on_stage("charge", 0.0, "error", ConnectionError)
+
+        report = collector.report()["charge"]
+
+        assert report["outcomes"] == {"approved": 1, "error": 2}
+        assert report["errors"] == {"ConnectionError": 2}
+        assert collector.percentile("charge", 1) == 0.0
+
+    def test_collects_from_use_case(self):
+        repo = InMemoryOrderRepository()
+        order_ids = []
+        for _ in range(10):
+            order = Order(uuid4(), uuid4())
+            order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+            repo.save(order)
+            order_ids.append(order.id)
+        collector = HistogramCollector()
+        use_case = PayOrderUseCase(repo, ScriptedPaymentGateway(declined=order_ids[:3]), listener=collector)
+
+        for order_id in order_ids:
+            use_case.execute(order_id)
+
+        report = collector.report()
+        assert report["execute"]["outcomes"] == {"paid": 7, "declined": 3}
+        assert report["save"]["count"] == 20
+        assert "charge" in collector.format_report()
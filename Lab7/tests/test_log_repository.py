@@ -0,0 +1,104 @@
+import os
+import pytest
+from uuid import uuid4
+from decimal import Decimal
+from domain.value_objects import Money
+from application.exceptions import ConcurrencyConflict
+from infrastructure.log_repository import LogStructuredOrderRepository
+from tests.helpers import MIXED_LINES, make_order
+
+
+def segment_files(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if name.startswith("segment-"))
+
+
+class TestLogStructuredOrderRepository:
+    def test_save_and_get(self, tmp_path):
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            order = make_order(*MIXED_LINES)
+            repo.save(order)
+            order.pay()
+            repo.save(order)
+
+            loaded = repo.get_by_id(order.id)
+
+        assert loaded == order
+        assert loaded.status == "paid"
+
+    def test_save_clears_events(self, tmp_path):
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            order = make_order(*MIXED_LINES)
+            repo.save_many([order])
+
+        assert order.events == []
+
+    def test_get_missing_order(self, tmp_path):
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            with pytest.raises(ValueError, match="not found"):
+                repo.get_by_id(uuid4())
+
+    def test_stale_save_is_rejected(self, tmp_path):
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            order = make_order(*MIXED_LINES)
+            repo.save(order)
+            first = repo.get_by_id(order.id)
+            second = repo.get_by_id(order.id)
+            first.pay()
+            second.pay()
+            repo.save(first)
+
+            with pytest.raises(ConcurrencyConflict):
+                repo.save(second)
+
+    def test_reopen_after_clean_close(self, tmp_path):
+        orders = [make_order(*MIXED_LINES) for _ in range(2000)]
+        with LogStructuredOrderRepository(str(tmp_path), segment_size=20_000) as repo:
+            repo.save_many(orders)
+
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            assert all(repo.get_by_id(order.id) == order for order in orders)
+            repo.save(orders[0])
+
+    def test_recovery_after_crash_replays_log(self, tmp_path):
+        orders = [make_order(*MIXED_LINES) for _ in range(50)]
+        repo = LogStructuredOrderRepository(str(tmp_path), segment_size=2_000)
+        repo.save_many(orders[:25])
+        repo.checkpoint()
+        repo.save_many(orders[25:])
+        orders[0].pay()
+        repo.save(orders[0])
+        # Simulate a crash: no close(), plus a torn record at the tail.
+        repo._writer.write(b"\x10\x00\x00\x00garbage")
+        repo._writer.flush()
+
+        with LogStructuredOrderRepository(str(tmp_path)) as recovered:
+            assert all(recovered.get_by_id(order.id) == order for order in orders)
+            assert recovered.get_by_id(orders[0].id).status == "paid"
+
+    def test_rebuild_without_index(self, tmp_path):
+        orders = [make_order(*MIXED_LINES) for _ in range(20)]
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            repo.save_many(orders)
+        os.remove(tmp_path / "index.bin")
+
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            assert all(repo.get_by_id(order.id) == order for order in orders)
+
+    def test_compaction_drops_superseded_records(self, tmp_path):
+        order = make_order(*MIXED_LINES)
+        others = [make_order(*MIXED_LINES) for _ in range(5)]
+        with LogStructuredOrderRepository(str(tmp_path), segment_size=1_000) as repo:
+            repo.save_many(others)
+            for _ in range(30):
+                order.add_line(uuid4(), "Extra", 1, Money(Decimal('1')))
+                repo.save(order)
+            segments_before = segment_files(tmp_path)
+
+            repo.compact()
+
+            assert len(segment_files(tmp_path)) < len(segments_before)
+            assert repo.get_by_id(order.id) == order
+            assert all(repo.get_by_id(other.id) == other for other in others)
+
+        with LogStructuredOrderRepository(str(tmp_path)) as repo:
+            assert repo.get_by_id(order.id) == order
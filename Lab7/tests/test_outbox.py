@@ -0,0 +1,197 @@
+import threading
+import time
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from domain.events import OrderLineAdded, OrderPaid, OrderPaymentReverted, OrderPaymentStarted
+from domain.value_objects import Money
+from application.exceptions import ConcurrencyConflict
+from application.use_cases import PayOrderUseCase
+from infrastructure.caching_repository import CachingOrderRepository
+from infrastructure.event_codec import decode_event, encode_event
+from infrastructure.outbox_dispatcher import OutboxDispatcher
+from infrastructure.repositories import InMemoryOrderRepository, ShardedOrderRepository
+from infrastructure.sqlite_repository import SqliteOrderRepository
+from tests.helpers import MIXED_LINES, make_order
+from tests.test_use_cases import ScriptedPaymentGateway
+
+
+@pytest.fixture(params=["in-memory", "sharded", "sqlite-write-behind", "sqlite-synchronous", "caching"])
+def repo(request, tmp_path):
+    if request.param == "in-memory":
+        yield InMemoryOrderRepository()
+    elif request.param == "sharded":
+        yield ShardedOrderRepository(shards=4)
+    elif request.param == "caching":
+        yield CachingOrderRepository(InMemoryOrderRepository())
+    else:
+        repo = SqliteOrderRepository(str(tmp_path / "orders.db"), write_behind=request.param == "sqlite-write-behind")
+        yield repo
+        repo.close()
+
+
+def fetch_all(repo):
+    if isinstance(repo, SqliteOrderRepository):
+        repo.flush()
+    return repo.fetch_pending(limit=1000)
+
+
+class TestOutbox:
+    def test_save_moves_events_to_outbox(self, repo):
+        order = make_order(*MIXED_LINES)
+        events = order.events
+
+        repo.save(order)
+
+        assert order.events == []
+        assert [entry.event for entry in fetch_all(repo)] == events
+        assert repo.get_by_id(order.id).events == []
+
+    def test_acknowledged_entries_are_not_fetched_again(self, repo):
+        first, second = make_order(*MIXED_LINES), make_order(*MIXED_LINES)
+        repo.save_many([first, second])
+
+        entries = fetch_all(repo)
+        repo.acknowledge(entry.id for entry in entries[:3])
+
+        assert fetch_all(repo) == entries[3:]
+
+    def test_rejected_save_writes_no_events(self, repo):
+        order = make_order(*MIXED_LINES)
+        repo.save(order)
+        fetch_all(repo)
+        repo.acknowledge(entry.id for entry in fetch_all(repo))
+
+        stale = repo.get_by_id(order.id)
+        order.add_line(uuid4(), "Extra", 1, Money(Decimal('1')))
+        repo.save(order)
+        stale.add_line(uuid4(), "Lost", 1, Money(Decimal('1')))
+        with pytest.raises(ConcurrencyConflict):
+            repo.save(stale)
+
+        assert [entry.event.line.product_name for entry in fetch_all(repo)] == ["Extra"]
+
+    def test_events_of_one_order_keep_their_order(self, repo):
+        order = make_order(*MIXED_LINES)
+        repo.save(order)
+        for index in range(5):
+            order.add_line(uuid4(), f"Product {index}", 1, Money(Decimal('1')))
+            repo.save(order)
+
+        versions = [entry.event.version for entry in fetch_all(repo)]
+        assert versions == sorted(versions)
+        assert len(versions) == 7
+
+
+class TestPaymentEvents:
+    def test_paid_order_publishes_order_paid(self):
+        repo = InMemoryOrderRepository()
+        order = make_order(*MIXED_LINES)
+        repo.save(order)
+        repo.acknowledge(entry.id for entry in repo.fetch_pending())
+
+        result = PayOrderUseCase(repo, ScriptedPaymentGateway()).execute(order.id)
+
+        assert result.success is True
+        events = [entry.event for entry in repo.fetch_pending()]
+        assert events == [
+            OrderPaymentStarted(order.id, order._version + 1),
+            OrderPaid(order.id, order._version + 2, order.total_amount),
+        ]
+
+    def test_declined_payment_is_not_announced_as_paid(self):
+        repo = InMemoryOrderRepository()
+        order = make_order(*MIXED_LINES)
+        repo.save(order)
+        repo.acknowledge(entry.id for entry in repo.fetch_pending())
+
+        PayOrderUseCase(repo, ScriptedPaymentGateway(declined={order.id})).execute(order.id)
+
+        assert [type(entry.event) for entry in repo.fetch_pending()] == [OrderPaymentStarted, OrderPaymentReverted]
+
+    def test_execute_many_publishes_order_paid(self):
+        repo = ShardedOrderRepository()
+        orders = [make_order(*MIXED_LINES) for _ in range(10)]
+        repo.save_many(orders)
+        repo.acknowledge(entry.id for entry in repo.fetch_pending(limit=100))
+
+        PayOrderUseCase(repo, ScriptedPaymentGateway(declined={orders[0].id})).execute_many(o.id for o in orders)
+
+        paid = {entry.event.order_id for entry in repo.fetch_pending(limit=100) if isinstance(entry.event, OrderPaid)}
+        assert paid == {order.id for order in orders[1:]}
+
+
+class TestOutboxDispatcher:
+    def test_delivers_in_background(self):
+        repo = InMemoryOrderRepository()
+        delivered = []
+        done = threading.Event()
+
+        def publish(events):
+            delivered.extend(events)
+            if len(delivered) >= 4:
+                done.set()
+
+        with OutboxDispatcher(repo, publish, poll_interval=0.005):
+            repo.save_many([make_order(*MIXED_LINES), make_order(*MIXED_LINES)])
+            assert done.wait(2)
+
+        assert len(delivered) == 4
+        assert repo.fetch_pending() == []
+
+    def test_failed_publish_is_redelivered(self):
+        repo = InMemoryOrderRepository()
+        repo.save(make_order(*MIXED_LINES))
+        attempts = []
+
+        def publish(events):
+            attempts.append(events)
+            if len(attempts) == 1:
+                raise ConnectionError("broker unavailable")
+
+        dispatcher = OutboxDispatcher(repo, publish, background=False)
+        with pytest.raises(ConnectionError):
+            dispatcher.drain()
+        assert dispatcher.drain() == 2
+
+        assert attempts[0] == attempts[1]
+        assert repo.fetch_pending() == []
+
+    def test_batches(self):
+        repo = InMemoryOrderRepository()
+        repo.save_many([make_order(*MIXED_LINES) for _ in range(5)])
+        sizes = []
+
+        dispatcher = OutboxDispatcher(repo, lambda events: sizes.append(len(events)), batch_size=4, background=False)
+
+        assert dispatcher.drain() == 10
+        assert sizes == [4, 4, 2]
+
+    def test_background_retries_after_failure(self):
+        repo = InMemoryOrderRepository()
+        repo.save(make_order(*MIXED_LINES))
+        calls = []
+
+        def publish(events):
+            calls.append(len(events))
+            if len(calls) < 3:
+                raise ConnectionError("broker unavailable")
+
+        dispatcher = OutboxDispatcher(repo, publish, poll_interval=0.001, retry_interval=0.001)
+        deadline = time.monotonic() + 2
+        while repo.fetch_pending() and time.monotonic() < deadline:
+            time.sleep(0.001)
+        dispatcher.close()
+
+        assert dispatcher.failures == 2
+        assert dispatcher.delivered == 2
+
+
+def test_event_codec_round_trip():
+    order = make_order(*MIXED_LINES)
+    order.pay()
+    order.confirm_payment()
+
+    for event in order.events:
+        assert decode_event(encode_event(event)) == event
+    assert isinstance(order.events[0], OrderLineAdded)
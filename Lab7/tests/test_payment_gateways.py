@@ -0,0 +1,120 @@
+import asyncio
+import random
+import statistics
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from uuid import uuid4
+from domain.value_objects import Money
+from infrastructure.payment_gateways import (
+    AsyncFakePaymentGateway, BimodalLatency, FakePaymentGateway, FixedLatency, LogNormalLatency, Outage,
+)
+from tests.test_caching_repository import FakeClock
+
+
+AMOUNT = Money(Decimal('10'))
+
+
+def charge_times(gateway, times):
+    return [gateway.charge(uuid4(), AMOUNT) for _ in range(times)]
+
+
+class TestFakePaymentGateway:
+    def test_same_seed_repeats_outcomes_and_latencies(self):
+        sleeps = {1: [], 2: []}
+        runs = {}
+        for run in (1, 2):
+            gateway = FakePaymentGateway(latency=LogNormalLatency(0.01), seed=7, sleep=sleeps[run].append)
+            runs[run] = charge_times(gateway, 200)
+
+        assert runs[1] == runs[2]
+        assert sleeps[1] == sleeps[2]
+
+    def test_decline_rate(self):
+        gateway = FakePaymentGateway(success_rate=0.8, seed=1)
+
+        approved = sum(charge_times(gateway, 10_000))
+
+        assert approved == pytest.approx(8_000, rel=0.03)
+
+    def test_default_keeps_eighty_percent_success_and_no_latency(self):
+        gateway = FakePaymentGateway(sleep=lambda seconds: pytest.fail("unexpected sleep"))
+
+        assert sum(charge_times(gateway, 10_000)) == pytest.approx(8_000, rel=0.05)
+
+    def test_latency_distributions(self):
+        rng = random.Random(3)
+        assert FixedLatency(0.02).sample(rng) == 0.02
+
+        lognormal = [LogNormalLatency(0.01, 0.5).sample(rng) for _ in range(10_000)]
+        assert statistics.median(lognormal) == pytest.approx(0.01, rel=0.05)
+        assert max(lognormal) > 0.04
+
+        bimodal = BimodalLatency(FixedLatency(0.005), FixedLatency(0.5), slow_share=0.1)
+        samples = [bimodal.sample(rng) for _ in range(10_000)]
+        assert set(samples) == {0.005, 0.5}
+        assert samples.count(0.5) == pytest.approx(1_000, rel=0.1)
+
+    def test_outage_window_fails_calls(self):
+        clock = FakeClock()
+        sleeps = []
+        gateway = FakePaymentGateway(success_rate=1.0, outages=[Outage(10, 20, latency=2.0)],
+                                     clock=clock, sleep=sleeps.append)
+
+        assert gateway.charge(uuid4(), AMOUNT) is True
+        clock.now = 15
+        with pytest.raises(ConnectionError):
+            gateway.charge(uuid4(), AMOUNT)
+        assert sleeps == [2.0]
+        clock.now = 20
+        assert gateway.charge(uuid4(), AMOUNT) is True
+
+        assert [call.failed for call in gateway.calls] == [False, True, False]
+
+    def test_concurrency_limit(self):
+        in_progress = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def sleep(seconds):
+            nonlocal in_progress, peak
+            with lock:
+                in_progress += 1
+                peak = max(peak, in_progress)
+            threading.Event().wait(seconds)
+            with lock:
+                in_progress -= 1
+
+        gateway = FakePaymentGateway(batch_latency=0.01, max_concurrency=3, sleep=sleep)
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda _: gateway.charge(uuid4(), AMOUNT), range(24)))
+
+        assert peak == 3
+        assert max(call.queued for call in gateway.calls) > 0.005
+
+    def test_records_call_timings(self):
+        clock = FakeClock()
+
+        def sleep(seconds):
+            clock.now += seconds
+
+        gateway = FakePaymentGateway(batch_latency=0.01, item_latency=0.001, success_rate=1.0,
+                                     clock=clock, sleep=sleep)
+        gateway.charge_many([(uuid4(), AMOUNT) for _ in range(5)])
+
+        call = gateway.calls[0]
+        assert call.items == 5
+        assert call.approved == 5
+        assert call.duration == pytest.approx(0.015)
+        gateway.reset_calls()
+        assert gateway.calls == []
+
+
+class TestAsyncFakePaymentGateway:
+    def test_seeded_outcomes(self):
+        async def run():
+            gateway = AsyncFakePaymentGateway(latency=FixedLatency(0.0), seed=5)
+            return [await gateway.charge(uuid4(), AMOUNT) for _ in range(100)]
+
+        assert asyncio.run(run()) == asyncio.run(run())
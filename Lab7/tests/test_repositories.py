@@ -0,0 +1,172 @@
+import threading
+import pytest
+from uuid import uuid4
+from decimal import Decimal
+from domain.entities import Order
+from domain.value_objects import Money
+from application.exceptions import ConcurrencyConflict
+from infrastructure.event_sourced_repository import EventSourcedOrderRepository
+from infrastructure.repositories import InMemoryOrderRepository, ShardedOrderRepository
+from tests.helpers import make_order
+
+
+@pytest.fixture(params=[InMemoryOrderRepository, ShardedOrderRepository, EventSourcedOrderRepository])
+def repo(request):
+    return request.param()
+
+
+class TestOrderRepository:
+    def test_get_returns_copy(self, repo):
+        order = make_order()
+        repo.save(order)
+
+        loaded = repo.get_by_id(order.id)
+        loaded.pay()
+
+        assert loaded is not order
+        assert repo.get_by_id(order.id).status == "pending"
+
+    def test_get_missing_order(self, repo):
+        with pytest.raises(ValueError, match="not found"):
+            repo.get_by_id(uuid4())
+
+    def test_stale_save_is_rejected(self, repo):
+        order = make_order()
+        repo.save(order)
+
+        first = repo.get_by_id(order.id)
+        second = repo.get_by_id(order.id)
+        first.pay()
+        second.pay()
+        repo.save(first)
+
+        with pytest.raises(ConcurrencyConflict):
+            repo.save(second)
+
+    def test_sequential_saves_of_same_instance(self, repo):
+        order = make_order()
+        repo.save(order)
+        order.add_line(uuid4(), "Other", 1, Money(Decimal('5')))
+        repo.save(order)
+        order.pay()
+        repo.save(order)
+
+        assert repo.get_by_id(order.id).total_amount == Money(Decimal('15'))
+
+    def test_new_order_cannot_overwrite_existing(self, repo):
+        order = make_order()
+        repo.save(order)
+
+        duplicate = Order(order.id, uuid4())
+
+        with pytest.raises(ConcurrencyConflict):
+            repo.save(duplicate)
+
+    def test_get_many_preserves_order(self, repo):
+        orders = [make_order() for _ in range(20)]
+        repo.save_many(orders)
+
+        ids = [order.id for order in reversed(orders)]
+
+        assert [order.id for order in repo.get_many(ids)] == ids
+
+    def test_get_many_missing_order(self, repo):
+        order = make_order()
+        repo.save(order)
+
+        with pytest.raises(ValueError, match="not found"):
+            repo.get_many([order.id, uuid4()])
+
+
+class TestShardedOrderRepository:
+    def test_save_many_is_all_or_nothing(self):
+        repo = ShardedOrderRepository(shards=4)
+        orders = [make_order() for _ in range(10)]
+        repo.save_many(orders)
+
+        loaded = repo.get_many([order.id for order in orders])
+        for order in loaded:
+            order.add_line(uuid4(), "Extra", 1, Money(Decimal('1')))
+
+        concurrent = repo.get_by_id(orders[3].id)
+        concurrent.pay()
+        repo.save(concurrent)
+
+        with pytest.raises(ConcurrencyConflict):
+            repo.save_many(loaded)
+
+        assert all(len(order.lines) == 1 for order in repo.get_many([order.id for order in orders]))
+
+    def test_invalid_shard_count(self):
+        with pytest.raises(ValueError):
+            ShardedOrderRepository(shards=0)
+
+
+class TestSecondaryIndexes:
+    def test_find_by_customer_pages(self):
+        repo = InMemoryOrderRepository()
+        customer_id = uuid4()
+        orders = []
+        for _ in range(5):
+            order = Order(uuid4(), customer_id)
+            order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+            repo.save(order)
+            orders.append(order)
+        repo.save(make_order())
+
+        first = repo.find_by_customer(customer_id, limit=2)
+        second = repo.find_by_customer(customer_id, limit=2, cursor=first.next_cursor)
+        third = repo.find_by_customer(customer_id, limit=2, cursor=second.next_cursor)
+
+        pages = [first, second, third]
+        assert [order.id for page in pages for order in page.items] == [order.id for order in orders]
+        assert third.next_cursor is None
+
+    def test_find_by_status_follows_updates(self):
+        repo = InMemoryOrderRepository()
+        orders = [make_order() for _ in range(4)]
+        for order in orders:
+            repo.save(order)
+        orders[1].pay()
+        repo.save(orders[1])
+        orders[3].pay()
+        repo.save(orders[3])
+
+        paid = repo.find_by_status("paid")
+        pending = repo.find_by_status("pending")
+
+        assert [order.id for order in paid.items] == [orders[1].id, orders[3].id]
+        assert [order.id for order in pending.items] == [orders[0].id, orders[2].id]
+        assert paid.next_cursor is None
+
+    def test_cursor_is_stable_when_orders_move(self):
+        repo = InMemoryOrderRepository()
+        orders = [make_order() for _ in range(4)]
+        for order in orders:
+            repo.save(order)
+
+        first = repo.find_by_status("pending", limit=2)
+        orders[0].pay()
+        repo.save(orders[0])
+        second = repo.find_by_status("pending", limit=2, cursor=first.next_cursor)
+
+        assert [order.id for order in second.items] == [orders[2].id, orders[3].id]
+
+    def test_save_without_index_change_skips_index_lock(self):
+        repo = InMemoryOrderRepository()
+        order = make_order()
+        repo.save(order)
+        order.add_line(uuid4(), "Another Product", 1, Money(Decimal('5')))
+
+        with repo._index_lock:
+            saver = threading.Thread(target=repo.save, args=(order,))
+            saver.start()
+            saver.join(1)
+            assert not saver.is_alive()
+
+        assert repo.get_by_id(order.id).total_amount == Money(Decimal('15'))
+        assert [entry.event.version for entry in repo.fetch_pending()] == [1, 2]
+
+    def test_unsupported_repository(self):
+        with pytest.raises(NotImplementedError):
+            ShardedOrderRepository().find_by_status("paid")
@@ -0,0 +1,172 @@
+import threading
+import time
+import pytest
+from decimal import Decimal
+from uuid import uuid4
+from domain.value_objects import Money
+from application.exceptions import OperationTimeout
+from application.interfaces import PaymentGateway
+from infrastructure.resilient_gateway import CircuitBreaker, CircuitOpenError, ResilientPaymentGateway
+from tests.test_caching_repository import FakeClock
+
+
+class ScriptedSlowGateway(PaymentGateway):
+    # Plays back one step per call: True/False is the answer, an exception
+    # instance is raised, and (delay, step) answers after sleeping. The
+    # last step repeats once the script runs out.
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def charge(self, order_id, amount):
+        with self._lock:
+            step = self.script[min(self.calls, len(self.script) - 1)]
+            self.calls += 1
+        if isinstance(step, tuple):
+            delay, step = step
+            time.sleep(delay)
+        if isinstance(step, Exception):
+            raise step
+        return step
+
+
+def charge(gateway):
+    return gateway.charge(uuid4(), Money(Decimal('10')))
+
+
+class TestCircuitBreaker:
+    def test_opens_on_failure_rate_and_fails_fast(self):
+        inner = ScriptedSlowGateway(ConnectionError("down"))
+        breaker = CircuitBreaker(window_size=10, min_calls=4, failure_threshold=0.5)
+        gateway = ResilientPaymentGateway(inner, breaker, max_retries=0)
+
+        for _ in range(4):
+            with pytest.raises(ConnectionError):
+                charge(gateway)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            charge(gateway)
+        assert inner.calls == 4
+
+    def test_opens_on_slow_call_rate(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(min_calls=3, slow_call_threshold=0.6, slow_call_duration=1.0, clock=clock)
+
+        breaker.record(False, 2.0)
+        breaker.record(False, 0.1)
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record(False, 1.5)
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_half_open_trials_close_or_reopen(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(min_calls=1, open_duration=5, half_open_calls=2, clock=clock)
+        breaker.record(True, 0.0)
+        assert not breaker.allow()
+
+        clock.now = 5
+        assert breaker.allow() and breaker.allow()
+        assert not breaker.allow()
+        breaker.record(True, 0.0)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now = 10
+        assert breaker.allow() and breaker.allow()
+        breaker.record(False, 0.0)
+        breaker.record(False, 0.0)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestResilientPaymentGateway:
+    def test_retries_with_jittered_backoff(self):
+        inner = ScriptedSlowGateway(ConnectionError("reset"), ConnectionError("reset"), True)
+        sleeps = []
+        gateway = ResilientPaymentGateway(inner, max_retries=2, backoff=0.1, max_backoff=0.15, sleep=sleeps.append)
+
+        assert charge(gateway) is True
+        assert inner.calls == 3
+        assert 0 <= sleeps[0] <= 0.1
+        assert 0 <= sleeps[1] <= 0.15
+
+    def test_retries_are_bounded(self):
+        inner = ScriptedSlowGateway(ConnectionError("reset"))
+        gateway = ResilientPaymentGateway(inner, max_retries=2, sleep=lambda delay: None)
+
+        with pytest.raises(ConnectionError):
+            charge(gateway)
+        assert inner.calls == 3
+
+    def test_does_not_retry_by_default(self):
+        inner = ScriptedSlowGateway(ConnectionError("reset"), True)
+        gateway = ResilientPaymentGateway(inner, sleep=lambda delay: None)
+
+        with pytest.raises(ConnectionError):
+            charge(gateway)
+        assert inner.calls == 1
+
+    def test_does_not_retry_timeouts_unless_asked(self):
+        inner = ScriptedSlowGateway((1.0, True))
+        gateway = ResilientPaymentGateway(inner, max_retries=2, timeout=0.02, sleep=lambda delay: None)
+
+        with pytest.raises(OperationTimeout):
+            charge(gateway)
+        assert inner.calls == 1
+        gateway.close()
+
+    def test_does_not_retry_other_errors_or_declines(self):
+        inner = ScriptedSlowGateway(ValueError("bad amount"), False)
+        gateway = ResilientPaymentGateway(inner, max_retries=2, sleep=lambda delay: None)
+
+        with pytest.raises(ValueError):
+            charge(gateway)
+        assert charge(gateway) is False
+        assert inner.calls == 2
+
+    def test_timeout_bounds_a_slow_call(self):
+        inner = ScriptedSlowGateway((1.0, True))
+        gateway = ResilientPaymentGateway(inner, max_retries=0, timeout=0.05)
+
+        started = time.monotonic()
+        with pytest.raises(OperationTimeout):
+            charge(gateway)
+        assert time.monotonic() - started < 0.5
+        gateway.close()
+
+    def test_timeout_uses_the_injected_clock(self):
+        inner = ScriptedSlowGateway((1.0, True))
+        ticks = iter([0.0, 0.0])
+        gateway = ResilientPaymentGateway(inner, CircuitBreaker(), timeout=10, clock=lambda: next(ticks, 100.0))
+
+        started = time.monotonic()
+        with pytest.raises(OperationTimeout):
+            charge(gateway)
+        assert time.monotonic() - started < 0.5
+        gateway.close()
+
+    def test_hedged_request_answers_first(self):
+        inner = ScriptedSlowGateway((1.0, False), (0.0, True))
+        gateway = ResilientPaymentGateway(inner, hedge_after=0.02)
+
+        started = time.monotonic()
+        assert charge(gateway) is True
+        assert time.monotonic() - started < 0.5
+        assert inner.calls == 2
+        gateway.close()
+
+    def test_degraded_gateway_fails_fast_once_open(self):
+        inner = ScriptedSlowGateway((0.2, True))
+        breaker = CircuitBreaker(window_size=5, min_calls=5, slow_call_duration=0.02)
+        gateway = ResilientPaymentGateway(inner, breaker, max_retries=0, timeout=0.03)
+
+        for _ in range(5):
+            with pytest.raises(OperationTimeout):
+                charge(gateway)
+
+        started = time.monotonic()
+        with pytest.raises(CircuitOpenError):
+            charge(gateway)
+        assert time.monotonic() - started < 0.01
+        gateway.close()
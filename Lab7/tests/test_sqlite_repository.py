@@ -0,0 +1,199 @@
+import sqlite3
+import time
+import pytest
+from uuid import uuid4
+from application.exceptions import ConcurrencyConflict
+from infrastructure.order_codec import decode_order, encode_order
+from infrastructure.sqlite_repository import SqliteOrderRepository
+from tests.helpers import MIXED_LINES, make_order
+
+
+@pytest.fixture(params=[True, False], ids=["write-behind", "synchronous"])
+def repo(request, tmp_path):
+    repo = SqliteOrderRepository(str(tmp_path / "orders.db"), write_behind=request.param)
+    yield repo
+    repo.close()
+
+
+def test_codec_round_trip():
+    order = make_order(*MIXED_LINES)
+    order.pay()
+
+    decoded = decode_order(encode_order(order))
+
+    assert decoded == order
+    assert decoded._version == order._version
+    assert str(decoded.total_amount.amount) == str(order.total_amount.amount)
+
+
+class TestSqliteOrderRepository:
+    def test_save_and_get(self, repo):
+        order = make_order(*MIXED_LINES)
+        repo.save(order)
+
+        loaded = repo.get_by_id(order.id)
+
+        assert loaded == order
+        assert loaded.total_amount == order.total_amount
+
+    def test_get_missing_order(self, repo):
+        with pytest.raises(ValueError, match="not found"):
+            repo.get_by_id(uuid4())
+
+    def test_stale_save_is_rejected(self, repo):
+        order = make_order(*MIXED_LINES)
+        repo.save(order)
+
+        first = repo.get_by_id(order.id)
+        second = repo.get_by_id(order.id)
+        first.pay()
+        second.pay()
+        repo.save(first)
+
+        with pytest.raises(ConcurrencyConflict):
+            repo.save(second)
+
+    def test_get_many(self, repo):
+        orders = [make_order(*MIXED_LINES) for _ in range(10)]
+        repo.save_many(orders[:5])
+        repo.flush()
+        repo.save_many(orders[5:])
+
+        ids = [order.id for order in reversed(orders)]
+
+        assert [order.id for order in repo.get_many(ids)] == ids
+
+        with pytest.raises(ValueError, match="not found"):
+            repo.get_many([uuid4()])
+
+    def test_orders_survive_reopen(self, repo, tmp_path):
+        order = make_order(*MIXED_LINES)
+        repo.save(order)
+        order.pay()
+        repo.save(order)
+        repo.close()
+
+        with SqliteOrderRepository(str(tmp_path / "orders.db")) as reopened:
+            loaded = reopened.get_by_id(order.id)
+
+        assert loaded.status == "paid"
+        assert loaded._version == order._version
+
+
+def test_write_behind_flushes_within_interval(tmp_path):
+    path = str(tmp_path / "orders.db")
+    repo = SqliteOrderRepository(path, batch_size=10_000, flush_interval=0.01)
+    order = make_order(*MIXED_LINES)
+    repo.save(order)
+
+    with SqliteOrderRepository(path, write_behind=False) as reader:
+        for _ in range(200):
+            try:
+                reader.get_by_id(order.id)
+                break
+            except ValueError:
+                time.sleep(0.01)
+        else:
+            pytest.fail("order was not flushed")
+
+    repo.close()
+
+
+def test_write_behind_survives_failed_write(tmp_path):
+    path = str(tmp_path / "orders.db")
+    repo = SqliteOrderRepository(path, batch_size=10_000, flush_interval=0.01, max_retry_interval=0.02)
+    write = repo._write
+    failures = []
+
+    def flaky_write(rows, events):
+        if not failures:
+            failures.append(len(rows))
+            raise sqlite3.OperationalError("database is locked")
+        write(rows, events)
+
+    repo._write = flaky_write
+    order = make_order(*MIXED_LINES)
+    repo.save(order)
+
+    with SqliteOrderRepository(path, write_behind=False) as reader:
+        for _ in range(200):
+            try:
+                reader.get_by_id(order.id)
+                break
+            except ValueError:
+                time.sleep(0.01)
+        else:
+            pytest.fail("order was not flushed after the failed write")
+
+    assert failures == [1]
+    assert repo._flusher.is_alive()
+    repo.save(make_order(*MIXED_LINES))
+    repo.close()
+
+
+def test_failed_write_is_raised_until_it_succeeds(tmp_path):
+    repo = SqliteOrderRepository(str(tmp_path / "orders.db"), batch_size=10_000, flush_interval=0.01)
+    write = repo._write
+    failing = [True]
+
+    def failing_write(rows, events):
+        if failing[0]:
+            raise sqlite3.OperationalError("database is locked")
+        write(rows, events)
+
+    repo._write = failing_write
+    order = make_order(*MIXED_LINES)
+    repo.save(order)
+    for _ in range(200):
+        if repo._flush_error is not None:
+            break
+        time.sleep(0.01)
+
+    with pytest.raises(sqlite3.OperationalError):
+        repo.save(make_order(*MIXED_LINES))
+    with pytest.raises(sqlite3.OperationalError):
+        repo.flush()
+
+    failing[0] = False
+    repo.flush()
+    repo.save(make_order(*MIXED_LINES))
+    assert repo.get_by_id(order.id).id == order.id
+    repo.close()
+
+
+class FailingCommitConnection:
+    # Fails the next COMMIT without running it, leaving the transaction open
+    # as a busy database would.
+    def __init__(self, connection):
+        self._connection = connection
+        self.failures = 1
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT" and self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return self._connection.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def test_failed_commit_is_rolled_back(tmp_path):
+    with SqliteOrderRepository(str(tmp_path / "orders.db"), write_behind=False) as repo:
+        repo._connection = FailingCommitConnection(repo._connection)
+        order = make_order(*MIXED_LINES)
+
+        with pytest.raises(sqlite3.OperationalError):
+            repo.save(order)
+        assert not repo._connection.in_transaction
+        repo.save(order)
+        entries = repo.fetch_pending()
+
+        repo._connection.failures = 1
+        with pytest.raises(sqlite3.OperationalError):
+            repo.acknowledge(entry.id for entry in entries)
+        assert len(repo.fetch_pending()) == len(entries)
+        repo.acknowledge(entry.id for entry in entries)
+
+        assert repo.get_by_id(order.id) == order
+        assert repo.fetch_pending() == []
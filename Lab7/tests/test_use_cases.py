@@ -1,9 +1,16 @@
+import threading
+import time
 import pytest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 from decimal import Decimal
 from unittest.mock import Mock, patch
 from domain.entities import Order
+from domain.events import OrderPaid
 from domain.value_objects import Money
+from application.exceptions import ConcurrencyConflict, OperationTimeout
+from application.interfaces import PaymentGateway
 from application.use_cases import PayOrderUseCase, PaymentResult
 from infrastructure.repositories import InMemoryOrderRepository
 from infrastructure.payment_gateways import FakePaymentGateway
@@ -78,6 +85,206 @@ class TestPayOrderUseCase:
             assert call_args[0] == self.order_id
             assert call_args[1] == expected_total
 
+    def test_declined_payment_leaves_order_pending(self, setup):
+        with patch.object(self.payment_gateway, 'charge', return_value=False):
+            self.use_case.execute(self.order_id)
+
+        assert self.order_repo.get_by_id(self.order_id).status == "pending"
+
+        with patch.object(self.payment_gateway, 'charge', return_value=True):
+            result = self.use_case.execute(self.order_id)
+
+        assert result.success is True
+
+    def test_gateway_error_leaves_order_pending(self, setup):
+        with patch.object(self.payment_gateway, 'charge', side_effect=TimeoutError("gateway timeout")):
+            result = self.use_case.execute(self.order_id)
+
+        assert result.success is False
+        assert "gateway timeout" in result.message
+        assert self.order_repo.get_by_id(self.order_id).status == "pending"
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_gateway_timeout_leaves_order_reserved(batch):
+    order_repo = InMemoryOrderRepository()
+    order = Order(uuid4(), uuid4())
+    order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+    order_repo.save(order)
+    gateway = Mock(spec=PaymentGateway)
+    gateway.charge.side_effect = OperationTimeout("Payment gateway did not respond within 1s")
+    use_case = PayOrderUseCase(order_repo, gateway)
+
+    result = use_case.execute_many([order.id])[0] if batch else use_case.execute(order.id)
+
+    assert result.success is False
+    assert result.message == ("Payment outcome unknown, order left reserved for reconciliation: "
+                              "Payment gateway did not respond within 1s")
+    assert order_repo.get_by_id(order.id).status == "paid"
+
+
+class CountingPaymentGateway(PaymentGateway):
+    def __init__(self):
+        self.charges = Counter()
+        self._lock = threading.Lock()
+
+    def charge(self, order_id, amount):
+        with self._lock:
+            self.charges[order_id] += 1
+        return True
+
+
+class YieldingOrderRepository(InMemoryOrderRepository):
+    def get_by_id(self, order_id):
+        order = super().get_by_id(order_id)
+        # Let other workers load the same version before this one saves.
+        time.sleep(0.001)
+        return order
+
+
+def test_concurrent_payments_charge_each_order_once():
+    order_repo = YieldingOrderRepository()
+    gateway = CountingPaymentGateway()
+    use_case = PayOrderUseCase(order_repo, gateway)
+    order_ids = []
+    for _ in range(50):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+        order_repo.save(order)
+        order_ids.append(order.id)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(use_case.execute, [order_id for order_id in order_ids for _ in range(16)]))
+
+    assert sum(result.success for result in results) == len(order_ids)
+    assert all(gateway.charges[order_id] == 1 for order_id in order_ids)
+    assert all(order_repo.get_by_id(order_id).status == "paid" for order_id in order_ids)
+
+
+class ScriptedPaymentGateway(PaymentGateway):
+    def __init__(self, declined=(), failing=()):
+        self.declined = set(declined)
+        self.failing = set(failing)
+        self.charges = Counter()
+        self._lock = threading.Lock()
+
+    def charge(self, order_id, amount):
+        with self._lock:
+            self.charges[order_id] += 1
+        if order_id in self.failing:
+            raise ConnectionError("gateway unavailable")
+        return order_id not in self.declined
+
+
+def build_orders(repo, order_ids):
+    for index, order_id in enumerate(order_ids):
+        order = Order(order_id, uuid4())
+        if index != 5:
+            order.add_line(uuid4(), "Product", index + 1, Money(Decimal('10.50')))
+        if index == 7:
+            order.pay()
+        repo.save(order)
+
+
+class TestExecuteMany:
+    def test_matches_sequential_execute(self):
+        order_ids = [uuid4() for _ in range(12)]
+        sequential_repo = InMemoryOrderRepository()
+        build_orders(sequential_repo, order_ids)
+        batch_repo = InMemoryOrderRepository()
+        build_orders(batch_repo, order_ids)
+        requests = order_ids + [uuid4(), order_ids[0], order_ids[2], order_ids[2]]
+        declined = {order_ids[2], order_ids[3]}
+        failing = {order_ids[4]}
+
+        sequential_gateway = ScriptedPaymentGateway(declined, failing)
+        sequential = PayOrderUseCase(sequential_repo, sequential_gateway)
+        expected = [sequential.execute(order_id) for order_id in requests]
+        batch_gateway = ScriptedPaymentGateway(declined, failing)
+        batch = PayOrderUseCase(batch_repo, batch_gateway)
+        results = batch.execute_many(requests, max_concurrency=4)
+
+        assert [(r.success, r.order_id, r.amount_paid, r.message) for r in results] == \
+            [(r.success, r.order_id, r.amount_paid, r.message) for r in expected]
+        assert batch_gateway.charges == sequential_gateway.charges
+        for order_id in order_ids:
+            assert batch_repo.get_by_id(order_id).status == sequential_repo.get_by_id(order_id).status
+
+    def test_concurrent_batches_charge_each_order_once(self):
+        order_repo = YieldingOrderRepository()
+        gateway = CountingPaymentGateway()
+        use_case = PayOrderUseCase(order_repo, gateway)
+        order_ids = []
+        for _ in range(20):
+            order = Order(uuid4(), uuid4())
+            order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+            order_repo.save(order)
+            order_ids.append(order.id)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            batches = list(pool.map(lambda _: use_case.execute_many(order_ids, max_concurrency=4), range(4)))
+
+        assert sum(result.success for batch in batches for result in batch) == len(order_ids)
+        assert all(gateway.charges[order_id] == 1 for order_id in order_ids)
+
+
+class FailingConfirmRepository(InMemoryOrderRepository):
+    # Rejects the first saves that carry an OrderPaid event.
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    def save(self, order):
+        if self.errors and any(isinstance(event, OrderPaid) for event in order._events):
+            raise self.errors.pop(0)
+        super().save(order)
+
+    def save_many(self, orders):
+        for order in orders:
+            self.save(order)
+
+
+def paid_events(repo):
+    return [entry.event for entry in repo.fetch_pending() if isinstance(entry.event, OrderPaid)]
+
+
+@pytest.mark.parametrize("batch", [False, True])
+class TestConfirmPayment:
+    def pay(self, repo, batch):
+        order = Order(uuid4(), uuid4())
+        order.add_line(uuid4(), "Product", 1, Money(Decimal('10')))
+        repo.save(order)
+        use_case = PayOrderUseCase(repo, CountingPaymentGateway(), max_retries=2)
+        if batch:
+            return order.id, use_case.execute_many([order.id])[0]
+        return order.id, use_case.execute(order.id)
+
+    def test_conflict_is_retried_on_a_fresh_copy(self, batch):
+        repo = FailingConfirmRepository([ConcurrencyConflict("modified concurrently")] * 2)
+
+        order_id, result = self.pay(repo, batch)
+
+        assert (result.success, result.message) == (True, "Order paid successfully")
+        assert [event.order_id for event in paid_events(repo)] == [order_id]
+
+    def test_unsaved_confirmation_is_reported(self, batch):
+        repo = FailingConfirmRepository([IOError("disk full")] * 2)
+
+        order_id, result = self.pay(repo, batch)
+
+        assert result.success is True
+        assert result.message == "Order paid, but the payment confirmation was not saved: disk full"
+        assert repo.get_by_id(order_id).status == "paid"
+        assert paid_events(repo) == []
+
+    def test_conflict_after_all_retries_is_reported(self, batch):
+        repo = FailingConfirmRepository([ConcurrencyConflict("modified concurrently")] * 4)
+
+        _, result = self.pay(repo, batch)
+
+        assert result.success is True
+        assert result.message.endswith("not saved: modified concurrently")
+
 
 def test_payment_result_structure():
     order_id = uuid4()